@@ -17,6 +17,7 @@ import json
 from dotenv import load_dotenv
 
 from backend.podcast.ml.inference.rl_bandit import HybridLinUCBModel
+from backend.podcast.ml.inference.engines import build_engine
 from backend.podcast.ml.retrieval.merger import Article, Merger
 
 from backend.podcast.AppData import AppData
@@ -36,7 +37,8 @@ class NewsPodcastPipeline:
         self,
         perplexity_api_key: str,
         openai_api_key: str,
-        mistral_api_key: str
+        mistral_api_key: str,
+        rl_agent: HybridLinUCBModel = None
     ):
         self.scraper = NewsScraperAgent(perplexity_api_key)
         self.interest_classifier = InterestClassifierAgent(openai_api_key)
@@ -44,8 +46,15 @@ class NewsPodcastPipeline:
         self.drafter = StoryDrafterAgent(openai_api_key)
         self.stories = []
 
-        self.articles: list[Article] = Merger(db_path = "backend/podcast/ml/retrieval/db/").merge()
-        self.rl_agent = HybridLinUCBModel(articles=self.articles, alpha=1.0, learning_rate=1.0, stabilization=0.001, feedback_exponent=2.0)
+        # Reuse an already built bandit (e.g. the one in global_instances) when given, so the
+        # corpus is not loaded and the model not constructed a second time at startup.
+        # Otherwise the engine configured in settings.yaml is built, as in global_instances.
+        if rl_agent is None:
+            self.articles: list[Article] = Merger(db_path = "backend/podcast/ml/retrieval/db/").merge()
+            rl_agent = build_engine(self.articles)
+        else:
+            self.articles: list[Article] = rl_agent.articles
+        self.rl_agent = rl_agent
 
         self.script_generators = [
 
@@ -14,7 +14,7 @@ from flask_socketio import SocketIO, emit
 
 from backend.podcast.AppData import AppData
 
-from podcast.global_instances import rl_model, graph
+from podcast.global_instances import bandit, graph, checkpoint_writer
 import whisper
 
 # Configure logging
@@ -85,7 +85,7 @@ def build():
     """Health check endpoint."""
     return jsonify({"message": "Podcast generation service is running"})
 
-runner  = PodcastRunner()
+runner  = PodcastRunner(rl_agent=bandit)
 @app.route("/generate", methods=["POST"])  # Ensure it's POST method
 def generate():
     """Handles user request, generates a podcast, and returns the file URL."""
@@ -226,19 +226,34 @@ def get_all_transcript_files():
         logger.error(f"Error retrieving transcripts: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
-@app.route("/api/graph_init", methods=["GET"])
-def graph_init():
-    e = graph.generate_init_nodes()
-    print('embedding', e)
-    graph.update_interest_scores()
-
+def graph_nodes(with_interest=True):
+    """The graph nodes for the frontend; the first node of each section carries its label."""
     nodes = []
     categories = []
     for i in range(len(graph.nodes)):
-        nodes.append({'id': i, 'position': graph.nodes[i].embedding_3d, 'label': '', 'interest_score': 0})
+        interest_score = getattr(graph.nodes[i], 'interest_score', 0) if with_interest else 0
+        nodes.append({'id': i, 'position': graph.nodes[i].embedding_3d, 'label': '', 'interest_score': interest_score})
         if graph.nodes[i].section not in categories:
             categories.append(graph.nodes[i].section)
             nodes[i]['label'] = graph.nodes[i].section
+    return nodes
+
+def emit_graph_layout(positions):
+    " PUSH A NEW GRAPH LAYOUT (STAGED REFINEMENT OR SCHEDULED REFIT) TO CLIENTS "
+    socketio.emit('graph_layout', {"nodes": graph_nodes(), "edges": []})
+
+graph.on_layout = emit_graph_layout
+
+@app.route("/api/graph_init", methods=["GET"])
+def graph_init():
+    # The layout is computed once in the background at startup (and cached on disk).
+    graph.ensure_layout()
+    # Articles that arrived since the layout was fitted are placed into it incrementally.
+    graph.sync_nodes()
+    print('embedding', graph.index.positions)
+    graph.update_interest_scores()
+
+    nodes = graph_nodes(with_interest=False)
 
     print('nodes', nodes)
     # Return JSON in a format convenient for your frontend
@@ -246,19 +261,15 @@ def graph_init():
 
 @app.route("/api/graph_update/<x>/<y>/<z>", methods=["GET"])
 def graph_update(x, y, z):
-    graph.update_rl_model(float(x), float(y), float(z))
+    # ?radius=r gives feedback to the nodes around the click instead of its whole section.
+    graph.sync_nodes()
+    graph.update_rl_model(float(x), float(y), float(z), radius=request.args.get("radius", type=float))
     print('updated rl')
     graph.update_interest_scores()
     print('updated interest scores')
     print(graph.nodes)
 
-    nodes = []
-    categories = []
-    for i in range(len(graph.nodes)):
-        nodes.append({'id': i, 'position': graph.nodes[i].embedding_3d, 'label': '', 'interest_score': graph.nodes[i].interest_score})
-        if graph.nodes[i].section not in categories:
-            categories.append(graph.nodes[i].section)
-            nodes[i]['label'] = graph.nodes[i].section
+    nodes = graph_nodes()
     
     print('nodes', nodes)
     print('finished updating')
@@ -315,6 +326,9 @@ def handle_error(error):
     return jsonify({"error": "Internal server error"}), 500
 
 if __name__ == "__main__":
+    checkpoint_writer.start()
+    graph.start_layout()
+    graph.start_refits(interval=float(os.getenv("GRAPH_REFIT_INTERVAL", 3600)))
     socketio.run(app,
         host=app.config['HOST'],
         port=app.config['PORT'],
@@ -1,25 +1,229 @@
-from sklearn.manifold import TSNE
 from podcast.ml.retrieval.merger import Merger
 from podcast.ml.inference.rl_bandit import HybridLinUCBModel
+from podcast.ml.layout.spatial_index import SpatialIndex
+from podcast.ml.layout.layout_cache import LayoutCache
+from podcast.ml.layout.placement import place_points
+from podcast.ml.layout.engines import PCALayout, create_layout_engine
 import numpy as np
 import math
+import threading
 
 class InterestGraph:
 
-    def __init__(self, rl_model):
+    def __init__(self, rl_model, cache_dir=None, engine="tsne", engine_params=None, staged=False):
+        """
+        Parameters
+        ----------
+        rl_model : HybridLinUCBModel or ConcurrentBandit
+            The recommender whose articles are the nodes of the graph.
+        cache_dir : str, optional
+            Directory of the layout cache (see layout_cache.py). By default layouts are
+            not persisted.
+        engine : str, optional
+            Layout engine: "pca", "tsne" or "umap" (see layout/engines.py; default is "tsne").
+        engine_params : dict, optional
+            Parameters of the layout engine.
+        staged : bool, optional
+            Make start_layout install a PCA layout at once and the engine's layout when it
+            is ready, announced through `on_layout` (default is False).
+        """
         self.nodes = rl_model.articles
         self.rl_model = rl_model
+        # KD-tree over the nodes' embedding_3d, rebuilt with every new layout (see set_layout).
+        self.index = None
+        self.engine = create_layout_engine(engine, **(engine_params or {}))
+        self.staged = staged
+        # Called with the new positions whenever a layout computed in the background is
+        # installed (the refined layout of staged mode, scheduled refits).
+        self.on_layout = None
+        self._layout_engine = self.engine  # the engine of the current layout
+        self.layout_cache = LayoutCache(cache_dir) if cache_dir else None
+        # Embeddings of the nodes (aligned with self.nodes), the reference of incremental placement.
+        self._embeddings = None
+        self.placed_since_fit = 0  # nodes placed incrementally since the last full fit
+        self._layout_lock = threading.RLock()
+        self._layout_thread = None
+        self._refit_thread = None
+        self._stop_refits = threading.Event()
 
     def generate_init_nodes(self):
+        """
+        Lay the nodes out in 3D with the layout engine and return the (n x 3) positions.
+        A layout computed before for the same articles and engine parameters is read
+        from the layout cache instead of being fitted again.
+        """
+        with self._layout_lock:
+            embeddings_3d, self._embeddings = self._fit_layout(self.nodes)
+            self.set_layout(embeddings_3d)
+            self._layout_engine = self.engine
+            self.placed_since_fit = 0
+        
+        return embeddings_3d
+
+    def _fit_layout(self, nodes, engine=None):
+        """
+        The layout of `nodes` by `engine` (by default the graph's engine; from the layout
+        cache if possible) and their embeddings.
+        """
+        engine = engine or self.engine
         embeddings = []
-        for node in self.nodes:
+        for node in nodes:
             embeddings.append(node.embedding)
-        tsne = TSNE(n_components=3, perplexity=30, learning_rate=200, n_iter=1000)
-        embeddings_3d = tsne.fit_transform(np.array(embeddings))
-        for i in range(len(embeddings_3d)):
-            self.nodes[i].embedding_3d = embeddings_3d[i].tolist()
+        embeddings = np.array(embeddings)
+        ids = [node.id for node in nodes]
+        embeddings_3d = self.layout_cache.get(ids, engine.config()) if self.layout_cache else None
+        if embeddings_3d is None:
+            embeddings_3d = engine.fit_transform(embeddings)
+            if self.layout_cache:
+                self.layout_cache.put(ids, engine.config(), embeddings_3d)
+        return embeddings_3d, embeddings
+
+    def sync_nodes(self):
+        """
+        Catch up with the articles of the recommender: removed articles leave the graph,
+        and new ones are placed into the current layout next to their nearest neighbours
+        in embedding space (see placement.py) instead of refitting it. The layout is
+        refitted by refit_layout, e.g. on the schedule of start_refits.
         
-        return embeddings_3d
+        Returns
+        -------
+        tuple of int
+            The number of nodes added and removed.
+        """
+        with self._layout_lock:
+            articles = self.rl_model.articles
+            if self.index is None:
+                self.nodes = articles
+                return 0, 0
+            live = {article.id for article in articles}
+            known = {node.id for node in self.nodes}
+            keep = [i for i, node in enumerate(self.nodes) if node.id in live]
+            new = [article for article in articles if article.id not in known]
+            if len(keep) == len(self.nodes) and not new:
+                return 0, 0
+            removed = len(self.nodes) - len(keep)
+            nodes = [self.nodes[i] for i in keep]
+            positions, embeddings = self.index.positions[keep], self._embeddings[keep]
+            if new:
+                new_embeddings = np.array([article.embedding for article in new])
+                if len(nodes):
+                    new_positions = place_points(embeddings, positions, new_embeddings,
+                                                 n_iter=self._layout_engine.placement_steps)
+                else:
+                    new_positions = np.zeros((len(new), 3))
+                nodes += new
+                positions = np.vstack([positions, new_positions])
+                embeddings = np.vstack([embeddings, new_embeddings])
+            self.nodes = nodes
+            self._embeddings = embeddings
+            self.set_layout(positions)
+            self.placed_since_fit += len(new)
+            return len(new), removed
+
+    def refit_layout(self):
+        """
+        Refit the layout of the current nodes. The fit runs without holding the layout
+        lock, so requests keep being served from the current layout meanwhile; nodes
+        that arrived during the fit are then placed into the new layout, and the result
+        is passed to `on_layout`.
+        """
+        with self._layout_lock:
+            self.sync_nodes()
+            nodes = list(self.nodes)
+        embeddings_3d, embeddings = self._fit_layout(nodes)
+        with self._layout_lock:
+            self.nodes = nodes
+            self._embeddings = embeddings
+            self.set_layout(embeddings_3d)
+            self._layout_engine = self.engine
+            self.placed_since_fit = 0
+            self.sync_nodes()
+            positions = self.index.positions
+        if self.on_layout is not None:
+            self.on_layout(positions)
+
+    def start_refits(self, interval=3600.0):
+        """
+        Check every `interval` seconds, in a background thread, for articles that joined
+        the graph since the last fit, and refit the layout if there are any.
+        """
+        def run():
+            while not self._stop_refits.wait(interval):
+                if self.index is None:
+                    continue
+                self.sync_nodes()
+                if self.placed_since_fit:
+                    self.refit_layout()
+
+        self._stop_refits.clear()
+        self._refit_thread = threading.Thread(target=run, name="graph-refit", daemon=True)
+        self._refit_thread.start()
+
+    def stop_refits(self):
+        self._stop_refits.set()
+        if self._refit_thread is not None:
+            self._refit_thread.join()
+
+    def start_layout(self):
+        """
+        Compute the initial layout (generate_init_nodes) in a background thread, so that
+        requests can use it as soon as it is ready (see ensure_layout).
+        
+        In staged mode, a PCA layout is installed right away instead, and the engine's
+        layout replaces it from the background thread (see refit_layout).
+        """
+        target = self.generate_init_nodes
+        if self.staged and not self._is_cached(self.nodes):
+            with self._layout_lock:
+                self._layout_engine = PCALayout()
+                embeddings_3d, self._embeddings = self._fit_layout(self.nodes, self._layout_engine)
+                self.set_layout(embeddings_3d)
+            target = self.refit_layout
+        self._layout_thread = threading.Thread(target=target, name="graph-layout", daemon=True)
+        self._layout_thread.start()
+
+    def _is_cached(self, nodes):
+        if self.layout_cache is None:
+            return False
+        return self.layout_cache.get([node.id for node in nodes], self.engine.config()) is not None
+
+    def ensure_layout(self):
+        """
+        Return the current (n x 3) layout, waiting for the background layout if it is
+        still being computed. Without one (never started, or failed), the layout is
+        computed here.
+        """
+        if self.index is None and self._layout_thread is not None:
+            self._layout_thread.join()
+        if self.index is None:
+            self.generate_init_nodes()
+        return self.index.positions
+
+    def set_layout(self, embeddings_3d):
+        """
+        Place the nodes at `embeddings_3d` (one 3D position per node) and rebuild the
+        spatial index over them.
+        """
+        for i in range(len(embeddings_3d)):
+            self.nodes[i].embedding_3d = list(map(float, embeddings_3d[i]))
+        self.index = SpatialIndex(embeddings_3d)
+
+    def nearest_nodes(self, x, y, z, k=1):
+        """
+        The `k` nodes closest to the point (x, y, z) of the layout, nearest first.
+        """
+        return [self.nodes[i] for i in self._index().nearest((x, y, z), k)[0].tolist()]
+
+    def nodes_within(self, x, y, z, radius):
+        """
+        The nodes within distance `radius` of the point (x, y, z) of the layout, nearest first.
+        """
+        return [self.nodes[i] for i in self._index().within((x, y, z), radius).tolist()]
+
+    def _index(self):
+        if self.index is None:
+            raise RuntimeError("The graph has no layout yet; call generate_init_nodes() first.")
+        return self.index
 
     def update_interest_scores(self):
         n = self.rl_model.n_articles
@@ -29,22 +233,28 @@ class InterestGraph:
             top_articles[x - 1].interest_score = 1 - (1 / n * x)**(1/3)
 
     
-    def update_rl_model(self, x, y, z):
-        closest_article = self.nodes[0]
-        dist = float('inf')
-        for node in self.nodes:
-            e = node.embedding_3d
-            d = (e[0] - x) ** 2 + (e[1] - y) ** 2 + (e[2] - z) ** 2
-            if d < dist:
-                dist = d
-                closest_article = node
+    def update_rl_model(self, x, y, z, radius=None):
+        """
+        Give positive feedback for a click at (x, y, z) in the graph: to every article in
+        the section of the closest node or, with a `radius`, to the nodes within `radius`
+        of the click (at least the closest one).
         
-        category = closest_article.section
-        print(category)
+        Returns once the feedback is applied, so that update_interest_scores reflects it
+        (a ConcurrentBandit applies writes in its writer thread and returns a Future).
+        """
         delta = 80
-        for i in range(len(self.nodes)):
-            if self.nodes[i].section == category:
-                self.rl_model.feedback(i, delta)
+        if radius is not None:
+            neighbourhood = self.nodes_within(x, y, z, radius) or self.nearest_nodes(x, y, z)
+            articles = [node._id for node in neighbourhood if node._id is not None]
+        else:
+            closest_article = self.nearest_nodes(x, y, z)[0]
+            
+            category = closest_article.section
+            print(category)
+            articles = [node._id for node in self.nodes if node.section == category and node._id is not None]
+        pending = self.rl_model.feedback_many(articles, [delta] * len(articles))
+        if pending is not None:
+            pending.result()
 
 
 
@@ -1,9 +1,45 @@
-from podcast.ml.inference.rl_bandit import HybridLinUCBModel
+import os
+from podcast.ml.inference.engines import build_engine, load_bandit_config
+from podcast.ml.inference.checkpoint import CheckpointWriter
+from podcast.ml.inference.event_log import EventLog, recover
+from podcast.ml.inference.sharded import ShardedScorer
+from podcast.ml.inference.concurrent_bandit import ConcurrentBandit
 from podcast.generate_graph_nodes import InterestGraph
+from podcast.ml.layout.engines import load_layout_config
 from podcast.ml.retrieval.merger import Merger
 
 url = "backend/podcast/ml/retrieval/db/"
 merger = Merger(db_path = url)
 articles = merger.merge()
-rl_model = HybridLinUCBModel(articles)
-graph = InterestGraph(rl_model)
\ No newline at end of file
+bandit_config = load_bandit_config()
+rl_model = build_engine(articles, bandit_config)
+
+# Runtime state (checkpoints, the event log, the layout cache) lives under a data directory
+# outside the source tree; each location can also be set on its own.
+data_dir = os.getenv("EARLYBIRD_DATA_DIR", "data/")
+
+# Warm start from the last checkpoint plus the events logged after it, keep logging
+# every event, and keep checkpointing in the background (the writer is started by
+# flask-app.py).
+checkpoint_dir = os.getenv("RL_CHECKPOINT_DIR", os.path.join(data_dir, "bandit", "checkpoint"))
+event_log_path = os.getenv("RL_EVENT_LOG", os.path.join(data_dir, "bandit", "events.log"))
+os.makedirs(os.path.dirname(event_log_path) or ".", exist_ok=True)
+recover(rl_model, event_log_path, checkpoint_dir)
+rl_model.event_log = EventLog(event_log_path)
+
+# Optionally spread exhaustive scoring over worker processes (for very large corpora).
+# The workers are forked here, before any thread of the app is started.
+scoring_workers = int(os.getenv("RL_SCORING_WORKERS", 0))
+if scoring_workers > 1:
+    rl_model.scorer = ShardedScorer(rl_model.corpus, n_workers=scoring_workers)
+
+# Request threads go through the thread-safe front end; from here on only its writer
+# thread modifies rl_model.
+bandit = ConcurrentBandit(rl_model)
+checkpoint_writer = CheckpointWriter(rl_model, checkpoint_dir, interval=float(os.getenv("RL_CHECKPOINT_INTERVAL", 300)),
+                                     lock=bandit.write_lock)
+
+layout_config = load_layout_config()
+graph = InterestGraph(bandit, cache_dir=os.getenv("GRAPH_LAYOUT_DIR", os.path.join(data_dir, "layout")),
+                      engine=layout_config["engine"], engine_params=layout_config["params"],
+                      staged=layout_config["staged"])
\ No newline at end of file
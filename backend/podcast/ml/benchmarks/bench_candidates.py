@@ -0,0 +1,60 @@
+"""
+Benchmark two-stage recommendation (ANN candidate generation + exact UCB on the
+candidates, HybridLinUCBModel(candidate_pool=...)) against exhaustive scoring, and
+report recall@k of the two-stage top-k against the exhaustive top-k.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_candidates --sizes 10000 50000 --dim 64 --pool 400
+"""
+import argparse
+import time
+import numpy as np
+from backend.podcast.ml.inference.rl_bandit import TiedHybridLinUCBModel
+from backend.podcast.ml.benchmarks.synthetic import make_articles
+
+
+def run(sizes, d, pool, k, trials):
+    for n in sizes:
+        articles = make_articles(n, d, n_topics=100)
+        exhaustive = TiedHybridLinUCBModel(articles, diversity="none")
+        two_stage = TiedHybridLinUCBModel(articles, diversity="none", candidate_pool=pool)
+
+        # A user who likes one topic: seed it and give feedback on a few of its articles.
+        rng = np.random.default_rng(0)
+        liked = exhaustive.embeddings[rng.integers(n)]
+        close = np.argsort(-(exhaustive.embeddings @ liked))[:30]
+        for model in (exhaustive, two_stage):
+            model.seeding([liked.tolist()], [5])
+            model.feedback_many(close, np.full(len(close), 90.0))
+
+        start = time.perf_counter()
+        two_stage.ann_index
+        build_time = time.perf_counter() - start
+
+        exhaustive_time = two_stage_time = recall = 0.0
+        for _ in range(trials):
+            start = time.perf_counter()
+            expected = {a._id for a in exhaustive.return_next_articles(k)}
+            exhaustive_time += time.perf_counter() - start
+            start = time.perf_counter()
+            actual = {a._id for a in two_stage.return_next_articles(k)}
+            two_stage_time += time.perf_counter() - start
+            recall += len(expected & actual) / k
+            exhaustive.reset()
+            two_stage.reset()
+
+        print(f"n={n:>6} d={d} pool={pool}: exhaustive {exhaustive_time / trials * 1000:7.1f} ms | "
+              f"two-stage {two_stage_time / trials * 1000:6.1f} ms (index build {build_time:.2f} s) | "
+              f"recall@{k} {recall / trials:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--pool", type=int, default=400)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--trials", type=int, default=5)
+    args = parser.parse_args()
+    run(args.sizes, args.dim, args.pool, args.k, args.trials)
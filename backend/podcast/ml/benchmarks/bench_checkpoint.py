@@ -0,0 +1,55 @@
+"""
+Benchmark checkpoint save/load (checkpoint.py): size on disk, save time, and warm
+start time of a restarted model (constructor plus memory-mapped load), and check that
+the restored model scores like the original up to float32 rounding.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_checkpoint --articles 50000 --dim 384
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from backend.podcast.ml.inference.rl_bandit import HybridLinUCBModel, TiedHybridLinUCBModel
+from backend.podcast.ml.benchmarks.synthetic import make_articles, random_feedback
+
+
+def run(n_articles, d, n_events):
+    articles = make_articles(n_articles, d)
+    for cls in (HybridLinUCBModel, TiedHybridLinUCBModel):
+        model = cls(articles)
+        random_feedback(model, n_events)
+        all_arms = np.arange(n_articles)
+        reference = model._score_arms(all_arms, model.A0_factor.solve(model.b0))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "checkpoint")
+            start = time.perf_counter()
+            model.save(path)
+            save_time = time.perf_counter() - start
+            size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+            start = time.perf_counter()
+            restored = cls(articles)
+            build_time = time.perf_counter() - start
+            start = time.perf_counter()
+            restored.load(path)
+            load_time = time.perf_counter() - start
+
+        scores = restored._score_arms(all_arms, restored.A0_factor.solve(restored.b0))
+        gap = np.max(np.abs(scores - reference)) / np.max(np.abs(reference))
+        assert gap < 1e-4, f"restored model diverges: relative score difference {gap:.1e}"
+        print(f"n={n_articles} d={d} {cls.__name__:>22}: {size / 2 ** 20:7.2f} MiB | save {save_time * 1000:7.1f} ms "
+              f"| warm start {build_time * 1000:7.1f} ms build + {load_time * 1000:6.1f} ms load "
+              f"| relative score difference {gap:.1e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--events", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.articles, args.dim, args.events)
@@ -0,0 +1,101 @@
+"""
+Benchmark the compact per-arm state (state_dtype / state_path of HybridLinUCBModel):
+memory of the arm store, feedback and recommendation latency, and recommendation
+quality of float32 state, in memory or memory-mapped, against the float64 default.
+
+Quality is measured two ways: the largest score difference and the overlap of the top
+picks after the same feedback stream, and the cumulative regret of simulated users
+(benchmarks/simulator.py) recommended to with each storage mode.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_compact_state --articles 20000 --dim 64 --events 2000
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+from backend.podcast.ml.inference.rl_bandit import HybridLinUCBModel, TiedHybridLinUCBModel
+from backend.podcast.ml.benchmarks import simulator
+from backend.podcast.ml.benchmarks.synthetic import make_articles
+
+
+def feedback_stream(model, n_events, seed=0):
+    """
+    Apply `n_events` random feedback events; return the per-event latencies.
+    """
+    rng = np.random.default_rng(seed)
+    arms = rng.integers(model.n_articles, size=n_events)
+    scores = rng.integers(1, 101, size=n_events)
+    latencies = []
+    for arm, score in zip(arms.tolist(), scores.tolist()):
+        start = time.perf_counter()
+        model.feedback(arm, float(score))
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+
+def with_path(state, name):
+    """
+    `state` with its state_path (if any) moved to the subdirectory `name`: models must not
+    share their state files.
+    """
+    if state.get("state_path") is None:
+        return state
+    return dict(state, state_path=f"{state['state_path']}/{name}")
+
+
+def regret(articles, cls, state, n_users, rounds, per_round):
+    """
+    Mean cumulative regret of `n_users` simulated users of a `cls` model with `state` options.
+    """
+    simulator._init_worker(articles)
+    embeddings = np.array([article.embedding for article in articles])
+    totals = []
+    for seed in range(n_users):
+        model = cls(articles, **with_path(state, f"user{seed}"))
+        user = simulator.SyntheticUser(embeddings, seed=seed)
+        totals.append(simulator.simulate(model, user, embeddings, rounds, per_round)["regret"].sum())
+    return float(np.mean(totals))
+
+
+def run(n_articles, d, n_events, n_users, rounds, per_round):
+    articles = make_articles(n_articles, d, n_topics=50)
+    all_arms = np.arange(n_articles)
+    for cls in (HybridLinUCBModel, TiedHybridLinUCBModel):
+        reference = None
+        with tempfile.TemporaryDirectory() as tmp:
+            modes = (("float64", {}), ("float32", {"state_dtype": "float32"}),
+                     ("float32 mmap", {"state_dtype": "float32", "state_path": tmp}))
+            for name, state in modes:
+                model = cls(articles, **with_path(state, "stream"))
+                feedback = feedback_stream(model, n_events)
+                start = time.perf_counter()
+                for _ in range(5):
+                    model.return_next_articles(5, update_state=False)
+                recommend = (time.perf_counter() - start) / 5 * 1000
+                scores = model._score_arms(all_arms, model.A0_factor.solve(model.b0))
+                top = set(np.argsort(-scores)[:50].tolist())
+                if reference is None:
+                    reference = scores, top
+                gap = np.max(np.abs(scores - reference[0]))
+                overlap = len(top & reference[1]) / 50
+                size, n_touched = model.arms.nbytes(), len(model.arms)
+                del model
+                mean_regret = regret(articles, cls, state, n_users, rounds, per_round)
+                print(f"{cls.__name__:>22} {name:>12}: arm state {size / 2 ** 20:8.2f} MiB "
+                      f"({n_touched} arms) | feedback p50 {np.percentile(feedback, 50):6.3f} ms "
+                      f"| recommend {recommend:7.2f} ms | max score difference {gap:.1e}, top-50 overlap "
+                      f"{overlap:.0%} | regret {mean_regret:7.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--per-round", type=int, default=5)
+    args = parser.parse_args()
+    run(args.articles, args.dim, args.events, args.users, args.rounds, args.per_round)
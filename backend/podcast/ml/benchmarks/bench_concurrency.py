@@ -0,0 +1,134 @@
+"""
+Benchmark concurrent scoring and feedback: reader threads calling
+return_next_articles() while a burst of feedback arrives, served by ConcurrentBandit
+(snapshot reads, coalesced writes) versus one model behind a single lock. Reports
+reader latency percentiles and how many writes get applied, and checks that the
+coalesced writes end in the same state as applying the feedback one event at a time.
+Both the tied and the general model are run.
+
+It also times acknowledged writes (feedback(...).result(), i.e. until the write is
+published in a snapshot) once `--touched` arms have state, to check that publishing a
+snapshot does not copy the per-arm state of every touched arm.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_concurrency --articles 20000 --readers 4 --events 5000 --touched 500
+"""
+import argparse
+import threading
+import time
+import numpy as np
+from backend.podcast.ml.inference.rl_bandit import HybridLinUCBModel, TiedHybridLinUCBModel
+from backend.podcast.ml.inference.concurrent_bandit import ConcurrentBandit
+from backend.podcast.ml.benchmarks.synthetic import make_articles
+
+
+class LockedModel:
+    """
+    The baseline: every call holds one lock around the model.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.lock = threading.Lock()
+
+    def return_next_articles(self, num_articles, update_state=False):
+        with self.lock:
+            return self.model.return_next_articles(num_articles, update_state=update_state)
+
+    def feedback(self, article, score):
+        with self.lock:
+            self.model.feedback(article, score)
+
+
+def serve(bandit, events, n_readers, duration):
+    """
+    Run `n_readers` reader threads for `duration` seconds while a writer thread submits
+    `events` as fast as it can. Returns the read latencies (ms) and the number of
+    feedback events applied to the model within `duration`.
+    """
+    latencies = []
+    done = threading.Event()
+
+    def reader():
+        while not done.is_set():
+            start = time.perf_counter()
+            bandit.return_next_articles(5, update_state=False)
+            latencies.append(time.perf_counter() - start)
+
+    def writer():
+        for article, score in events:
+            if done.is_set():
+                return
+            bandit.feedback(article, score)
+
+    threads = [threading.Thread(target=reader) for _ in range(n_readers)] + [threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    applied = bandit.model.num_updates
+    done.set()
+    for thread in threads:
+        thread.join()
+    return np.array(latencies) * 1000, applied
+
+
+def write_latency(model_class, articles, n_touched, n_writes=50):
+    """
+    Median milliseconds per acknowledged write to a ConcurrentBandit whose model has
+    state for `n_touched` arms.
+    """
+    model = model_class(articles)
+    model.feedback_many(np.arange(n_touched), np.full(n_touched, 80.0))
+    bandit = ConcurrentBandit(model)
+    rng = np.random.default_rng(1)
+    times = []
+    for article in rng.integers(n_touched, size=n_writes).tolist():
+        start = time.perf_counter()
+        bandit.feedback(article, 70.0).result()
+        times.append(time.perf_counter() - start)
+    bandit.close()
+    return np.median(times) * 1000
+
+
+def run(n_articles, d, n_readers, n_events, duration, n_touched):
+    articles = make_articles(n_articles, d)
+    rng = np.random.default_rng(0)
+    events = list(zip(rng.integers(n_articles, size=n_events).tolist(), rng.uniform(1, 100, n_events).tolist()))
+
+    for model_class in (TiedHybridLinUCBModel, HybridLinUCBModel):
+        print(model_class.__name__)
+        for name, bandit in (("single lock", LockedModel(model_class(articles))),
+                             ("snapshots", ConcurrentBandit(model_class(articles)))):
+            latencies, applied = serve(bandit, events, n_readers, duration)
+            print(f"{name:>12}: {len(latencies):6d} reads, latency p50 {np.percentile(latencies, 50):7.2f} ms "
+                  f"p99 {np.percentile(latencies, 99):7.2f} ms | {applied:6d} of {n_events} writes applied "
+                  f"in {duration:.0f} s")
+
+        # The coalesced writes must end in the same state as sequential feedback().
+        bandit.flush()
+        reference = model_class(articles)
+        for article, score in events:
+            reference.feedback(article, score)
+        model = bandit.model
+        all_arms = np.arange(n_articles)
+        gap = np.max(np.abs(model._score_arms(all_arms, model.A0_factor.solve(model.b0))
+                            - reference._score_arms(all_arms, reference.A0_factor.solve(reference.b0))))
+        assert gap < 1e-6, f"coalesced writes diverge from sequential feedback: {gap:.2e}"
+        print(f"{'snapshots':>12}: {bandit.version} published versions for {n_events} events "
+              f"| max score difference to sequential feedback {gap:.1e}")
+        bandit.close()
+        print(f"{'':>12}  acknowledged write with {n_touched} touched arms: "
+              f"{write_latency(model_class, articles, n_touched):7.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--touched", type=int, default=500, help="arms with state in the write latency test")
+    args = parser.parse_args()
+    run(args.articles, args.dim, args.readers, args.events, args.duration, args.touched)
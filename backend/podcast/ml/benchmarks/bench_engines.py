@@ -0,0 +1,63 @@
+"""
+Compare the recommender engines of engines.py on a simulated listener: recommendation
+latency, and the reward collected over a session.
+
+The listener has a hidden preference direction w. Each round the engine recommends a
+few articles, and the listener scores each one 50 + 50 * tanh(gain * x.w) plus noise
+(the 1-100 feedback scale of the app). Engines are compared on the mean true affinity
+x.w of what they recommended, averaged over several listeners.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_engines --articles 20000 --dim 64 --rounds 40
+"""
+import argparse
+import time
+import numpy as np
+from backend.podcast.ml.inference.engines import ENGINES, create_engine
+from backend.podcast.ml.benchmarks.synthetic import make_articles
+
+
+def simulate(engine, preference, rounds, per_round, gain, rng):
+    latencies, affinities = [], []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        picks = engine.return_next_articles(per_round)
+        latencies.append(time.perf_counter() - start)
+        ids = np.array([article._id for article in picks])
+        affinity = engine.embeddings[ids] @ preference
+        scores = np.clip(50 + 50 * np.tanh(gain * affinity) + rng.normal(0, 5, len(ids)), 1, 100)
+        engine.feedback_many(ids, scores)
+        affinities.append(affinity.mean())
+    return np.array(latencies) * 1000, np.array(affinities)
+
+
+def run(n_articles, d, engines, rounds, per_round, listeners, gain):
+    articles = make_articles(n_articles, d, n_topics=20)
+    for name in engines:
+        latencies, affinities = [], []
+        for listener in range(listeners):
+            rng = np.random.default_rng(listener)
+            preference = rng.standard_normal(d)
+            preference /= np.linalg.norm(preference)
+            engine = create_engine(name, articles)
+            lat, aff = simulate(engine, preference, rounds, per_round, gain, rng)
+            latencies.append(lat)
+            affinities.append(aff)
+        latencies, affinities = np.concatenate(latencies), np.array(affinities)
+        print(f"{name:>12}: recommend p50 {np.percentile(latencies, 50):7.2f} ms p99 {np.percentile(latencies, 99):7.2f} ms "
+              f"| mean affinity first {rounds // 4} rounds {affinities[:, :rounds // 4].mean():+.3f}, "
+              f"last {rounds // 4} rounds {affinities[:, -(rounds // 4):].mean():+.3f}, overall {affinities.mean():+.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--engines", nargs="+", default=["linucb_tied", "thompson"], choices=sorted(ENGINES))
+    parser.add_argument("--rounds", type=int, default=40)
+    parser.add_argument("--per-round", type=int, default=5)
+    parser.add_argument("--listeners", type=int, default=5)
+    parser.add_argument("--gain", type=float, default=3.0)
+    args = parser.parse_args()
+    run(args.articles, args.dim, args.engines, args.rounds, args.per_round, args.listeners, args.gain)
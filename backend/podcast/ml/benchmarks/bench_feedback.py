@@ -0,0 +1,76 @@
+"""
+Benchmark HybridLinUCBModel.feedback (Sherman-Morrison / Woodbury inverse updates)
+against the original implementation that re-inverts A[a] and A0 on every call, and
+check that both paths stay numerically equivalent.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_feedback --dims 64 128 384 --events 1000
+"""
+import argparse
+import time
+import numpy as np
+from backend.podcast.ml.inference.rl_bandit import HybridLinUCBModel
+from backend.podcast.ml.benchmarks.synthetic import make_articles
+
+
+def reference_feedback(model, article, score):
+    """
+    The original feedback(): full np.linalg.inv of A[a] and A0 on every call.
+    """
+    deviation = score - 50.0
+    reward = 0.0 if deviation == 0 else np.sign(deviation) * ((abs(deviation) / 50.0) ** model.feedback_exponent)
+    eta = model._compute_effective_lr()
+    x = model.embeddings[article].reshape(model.d, 1)
+    z = x.copy()
+    row = model.arms.ensure(article)
+    A, B, b = model.arms.A, model.arms.B, model.arms.b
+    A[row] = A[row] + eta * (x @ x.T)
+    b[row] = b[row] + eta * (reward * x)
+    B[row] = B[row] + eta * (x @ z.T)
+    model.arms.A_inv[row] = A_inv = np.linalg.inv(A[row])
+    factor = model.A0_factor
+    factor.matrix = factor.matrix + eta * (z @ z.T - B[row].T @ A_inv @ B[row])
+    model.b0 = model.b0 + eta * (reward * z - B[row].T @ A_inv @ b[row])
+    factor.inv = np.linalg.inv(factor.matrix)
+    model.num_updates += 1
+
+
+def run(dims, n_events, n_articles=200, tol=1e-6):
+    for d in dims:
+        articles = make_articles(n_articles, d)
+        rng = np.random.default_rng(0)
+        events = list(zip(rng.integers(n_articles, size=n_events).tolist(),
+                          rng.integers(1, 101, size=n_events).astype(float).tolist()))
+
+        incremental = HybridLinUCBModel(articles)
+        start = time.perf_counter()
+        for article, score in events:
+            incremental.feedback(article, score)
+        incremental_time = time.perf_counter() - start
+
+        reference = HybridLinUCBModel(articles)
+        start = time.perf_counter()
+        for article, score in events:
+            reference_feedback(reference, article, score)
+        reference_time = time.perf_counter() - start
+
+        A0_inv_err = np.max(np.abs(incremental.A0_inv - reference.A0_inv)) / np.max(np.abs(reference.A0_inv))
+        touched = len(reference.arms)
+        A_inv_err = np.max(np.abs(incremental.arms.A_inv[:touched] - reference.arms.A_inv[:touched]))
+        beta_err = np.max(np.abs(incremental.A0_inv @ incremental.b0 - reference.A0_inv @ reference.b0))
+        assert max(A0_inv_err, A_inv_err) < tol, f"incremental inverses drifted: {A0_inv_err:.2e} / {A_inv_err:.2e}"
+
+        print(f"d={d:>4}: inv {reference_time / n_events * 1000:8.3f} ms/update | "
+              f"incremental {incremental_time / n_events * 1000:7.3f} ms/update | "
+              f"speedup x{reference_time / incremental_time:5.1f} | "
+              f"rel. A0_inv err {A0_inv_err:.1e}, A_inv err {A_inv_err:.1e}, beta err {beta_err:.1e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dims", type=int, nargs="+", default=[64, 128, 384])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--tol", type=float, default=1e-6)
+    args = parser.parse_args()
+    run(args.dims, args.events, tol=args.tol)
@@ -0,0 +1,49 @@
+"""
+Benchmark section-level feedback as triggered by a click in the 3D graph
+(InterestGraph.update_rl_model): a loop of feedback() calls versus one
+feedback_many() call, and check that both leave the model in the same state.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_feedback_many --articles 6000 --dims 64 384
+"""
+import argparse
+import time
+import numpy as np
+from backend.podcast.ml.inference.rl_bandit import TiedHybridLinUCBModel
+from backend.podcast.ml.benchmarks.synthetic import make_articles
+
+
+def run(n_articles, dims, solver):
+    for d in dims:
+        articles = make_articles(n_articles, d)
+        section = articles[0].section
+        indices = [i for i, article in enumerate(articles) if article.section == section]
+        scores = [80] * len(indices)
+
+        looped = TiedHybridLinUCBModel(articles, solver=solver)
+        start = time.perf_counter()
+        for i, score in zip(indices, scores):
+            looped.feedback(i, score)
+        loop_time = time.perf_counter() - start
+
+        batched = TiedHybridLinUCBModel(articles, solver=solver)
+        start = time.perf_counter()
+        batched.feedback_many(indices, scores)
+        batch_time = time.perf_counter() - start
+
+        all_arms = np.arange(n_articles)
+        gap = np.max(np.abs(looped._score_arms(all_arms, looped.A0_factor.solve(looped.b0))
+                            - batched._score_arms(all_arms, batched.A0_factor.solve(batched.b0))))
+        assert gap < 1e-6, f"feedback_many diverges from the feedback() loop: {gap:.2e}"
+        print(f"d={d:>4}, {len(indices)} articles in section '{section}': loop {loop_time * 1000:8.1f} ms "
+              f"| feedback_many {batch_time * 1000:6.1f} ms | max score difference {gap:.1e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=6000)
+    parser.add_argument("--dims", type=int, nargs="+", default=[64, 384])
+    parser.add_argument("--solver", default="inverse", choices=["inverse", "cholesky"])
+    args = parser.parse_args()
+    run(args.articles, args.dims, args.solver)
@@ -0,0 +1,63 @@
+"""
+Benchmark continuous ingestion: a model that keeps receiving fresh articles (and
+retiring old ones) through add_articles()/remove_articles(), versus rebuilding the
+model from scratch for every batch. Also checks that ingestion leaves the learned
+state alone: after every batch the surviving arms score exactly as before.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_ingest --articles 20000 --batch 500 --batches 20
+"""
+import argparse
+import time
+import numpy as np
+from backend.podcast.ml.inference.rl_bandit import TiedHybridLinUCBModel
+from backend.podcast.ml.benchmarks.synthetic import make_articles, random_feedback
+
+
+def run(n_articles, d, batch, n_batches):
+    articles = make_articles(n_articles + batch * n_batches, d)
+    corpus, stream = articles[:n_articles], articles[n_articles:]
+    model = TiedHybridLinUCBModel(corpus)
+    random_feedback(model, 500)
+
+    ingest_time = rebuild_time = 0.0
+    gap = 0.0
+    for i in range(n_batches):
+        fresh = stream[i * batch:(i + 1) * batch]
+        retired = corpus[:batch]
+        corpus = corpus[batch:]
+        survivors = np.array([article._id for article in corpus])
+        beta_hat = model.A0_factor.solve(model.b0)
+        before = model._score_arms(survivors, beta_hat)
+
+        start = time.perf_counter()
+        model.remove_articles(retired)
+        model.add_articles(fresh)
+        ingest_time += time.perf_counter() - start
+        gap = max(gap, np.max(np.abs(model._score_arms(survivors, beta_hat) - before)))
+        corpus = corpus + fresh
+
+        start = time.perf_counter()
+        TiedHybridLinUCBModel(list(corpus))
+        rebuild_time += time.perf_counter() - start
+        # The rebuild reassigned the _id of the articles it indexed; restore ours.
+        for slot, article in zip(model.corpus.live_slots(), model.articles):
+            article._id = int(slot)
+
+    assert gap == 0.0, f"ingestion changed the scores of surviving arms: {gap:.2e}"
+    assert model.n_slots <= n_articles + batch, "freed slots were not reused"
+    print(f"n={n_articles} d={d}, {n_batches} batches of {batch}: "
+          f"add/remove {ingest_time / n_batches * 1000:7.2f} ms/batch | "
+          f"rebuild {rebuild_time / n_batches * 1000:8.1f} ms/batch (and loses all learned state) | "
+          f"{model.n_slots} slots for {model.n_articles} live arms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--batches", type=int, default=20)
+    args = parser.parse_args()
+    run(args.articles, args.dim, args.batch, args.batches)
@@ -0,0 +1,53 @@
+"""
+Benchmark the layout cache behind /api/graph_init (layout/layout_cache.py): a cold
+3D t-SNE fit of the article embeddings (the default layout engine of InterestGraph),
+versus reading the stored layout back, and check that a layout is found again for the
+same articles listed in a different order.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_layout_cache --nodes 2000 --dim 384
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+from backend.podcast.ml.layout.engines import create_layout_engine
+from backend.podcast.ml.layout.layout_cache import LayoutCache
+from backend.podcast.ml.benchmarks.synthetic import make_articles
+
+
+def run(n_nodes, d, max_iter):
+    engine = create_layout_engine("tsne", max_iter=max_iter)
+    params = engine.config()
+    articles = make_articles(n_nodes, d, n_topics=20)
+    ids = [article.id for article in articles]
+    embeddings = np.array([article.embedding for article in articles])
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LayoutCache(tmp)
+        start = time.perf_counter()
+        assert cache.get(ids, params) is None
+        layout = engine.fit_transform(embeddings)
+        cache.put(ids, params, layout)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cached = cache.get(ids, params)
+        warm = time.perf_counter() - start
+        assert np.array_equal(cached, layout)
+
+        order = np.random.default_rng(0).permutation(n_nodes)
+        shuffled = cache.get([ids[i] for i in order], params)
+        assert np.array_equal(shuffled, layout[order]), "layout not aligned with the order of the ids"
+        assert cache.get(ids, dict(params, perplexity=50)) is None, "layouts of other parameters must not match"
+    print(f"n={n_nodes} d={d}: t-SNE fit {cold:7.2f} s | cached layout {warm * 1000:6.2f} ms "
+          f"(x{cold / warm:.0f})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--max-iter", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.nodes, args.dim, args.max_iter)
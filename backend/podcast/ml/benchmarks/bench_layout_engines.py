@@ -0,0 +1,71 @@
+"""
+Benchmark the layout engines of the 3D interest graph (layout/engines.py): wall time
+and neighbourhood preservation, i.e. the fraction of a point's 10 nearest neighbours
+in embedding space that are also among its 10 nearest neighbours in the layout
+(averaged over a sample of 1000 points).
+
+The embeddings are synthetic but structured like sentence embeddings of news: a
+clustered 8-dim latent space mapped nonlinearly into `--dim` dimensions, so that
+neighbourhoods are meaningful (isotropic noise around cluster centres has no
+neighbourhood structure a 3D layout could keep). The staged mode of InterestGraph
+serves the PCA layout first and the engine's layout when it is ready, so its first
+layout arrives after the PCA time.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_layout_engines --sizes 5000 50000 --engines pca umap tsne
+"""
+import argparse
+import time
+import numpy as np
+from scipy.spatial import cKDTree
+from backend.podcast.ml.layout.engines import LAYOUT_ENGINES, create_layout_engine
+
+
+def make_embeddings(n, d, n_topics=30, latent_dim=8, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(0, 3, (n_topics, latent_dim))
+    latent = centres[rng.integers(n_topics, size=n)] + rng.standard_normal((n, latent_dim))
+    X = np.tanh(latent @ (rng.standard_normal((latent_dim, d)) / np.sqrt(latent_dim)))
+    X += 0.05 * rng.standard_normal((n, d))
+    return X / np.linalg.norm(X, axis=1, keepdims=True)
+
+
+def neighbourhood_recall(X, layout, sample, k=10):
+    similarity = X[sample] @ X.T
+    similarity[np.arange(len(sample)), sample] = -np.inf
+    expected = np.argpartition(-similarity, k, axis=1)[:, :k]
+    found = cKDTree(layout).query(layout[sample], k=k + 1)[1][:, 1:]
+    return np.mean([len(set(a) & set(b)) / k for a, b in zip(expected.tolist(), found.tolist())])
+
+
+def run(sizes, engines, d, baseline):
+    runs = [(name, create_layout_engine(name)) for name in engines]
+    if baseline:
+        # The previous InterestGraph layout: sklearn t-SNE on the raw embeddings, one thread.
+        runs.append(("tsne (before)", create_layout_engine("tsne", pca_dims=None, n_jobs=None)))
+    for n in sizes:
+        X = make_embeddings(n, d)
+        sample = np.random.default_rng(1).choice(n, size=min(n, 1000), replace=False)
+        times = {}
+        for name, engine in runs:
+            start = time.perf_counter()
+            layout = engine.fit_transform(X)
+            times[name] = time.perf_counter() - start
+            print(f"n={n:>6} {name:>14}: {times[name]:8.2f} s | neighbourhood recall "
+                  f"{neighbourhood_recall(X, layout, sample):.3f}")
+        if "pca" in times:
+            for name in times:
+                if name != "pca":
+                    print(f"n={n:>6} {'staged ' + name:>14}: first layout after {times['pca']:.2f} s, "
+                          f"refined after {times['pca'] + times[name]:.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 50000])
+    parser.add_argument("--engines", nargs="+", default=sorted(LAYOUT_ENGINES), choices=sorted(LAYOUT_ENGINES))
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--baseline", action="store_true", help="also run the previous t-SNE configuration")
+    args = parser.parse_args()
+    run(args.sizes, args.engines, args.dim, args.baseline)
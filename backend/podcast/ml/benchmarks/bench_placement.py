@@ -0,0 +1,65 @@
+"""
+Benchmark incremental placement of new articles into the 3D interest graph
+(layout/placement.py, InterestGraph.sync_nodes) against refitting the t-SNE layout
+of all articles.
+
+Quality is the neighbourhood recall of the new points: the fraction of each new
+article's 10 nearest articles in embedding space that are also among its 10 nearest
+nodes in the layout.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_placement --nodes 2000 --new 200 --dim 64
+"""
+import argparse
+import time
+import numpy as np
+from scipy.spatial import cKDTree
+from backend.podcast.ml.layout.engines import create_layout_engine
+from backend.podcast.ml.layout.placement import place_points
+from backend.podcast.ml.benchmarks.synthetic import make_articles
+
+
+def neighbourhood_recall(embeddings, layout, points, k=10):
+    """
+    Mean fraction of the `k` embedding-space neighbours of `points` that are among their
+    `k` nearest neighbours in `layout`.
+    """
+    E = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    similarity = E[points] @ E.T
+    similarity[np.arange(len(points)), points] = -np.inf
+    expected = np.argpartition(-similarity, k, axis=1)[:, :k]
+    found = cKDTree(layout).query(layout[points], k=k + 1)[1][:, 1:]
+    return np.mean([len(set(a) & set(b)) / k for a, b in zip(expected.tolist(), found.tolist())])
+
+
+def run(n_nodes, n_new, d, max_iter):
+    engine = create_layout_engine("tsne", max_iter=max_iter)
+    articles = make_articles(n_nodes + n_new, d, n_topics=20)
+    embeddings = np.array([article.embedding for article in articles])
+    old, new = embeddings[:n_nodes], embeddings[n_nodes:]
+    new_points = np.arange(n_nodes, n_nodes + n_new)
+    layout = engine.fit_transform(old)
+
+    start = time.perf_counter()
+    refit = engine.fit_transform(embeddings)
+    refit_time = time.perf_counter() - start
+    print(f"n={n_nodes} + {n_new} new, d={d}: full refit {refit_time:8.2f} s "
+          f"| recall {neighbourhood_recall(embeddings, refit, new_points):.3f}")
+    for n_iter in (0, engine.placement_steps):
+        start = time.perf_counter()
+        placed = place_points(old, layout, new, n_iter=n_iter)
+        elapsed = time.perf_counter() - start
+        recall = neighbourhood_recall(embeddings, np.vstack([layout, placed]), new_points)
+        print(f"{'':>{len(str(n_nodes)) + len(str(n_new)) + 19}}placement, {n_iter:>2} refinement steps "
+              f"{elapsed * 1000:7.1f} ms | recall {recall:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--new", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--max-iter", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.nodes, args.new, args.dim, args.max_iter)
@@ -0,0 +1,98 @@
+"""
+Benchmark the bandit on projected embeddings (projection.py) against the raw 384-dim
+vectors: recommendation and feedback latency, how much of the raw model's top-k the
+projected model recovers (recall@k) after the same seeds and feedback, both for the
+UCB ranking and for the ranking by predicted reward, and the mean true affinity to
+the listener of the top-k by predicted reward.
+
+The listener of the feedback prefers one topic, a direction in the raw space, and
+the seeds are raw topic vectors, as Embedor would produce them; both go through the
+projection exactly as in the app.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_projection --articles 20000 --dims 32 64 128
+"""
+import argparse
+import time
+import numpy as np
+from backend.podcast.ml.inference.rl_bandit import TiedHybridLinUCBModel
+from backend.podcast.ml.inference.projection import EmbeddingProjection
+from backend.podcast.ml.benchmarks.synthetic import make_articles
+
+
+def train(model, seeds, events):
+    model.seeding(seeds, [5, -3, 2])
+    start = time.perf_counter()
+    for article, score in events:
+        model.feedback(article, score)
+    return (time.perf_counter() - start) / len(events) * 1000
+
+
+def top(model, k, alpha):
+    """
+    The ids of the top-k articles, ranked with exploration weight `alpha` (0 ranks by
+    the predicted reward alone).
+    """
+    model.alpha, configured = alpha, model.alpha
+    picks = [int(article.id) for article in model.return_next_articles(k, update_state=False)]
+    model.alpha = configured
+    return picks
+
+
+def recommend_latency(model, repeats):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.return_next_articles(5, update_state=False)
+        latencies.append(time.perf_counter() - start)
+    return np.percentile(latencies, 50) * 1000
+
+
+def run(n_articles, raw_dim, dims, methods, n_events, k, repeats):
+    articles = make_articles(n_articles, raw_dim, n_topics=50)
+    raw = np.array([article.embedding for article in articles])
+    rng = np.random.default_rng(0)
+    # The listener likes the topic of one random article (relative to the average article).
+    liked = rng.integers(n_articles)
+    preference = raw[liked] - raw.mean(axis=0)
+    preference /= np.linalg.norm(preference)
+    shown = rng.integers(n_articles, size=n_events)
+    scores = np.clip(50 + 50 * np.tanh(3 * raw[shown] @ preference) + rng.normal(0, 5, n_events), 1, 100)
+    events = list(zip(shown.tolist(), scores.tolist()))
+    # One liked seed on the listener's topic, then a disliked and a mildly liked one.
+    seeds = np.vstack([raw[liked], raw[rng.choice(n_articles, size=2, replace=False)]])
+
+    reference = TiedHybridLinUCBModel(articles, diversity=None)
+    feedback_ms = train(reference, seeds, events)
+    expected = {alpha: top(reference, k, alpha) for alpha in (1.0, 0.0)}
+    print(f"{'raw':>6} d={raw_dim:>3}: recommend p50 {recommend_latency(reference, repeats):7.2f} ms "
+          f"| feedback {feedback_ms:6.3f} ms/event | {'':11} | top-{k} affinity "
+          f"{(raw[expected[0.0]] @ preference).mean():+.3f}")
+
+    for method in methods:
+        for d in dims:
+            start = time.perf_counter()
+            projection = EmbeddingProjection.fit(raw, d, method=method)
+            fit_time = time.perf_counter() - start
+            model = TiedHybridLinUCBModel(articles, diversity=None, projection=projection)
+            feedback_ms = train(model, seeds, events)
+            picks = {alpha: top(model, k, alpha) for alpha in (1.0, 0.0)}
+            recall = {alpha: len(set(picks[alpha]) & set(expected[alpha])) / k for alpha in picks}
+            print(f"{method:>6} d={d:>3}: recommend p50 {recommend_latency(model, repeats):7.2f} ms "
+                  f"| feedback {feedback_ms:6.3f} ms/event | fit {fit_time:5.2f} s | top-{k} affinity "
+                  f"{(raw[picks[0.0]] @ preference).mean():+.3f} | recall@{k} UCB {recall[1.0]:.2f}, "
+                  f"predicted reward {recall[0.0]:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--raw-dim", type=int, default=384)
+    parser.add_argument("--dims", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument("--methods", nargs="+", default=["pca", "random"], choices=["pca", "random"])
+    parser.add_argument("--events", type=int, default=300)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    run(args.articles, args.raw_dim, args.dims, args.methods, args.events, args.k, args.repeats)
@@ -0,0 +1,66 @@
+"""
+Benchmark the feedback event log (event_log.py): the cost of logging live feedback,
+and replaying a log into a fresh model (batched feedback_many) versus the original
+one-event-at-a-time feedback() calls. Also checks that replay reproduces the state.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_replay --articles 20000 --events 20000
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from backend.podcast.ml.inference.rl_bandit import TiedHybridLinUCBModel
+from backend.podcast.ml.inference.event_log import EventLog, replay
+from backend.podcast.ml.benchmarks.synthetic import make_articles
+
+
+def run(n_articles, d, n_events):
+    articles = make_articles(n_articles, d)
+    rng = np.random.default_rng(0)
+    arms = rng.integers(n_articles, size=n_events)
+    scores = rng.uniform(1, 100, size=n_events)
+    seeds = rng.standard_normal((3, d))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.log")
+        live = TiedHybridLinUCBModel(articles)
+        live.seeding(seeds, [4, -2, 3])
+        start = time.perf_counter()
+        for arm, score in zip(arms.tolist(), scores.tolist()):
+            live.feedback(arm, score)
+        plain_time = time.perf_counter() - start
+
+        logged = TiedHybridLinUCBModel(articles)
+        logged.event_log = EventLog(path)
+        logged.seeding(seeds, [4, -2, 3])
+        start = time.perf_counter()
+        for arm, score in zip(arms.tolist(), scores.tolist()):
+            logged.feedback(arm, score)
+        logged_time = time.perf_counter() - start
+        logged.event_log.close()
+        size = os.path.getsize(path)
+
+        replayed = TiedHybridLinUCBModel(articles)
+        start = time.perf_counter()
+        replay(replayed, path)
+        replay_time = time.perf_counter() - start
+
+    all_arms = np.arange(n_articles)
+    gap = np.max(np.abs(logged._score_arms(all_arms, logged.A0_factor.solve(logged.b0))
+                        - replayed._score_arms(all_arms, replayed.A0_factor.solve(replayed.b0))))
+    assert gap < 1e-6, f"replay diverges from the logged model: {gap:.2e}"
+    print(f"n={n_articles} d={d}, {n_events} events: feedback() {plain_time * 1000:7.1f} ms "
+          f"| with logging {logged_time * 1000:7.1f} ms ({size / 2 ** 20:.2f} MiB log) "
+          f"| replay {replay_time * 1000:6.1f} ms | max score difference {gap:.1e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--events", type=int, default=20000)
+    args = parser.parse_args()
+    run(args.articles, args.dim, args.events)
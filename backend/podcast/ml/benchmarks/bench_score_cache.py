@@ -0,0 +1,67 @@
+"""
+Benchmark the cached score terms (score_cache.py and the per-arm terms of
+ArmStateStore): steady-state return_next_articles() latency in a feedback /
+recommend loop, with the caches versus recomputing every term on each call, and
+check that both give the same scores.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_score_cache --articles 100000 --dim 64 --rounds 50
+"""
+import argparse
+import time
+import numpy as np
+from backend.podcast.ml.inference.rl_bandit import HybridLinUCBModel, TiedHybridLinUCBModel
+from backend.podcast.ml.benchmarks.synthetic import make_articles, random_feedback
+
+
+def drop_caches(model):
+    model._quad_cache.invalidate()
+    if hasattr(model.arms, "dirty"):
+        model.arms.dirty[:] = True
+
+
+def loop(model, rounds, cached, rng):
+    """
+    Alternate one feedback event and one recommendation; return the recommendation latencies.
+    """
+    latencies = []
+    for _ in range(rounds):
+        model.feedback(int(rng.integers(model.n_articles)), float(rng.integers(1, 101)))
+        if not cached:
+            drop_caches(model)
+        start = time.perf_counter()
+        model.return_next_articles(5, update_state=False)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+
+def run(n_articles, d, rounds, n_events):
+    articles = make_articles(n_articles, d)
+    for cls in (TiedHybridLinUCBModel, HybridLinUCBModel):
+        results = {}
+        for cached in (False, True):
+            model = cls(articles)
+            random_feedback(model, n_events)
+            model.return_next_articles(5, update_state=False)  # fill the caches
+            results[cached] = loop(model, rounds, cached, np.random.default_rng(1))
+        all_arms = np.arange(n_articles)
+        beta_hat = model.A0_factor.solve(model.b0)
+        scores = model._score_arms(all_arms, beta_hat)
+        drop_caches(model)
+        gap = np.max(np.abs(scores - model._score_arms(all_arms, beta_hat)))
+        assert gap < 1e-8, f"cached scores diverge from recomputed ones: {gap:.2e}"
+        print(f"n={n_articles} d={d} {cls.__name__:>22}: recommend after each feedback p50 "
+              f"{np.percentile(results[False], 50):7.2f} ms recomputed, {np.percentile(results[True], 50):7.2f} ms "
+              f"cached (x{np.percentile(results[False], 50) / np.percentile(results[True], 50):.1f}) "
+              f"| cache {model._quad_cache.nbytes() / 2 ** 20:.1f} MiB | max score difference {gap:.1e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--events", type=int, default=300)
+    args = parser.parse_args()
+    run(args.articles, args.dim, args.rounds, args.events)
@@ -0,0 +1,89 @@
+"""
+Benchmark onboarding a new user with seeding(): all seeds applied as one low-rank
+update of A0 (with Woodbury on its inverse) versus the previous loop of one outer
+product per seed followed by a full re-inversion, and check that both leave the
+model scoring the same.
+
+With --embed, also time embedding the interest list with Embedor (one batch, cold and
+then from the topic cache); this needs sentence-transformers and the MiniLM model.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_seeding --articles 20000 --dims 64 384 --seeds 20
+"""
+import argparse
+import time
+import numpy as np
+from backend.podcast.ml.inference.rl_bandit import TiedHybridLinUCBModel
+from backend.podcast.ml.benchmarks.synthetic import make_articles
+
+TOPICS = ["Technology", "Health", "Science", "Politics", "Climate", "Space", "Economy", "Football",
+          "Basketball", "Movies", "Music", "Travel", "Food", "Education", "Artificial intelligence",
+          "Elections", "Startups", "Energy", "Books", "Fashion"]
+
+
+def seed_one_by_one(model, seed_embeddings, seed_scores, seed_lr=5.0):
+    """
+    The previous seeding(): one outer product per seed, then a full re-inversion.
+    """
+    model._own_state()
+    for emb, score in zip(seed_embeddings, seed_scores):
+        z = np.array(emb, dtype=float).reshape(model.k, 1)
+        model.A0_factor.matrix += seed_lr * (z @ z.T)
+        model.b0 = model.b0 + seed_lr * (score * z)
+    model.A0_factor.set_matrix(model.A0_factor.matrix)
+    model._quad_cache.invalidate()
+
+
+def run(n_articles, dims, n_seeds, repeats, embed):
+    for d in dims:
+        articles = make_articles(n_articles, d)
+        rng = np.random.default_rng(0)
+        seeds = rng.standard_normal((n_seeds, d))
+        seeds /= np.linalg.norm(seeds, axis=1, keepdims=True)
+        scores = rng.integers(-5, 6, n_seeds).astype(float)
+
+        template = TiedHybridLinUCBModel(articles)
+        template.return_next_articles(5, update_state=False)  # a warm user: q cache filled
+        timings = {}
+        for name, seed in (("one by one", seed_one_by_one), ("low-rank", TiedHybridLinUCBModel.seeding)):
+            elapsed = []
+            for _ in range(repeats):
+                user = template.fork()
+                start = time.perf_counter()
+                seed(user, seeds, scores)
+                user.return_next_articles(5)
+                elapsed.append(time.perf_counter() - start)
+            timings[name] = (np.percentile(elapsed, 50) * 1000, user)
+
+        loop_user, batched_user = timings["one by one"][1], timings["low-rank"][1]
+        all_arms = np.arange(n_articles)
+        gap = np.max(np.abs(loop_user._score_arms(all_arms, loop_user.A0_factor.solve(loop_user.b0))
+                            - batched_user._score_arms(all_arms, batched_user.A0_factor.solve(batched_user.b0))))
+        assert gap < 1e-8, f"low-rank seeding diverges from the loop: {gap:.2e}"
+        print(f"n={n_articles} d={d:>3} {n_seeds} seeds: seeding + first recommendation p50 "
+              f"{timings['one by one'][0]:7.2f} ms one by one, {timings['low-rank'][0]:7.2f} ms low-rank "
+              f"| max score difference {gap:.1e}")
+
+    if embed:
+        from backend.podcast.ml.inference.embed import Embedor
+        embedor = Embedor()
+        topics = (TOPICS * (n_seeds // len(TOPICS) + 1))[:n_seeds]
+        start = time.perf_counter()
+        embedor.embed_many(topics)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        embedor.embed_many(topics)
+        warm = time.perf_counter() - start
+        print(f"Embedor, {n_seeds} topics: {cold * 1000:7.2f} ms in one batch, {warm * 1000:7.3f} ms from the cache")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--dims", type=int, nargs="+", default=[64, 384])
+    parser.add_argument("--seeds", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--embed", action="store_true", help="also time Embedor (needs sentence-transformers)")
+    args = parser.parse_args()
+    run(args.articles, args.dims, args.seeds, args.repeats, args.embed)
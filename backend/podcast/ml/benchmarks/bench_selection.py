@@ -0,0 +1,67 @@
+"""
+Benchmark the selection stage of return_next_articles: the original full sort plus two
+Python passes over (score, idx) tuples versus the partial top-k / per-section reduction
+in selection.py, checking that both pick the same articles. Also times the MMR mode.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_selection --sizes 10000 50000 200000 --k 5
+"""
+import argparse
+import time
+import numpy as np
+from backend.podcast.ml.inference.selection import select_by_section, select_mmr
+
+
+def reference_select(scores, sections, k):
+    """
+    The original selection: sort everything, then one pass per section and one fill pass.
+    """
+    ranked = sorted(zip(scores.tolist(), range(len(scores))), key=lambda tup: tup[0], reverse=True)
+    selected, seen = [], set()
+    for _, a in ranked:
+        if sections[a] not in seen:
+            selected.append(a)
+            seen.add(sections[a])
+        if len(selected) >= k:
+            break
+    if len(selected) < k:
+        for _, a in ranked:
+            if a not in selected:
+                selected.append(a)
+            if len(selected) >= k:
+                break
+    return selected
+
+
+def run(sizes, k, n_sections=40, d=64):
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        scores = rng.standard_normal(n)
+        codes = rng.integers(n_sections, size=n)
+        sections = [f"section-{c}" for c in codes.tolist()]
+        embeddings = rng.standard_normal((n, d))
+
+        start = time.perf_counter()
+        expected = reference_select(scores, sections, k)
+        reference_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = select_by_section(scores, codes, n_sections, k).tolist()
+        section_time = time.perf_counter() - start
+        assert actual == expected, "selection differs from the sort-based reference"
+
+        start = time.perf_counter()
+        select_mmr(scores, embeddings, k)
+        mmr_time = time.perf_counter() - start
+
+        print(f"n={n:>7} k={k}: sort + passes {reference_time * 1000:8.1f} ms | "
+              f"section reduction {section_time * 1000:6.2f} ms | mmr {mmr_time * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 200000])
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+    run(args.sizes, args.k)
@@ -0,0 +1,69 @@
+"""
+Benchmark per-user sessions (sessions.py): memory per session before and after the
+first feedback, the cost of a recommendation in a cold (disk-evicted) versus warm
+session, and check that sessions do not see each other's feedback.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_sessions --articles 20000 --users 2000
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+from backend.podcast.ml.inference.rl_bandit import TiedHybridLinUCBModel
+from backend.podcast.ml.inference.sessions import SessionManager
+from backend.podcast.ml.benchmarks.synthetic import make_articles
+
+
+def session_bytes(model, template):
+    """
+    Bytes held by a session beyond what it shares with the template.
+    """
+    own = model._returned.nbytes
+    if model.arms is not template.arms:
+        own += model.arms.nbytes()
+    if model.A0_factor is not template.A0_factor:
+        own += 2 * model.A0_factor.matrix.nbytes + model.b0.nbytes  # A0 with its inverse, and b0
+    if model._quad_cache is not template._quad_cache:
+        own += model._quad_cache.nbytes()
+    return own
+
+
+def run(n_articles, d, n_users, max_sessions):
+    articles = make_articles(n_articles, d)
+    template = TiedHybridLinUCBModel(articles)
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        sessions = SessionManager(template, tmp, max_sessions=max_sessions)
+        listeners = [sessions.get(user) for user in range(n_users)][-max_sessions:]
+        idle = np.mean([session_bytes(m, sessions.template) for m in listeners])
+
+        start = time.perf_counter()
+        for user in range(n_users):
+            model = sessions.get(user)
+            picks = model.return_next_articles(5)
+            model.feedback(picks[0]._id, float(rng.integers(1, 101)))
+        cold = (time.perf_counter() - start) / n_users
+
+        in_memory = [sessions.get(user) for user in range(max(0, n_users - max_sessions), n_users)]
+        active = np.mean([session_bytes(m, sessions.template) for m in in_memory])
+        start = time.perf_counter()
+        for model in in_memory:
+            model.return_next_articles(5)
+        warm = (time.perf_counter() - start) / len(in_memory)
+
+        assert all(m.num_updates == 1 for m in in_memory), "sessions leaked feedback into each other"
+    print(f"n={n_articles} d={d}, {n_users} users ({max_sessions} in memory): "
+          f"{idle / 1024:7.1f} KiB/session before feedback, {active / 1024:7.1f} KiB after "
+          f"| recommend+feedback {cold * 1000:6.2f} ms (mostly cold) | warm recommend {warm * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--max-sessions", type=int, default=500)
+    args = parser.parse_args()
+    run(args.articles, args.dim, args.users, args.max_sessions)
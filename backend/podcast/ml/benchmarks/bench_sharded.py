@@ -0,0 +1,59 @@
+"""
+Benchmark sharded scoring (sharded.py): return_next_articles() latency on a large
+corpus scored in-process versus spread over 1, 2, 4, ... worker processes, and check
+that every mode returns the same articles as in-process scoring.
+
+Speedup is bounded by the physical cores of the machine; run it with --workers up
+to that number.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_sharded --articles 200000 --dim 64 --workers 1 2 4
+"""
+import argparse
+import time
+import numpy as np
+from backend.podcast.ml.inference.rl_bandit import TiedHybridLinUCBModel
+from backend.podcast.ml.inference.sharded import ShardedScorer
+from backend.podcast.ml.benchmarks.synthetic import make_articles, random_feedback
+
+
+def recommend(model, diversity, repeats):
+    latencies, picks = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        articles = model.return_next_articles(5, update_state=False, diversity=diversity)
+        latencies.append(time.perf_counter() - start)
+        picks = [article._id for article in articles]
+    return np.percentile(latencies, 50) * 1000, picks
+
+
+def run(n_articles, d, workers, n_events, repeats):
+    model = TiedHybridLinUCBModel(make_articles(n_articles, d, n_topics=50))
+    model.seeding(np.random.default_rng(1).standard_normal((3, d)).tolist(), [-3, 2, 5])
+    random_feedback(model, n_events)
+
+    for diversity in ("section", "mmr", "none"):
+        model.scorer = None
+        base, expected = recommend(model, diversity, repeats)
+        print(f"n={n_articles} d={d} diversity={diversity:>7}: in-process p50 {base:8.2f} ms")
+        for n_workers in workers:
+            scorer = ShardedScorer(model.corpus, n_workers=n_workers, min_arms=0)
+            model.scorer = scorer
+            latency, picks = recommend(model, diversity, repeats)
+            scorer.close()
+            assert picks == expected, f"sharded scoring picked {picks}, expected {expected}"
+            print(f"{'':>{len(str(n_articles)) + len(str(d)) + 30}}{n_workers:2d} workers p50 {latency:8.2f} ms "
+                  f"(x{base / latency:.2f})")
+    model.scorer = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+    run(args.articles, args.dim, args.workers, args.events, args.repeats)
@@ -0,0 +1,70 @@
+"""
+Benchmark the node lookup of a click in the 3D interest graph
+(InterestGraph.update_rl_model): the previous linear scan over every node's
+embedding_3d versus the KD-tree of layout/spatial_index.py, for nearest-node and
+radius queries, and check that both find the same nodes.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_spatial_index --nodes 5000 50000 --queries 200
+"""
+import argparse
+import time
+from types import SimpleNamespace
+import numpy as np
+from backend.podcast.ml.layout.spatial_index import SpatialIndex
+
+
+def scan_nearest(nodes, x, y, z):
+    """
+    The previous lookup: a Python loop over the nodes.
+    """
+    closest, dist = 0, float('inf')
+    for i, node in enumerate(nodes):
+        e = node.embedding_3d
+        d = (e[0] - x) ** 2 + (e[1] - y) ** 2 + (e[2] - z) ** 2
+        if d < dist:
+            dist, closest = d, i
+    return closest
+
+
+def run(sizes, n_queries, radius):
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        # t-SNE layouts are clumpy: draw the points around a few dozen cluster centres.
+        centres = rng.normal(0, 30, (40, 3))
+        positions = centres[rng.integers(40, size=n)] + rng.normal(0, 4, (n, 3))
+        nodes = [SimpleNamespace(embedding_3d=p.tolist()) for p in positions]
+        clicks = positions[rng.integers(n, size=n_queries)] + rng.normal(0, 1, (n_queries, 3))
+
+        start = time.perf_counter()
+        index = SpatialIndex(positions)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = [scan_nearest(nodes, *click) for click in clicks]
+        scan = (time.perf_counter() - start) / n_queries
+
+        start = time.perf_counter()
+        found = [int(index.nearest(click)[0][0]) for click in clicks]
+        tree = (time.perf_counter() - start) / n_queries
+        assert found == expected, "the index disagrees with the linear scan"
+
+        start = time.perf_counter()
+        neighbourhoods = [index.within(click, radius) for click in clicks]
+        within = (time.perf_counter() - start) / n_queries
+        reference = np.flatnonzero(np.linalg.norm(positions - clicks[0], axis=1) <= radius)
+        assert set(neighbourhoods[0].tolist()) == set(reference.tolist()), "radius query misses nodes"
+
+        print(f"n={n:>6}: build {build * 1000:6.1f} ms | nearest node: scan {scan * 1000:8.3f} ms, "
+              f"kd-tree {tree * 1000:6.3f} ms (x{scan / tree:.0f}) | radius {radius:g}: {within * 1000:6.3f} ms "
+              f"({np.mean([len(h) for h in neighbourhoods]):.0f} nodes on average)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[5000, 50000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radius", type=float, default=3.0)
+    args = parser.parse_args()
+    run(args.nodes, args.queries, args.radius)
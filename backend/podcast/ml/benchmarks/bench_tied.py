@@ -0,0 +1,56 @@
+"""
+Compare TiedHybridLinUCBModel (two scalars per arm) with the general HybridLinUCBModel:
+scores must agree after the same feedback stream, while per-arm memory and scoring
+time drop.
+
+Run from the repository root:
+
+    python -m backend.podcast.ml.benchmarks.bench_tied --sizes 1000 10000 --dim 64 --events 300
+"""
+import argparse
+import time
+import numpy as np
+from backend.podcast.ml.inference.rl_bandit import HybridLinUCBModel, TiedHybridLinUCBModel
+from backend.podcast.ml.benchmarks.synthetic import make_articles
+
+
+def run(sizes, d, n_events):
+    for n in sizes:
+        articles = make_articles(n, d)
+        rng = np.random.default_rng(0)
+        # Draw from a small pool of arms so that many arms receive repeated feedback.
+        pool = rng.choice(n, size=min(n, max(n_events // 3, 1)), replace=False)
+        events = list(zip(rng.choice(pool, size=n_events).tolist(),
+                          rng.integers(1, 101, size=n_events).astype(float).tolist()))
+        seeds = rng.standard_normal((3, d)).tolist()
+
+        results = {}
+        for cls in (HybridLinUCBModel, TiedHybridLinUCBModel):
+            model = cls(articles)
+            model.seeding(seeds, [-3, 2, 5])
+            start = time.perf_counter()
+            for article, score in events:
+                model.feedback(article, score)
+            feedback_time = time.perf_counter() - start
+            beta_hat = model.A0_inv @ model.b0
+            start = time.perf_counter()
+            scores = model._score_arms(np.arange(model.n_articles), beta_hat)
+            score_time = time.perf_counter() - start
+            results[cls.__name__] = (scores, feedback_time, score_time, model.arms.nbytes())
+
+        general, tied = results["HybridLinUCBModel"], results["TiedHybridLinUCBModel"]
+        max_err = np.max(np.abs(general[0] - tied[0]))
+        assert max_err < 1e-6, f"tied model diverges from the general model: {max_err:.2e}"
+        for name, (_, feedback_time, score_time, nbytes) in results.items():
+            print(f"n={n:>6} d={d} {name:>22}: feedback {feedback_time / n_events * 1000:7.3f} ms/event "
+                  f"| scoring {score_time * 1000:8.1f} ms | per-arm state {nbytes / 2**20:8.2f} MiB")
+        print(f"{'':>17} max |score difference| = {max_err:.1e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--events", type=int, default=300)
+    args = parser.parse_args()
+    run(args.sizes, args.dim, args.events)
@@ -0,0 +1,232 @@
+"""
+Bandit simulator: drive any recommender engine (engines.py) with synthetic users and
+measure its quality and speed.
+
+Each synthetic user has a latent preference vector w built from the article
+embeddings (the direction of a few random articles relative to the average article),
+so preferences live in the same space as the real articles. Every round the engine
+recommends a few articles through return_next_articles(), and the user rates each one
+through feedback() on the app's 1-100 scale:
+
+    score = 50 + 50 * tanh(gain * x.w) + noise,   expected reward tanh(gain * x.w).
+
+Reported per configuration:
+
+  - cumulative regret: the expected reward of the best articles the user had not seen
+    yet, minus that of the engine's picks, summed over the rounds;
+  - p50/p99 latency of return_next_articles() and of feedback() calls;
+  - peak memory allocated while building and running the engine (tracemalloc, which
+    slows allocations down; use --no-memory for latencies without it).
+
+A sweep runs every combination of engines and alpha / learning_rate / stabilization
+values for several users, spread over worker processes.
+
+Run from the repository root, on synthetic articles or on the article database:
+
+    python -m backend.podcast.ml.benchmarks.simulator --articles 20000 --alpha 0.5 1 2 --users 8 --workers 4
+    python -m backend.podcast.ml.benchmarks.simulator --db backend/podcast/ml/retrieval/db/ --engines linucb_tied thompson
+"""
+import argparse
+import itertools
+import multiprocessing
+import time
+import tracemalloc
+import numpy as np
+from backend.podcast.ml.inference.engines import ENGINES, create_engine
+from backend.podcast.ml.benchmarks.synthetic import make_articles
+
+# The article list of the sweep, set in every worker process by _init_worker.
+_articles = None
+
+
+class SyntheticUser:
+    """
+    A listener with a latent preference vector over the article embedding space.
+    """
+
+    def __init__(self, embeddings, n_interests=3, gain=3.0, noise=5.0, seed=0):
+        """
+        Parameters
+        ----------
+        embeddings : np.ndarray
+            (n x d) raw embeddings of the articles.
+        n_interests : int, optional
+            Number of random articles whose topics the user likes (default is 3).
+        gain : float, optional
+            Steepness of the score as a function of the affinity x.w (default is 3.0).
+        noise : float, optional
+            Standard deviation of the score noise, on the 1-100 scale (default is 5.0).
+        seed : int, optional
+            Seed of the user's preferences and noise (default is 0).
+        """
+        self.rng = np.random.default_rng(seed)
+        liked = embeddings[self.rng.choice(len(embeddings), size=n_interests, replace=False)]
+        preference = liked.mean(axis=0) - embeddings.mean(axis=0)
+        self.preference = preference / np.linalg.norm(preference)
+        self.gain = gain
+        self.noise = noise
+
+    def expected_reward(self, embeddings):
+        return np.tanh(self.gain * (embeddings @ self.preference))
+
+    def rate(self, embeddings):
+        """
+        Feedback scores (1-100) for the articles with these embeddings.
+        """
+        expected = 50 + 50 * self.expected_reward(embeddings)
+        return np.clip(expected + self.rng.normal(0, self.noise, len(embeddings)), 1, 100)
+
+
+def simulate(engine, user, embeddings, rounds, per_round):
+    """
+    Run one user session against `engine`.
+
+    Returns
+    -------
+    dict
+        The per-round regret and the latencies (seconds) of every recommend and
+        feedback call.
+    """
+    position = {id(article): i for i, article in enumerate(_articles)}
+    expected = user.expected_reward(embeddings)
+    seen = np.zeros(len(embeddings), dtype=bool)
+    regret, recommend_latency, feedback_latency = [], [], []
+    for _ in range(rounds):
+        available = np.flatnonzero(~seen)
+        best = np.sort(np.partition(expected[available], -per_round)[-per_round:]) if len(available) > per_round \
+            else expected[available]
+
+        start = time.perf_counter()
+        picks = engine.return_next_articles(per_round)
+        recommend_latency.append(time.perf_counter() - start)
+
+        chosen = np.array([position[id(article)] for article in picks], dtype=np.intp)
+        seen[chosen] = True
+        regret.append(best.sum() - expected[chosen].sum())
+        for article, score in zip(picks, user.rate(embeddings[chosen])):
+            start = time.perf_counter()
+            engine.feedback(article._id, float(score))
+            feedback_latency.append(time.perf_counter() - start)
+    return {"regret": np.array(regret), "recommend": np.array(recommend_latency),
+            "feedback": np.array(feedback_latency)}
+
+
+def run_one(task):
+    """
+    Build the engine of `task` and run one user session; executed in a worker process.
+    """
+    engine_name, params, user_seed, rounds, per_round, trace_memory = task
+    embeddings = np.array([article.embedding for article in _articles], dtype=float)
+    user = SyntheticUser(embeddings, seed=user_seed)
+    if trace_memory:
+        tracemalloc.start()
+    engine = create_engine(engine_name, _articles, **params)
+    result = simulate(engine, user, embeddings, rounds, per_round)
+    result["peak_memory"] = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+    tracemalloc.stop()
+    return engine_name, params, result
+
+
+def sweep(articles, engines, grid, users, rounds, per_round, workers, trace_memory=True):
+    """
+    Run every (engine, hyperparameters, user) combination and aggregate per configuration.
+
+    Parameters
+    ----------
+    articles : list of Article
+        The articles the engines recommend from.
+    engines : list of str
+        Engine names (see engines.ENGINES).
+    grid : dict
+        Hyperparameter name -> list of values; every combination is run.
+    users : int
+        Number of synthetic users per configuration.
+    rounds, per_round : int
+        Rounds per session and articles recommended per round.
+    workers : int
+        Number of worker processes (1 runs everything in this process).
+    trace_memory : bool, optional
+        Measure the peak memory of every run with tracemalloc (default is True).
+
+    Returns
+    -------
+    list of dict
+        One summary per configuration, best (lowest mean regret) first.
+    """
+    names = sorted(grid)
+    configs = [(engine, dict(zip(names, values)))
+               for engine in engines for values in itertools.product(*(grid[name] for name in names))]
+    tasks = [(engine, params, seed, rounds, per_round, trace_memory)
+             for engine, params in configs for seed in range(users)]
+
+    if workers > 1:
+        # maxtasksperchild=1 gives each run a fresh process, so memory peaks do not mix.
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(articles,), maxtasksperchild=1) as pool:
+            results = pool.map(run_one, tasks, chunksize=1)
+    else:
+        _init_worker(articles)
+        results = [run_one(task) for task in tasks]
+
+    summaries = []
+    for engine, params in configs:
+        runs = [result for name, p, result in results if name == engine and p == params]
+        regret = np.array([run["regret"].sum() for run in runs])
+        recommend = np.concatenate([run["recommend"] for run in runs]) * 1000
+        feedback = np.concatenate([run["feedback"] for run in runs]) * 1000
+        summaries.append({
+            "engine": engine, "params": params,
+            "regret_mean": float(regret.mean()), "regret_std": float(regret.std()),
+            "recommend_p50": float(np.percentile(recommend, 50)), "recommend_p99": float(np.percentile(recommend, 99)),
+            "feedback_p50": float(np.percentile(feedback, 50)), "feedback_p99": float(np.percentile(feedback, 99)),
+            "peak_memory": max(run["peak_memory"] for run in runs),
+        })
+    return sorted(summaries, key=lambda summary: summary["regret_mean"])
+
+
+def _init_worker(articles):
+    global _articles
+    _articles = articles
+
+
+def load_articles(db_path=None, n_articles=20000, d=384):
+    """
+    The articles of the database at `db_path` (all of them, undated ones included), or
+    synthetic ones.
+    """
+    if db_path is None:
+        return make_articles(n_articles, d, n_topics=50)
+    from backend.podcast.ml.retrieval.merger import Merger
+    articles = Merger(db_path=db_path).merge()
+    # The engines drop articles older than last_n_hours; the simulation is about the
+    # embeddings, so date every article now.
+    now = time.time()
+    for article in articles:
+        article.timestamp = now
+    return articles
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=None, help="article database directory (default: synthetic articles)")
+    parser.add_argument("--articles", type=int, default=20000, help="number of synthetic articles")
+    parser.add_argument("--dim", type=int, default=384, help="dimension of the synthetic embeddings")
+    parser.add_argument("--engines", nargs="+", default=["linucb_tied"], choices=sorted(ENGINES))
+    parser.add_argument("--alpha", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--learning-rate", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--stabilization", type=float, nargs="+", default=[0.001])
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--per-round", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--no-memory", action="store_true", help="do not trace memory (faster, cleaner latencies)")
+    args = parser.parse_args()
+
+    grid = {"alpha": args.alpha, "learning_rate": args.learning_rate, "stabilization": args.stabilization}
+    summaries = sweep(load_articles(args.db, args.articles, args.dim), args.engines, grid,
+                      args.users, args.rounds, args.per_round, args.workers, trace_memory=not args.no_memory)
+    for s in summaries:
+        params = " ".join(f"{name}={value:g}" for name, value in s["params"].items())
+        print(f"{s['engine']:>12} {params:<44} regret {s['regret_mean']:8.2f} +/- {s['regret_std']:6.2f} "
+              f"| recommend p50 {s['recommend_p50']:7.2f} ms p99 {s['recommend_p99']:7.2f} ms "
+              f"| feedback p50 {s['feedback_p50']:6.3f} ms p99 {s['feedback_p99']:6.3f} ms "
+              + (f"| peak {s['peak_memory'] / 2 ** 20:7.1f} MiB" if not args.no_memory else ""))
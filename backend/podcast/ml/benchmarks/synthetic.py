@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+import numpy as np
+from backend.podcast.ml.retrieval.merger import Article
+
+SECTIONS = ['Science', 'Sports', 'Politics', 'Technology', 'Entertainment', 'World', 'Business', 'Opinion']
+
+
+def make_articles(n_articles, d, seed=42, sections=SECTIONS, n_topics=None):
+    """
+    Build `n_articles` dummy Article objects with random unit-norm embeddings.
+    
+    The embeddings are normalised like the MiniLM vectors written by
+    run_vectorization.py, and every article is dated "now" so that none of them
+    is dropped by the model's last_n_hours window. With `n_topics`, embeddings are
+    drawn around that many random topic centres instead of uniformly, which is closer
+    to the clustered structure of real news embeddings.
+    """
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((n_articles, d))
+    if n_topics:
+        centres = rng.standard_normal((n_topics, d))
+        embeddings = centres[rng.integers(n_topics, size=n_articles)] + 0.5 * embeddings
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    section_ids = rng.integers(len(sections), size=n_articles)
+    pub_date = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S%z")
+
+    articles = []
+    for i in range(n_articles):
+        all_data = {
+            "lead_paragraph": "Lead paragraph text",
+            "abstract": "Abstract text",
+            "snippet": "Snippet text",
+            "keywords": ["keyword1", "keyword2"],
+            "web_url": f"http://example.com/article{i}",
+            "section_name": sections[section_ids[i]],
+            "pub_date": pub_date,
+        }
+        articles.append(Article(id=str(i), title=f"Article {i}", content="Some content",
+                                embedding=embeddings[i].tolist(), all_data=all_data))
+    return articles
+
+
+def random_feedback(model, n_events, seed=0):
+    """
+    Apply `n_events` random feedback scores (1-100) to random arms of `model`.
+    """
+    rng = np.random.default_rng(seed)
+    for article in rng.integers(model.n_articles, size=n_events):
+        model.feedback(int(article), float(rng.integers(1, 101)))
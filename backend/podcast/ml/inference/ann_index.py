@@ -0,0 +1,86 @@
+import numpy as np
+
+
+class IVFIndex:
+    """
+    Approximate maximum-inner-product index over the article embedding matrix.
+
+    An inverted-file (IVF) index: the embeddings are clustered with k-means into
+    `n_lists` cells, and every embedding is stored in the list of its nearest centroid.
+    A query only scans the `n_probe` lists whose centroids have the largest inner product
+    with it, so a search touches roughly n_probe / n_lists of the corpus instead of all
+    of it. Recall is traded against speed with `n_probe`.
+    """
+
+    def __init__(self, embeddings, n_lists=None, n_probe=16, n_iter=10, max_train=20000, seed=0):
+        """
+        Parameters
+        ----------
+        embeddings : np.ndarray
+            The (n x d) matrix to index. Row i is returned as id i.
+        n_lists : int, optional
+            Number of k-means cells (default is about sqrt(n)).
+        n_probe : int, optional
+            Number of cells scanned per query (default is 16).
+        n_iter : int, optional
+            Number of k-means (Lloyd) iterations (default is 10).
+        max_train : int, optional
+            The centroids are trained on a random subsample of at most this many rows
+            (default is 20000).
+        seed : int, optional
+            Seed for the subsample and the centroid initialization (default is 0).
+        """
+        self.embeddings = embeddings
+        n = embeddings.shape[0]
+        self.n_lists = max(1, min(n, n_lists or int(np.sqrt(n))))
+        self.n_probe = min(n_probe, self.n_lists)
+
+        rng = np.random.default_rng(seed)
+        train = embeddings[rng.choice(n, size=min(n, max_train), replace=False)]
+        self.centroids = _kmeans(train, self.n_lists, n_iter, rng)
+
+        # CSR-style inverted lists: ids sorted by cell, with offsets into that array.
+        assignment = self._assign(embeddings)
+        self.ids = np.argsort(assignment, kind="stable")
+        self.offsets = np.searchsorted(assignment[self.ids], np.arange(self.n_lists + 1))
+
+    def _assign(self, X, chunk_size=8192):
+        cells = np.empty(len(X), dtype=np.intp)
+        c_norms = np.einsum("ij,ij->i", self.centroids, self.centroids)
+        for start in range(0, len(X), chunk_size):
+            block = X[start:start + chunk_size]
+            # argmin |x - c|^2 = argmax (x.c - |c|^2 / 2)
+            cells[start:start + chunk_size] = np.argmax(block @ self.centroids.T - 0.5 * c_norms, axis=1)
+        return cells
+
+    def search(self, query, k):
+        """
+        Return the ids of (approximately) the k rows with the largest inner product with
+        `query`, best first.
+        """
+        query = np.asarray(query, dtype=float).ravel()
+        cells = np.argpartition(-(self.centroids @ query), self.n_probe - 1)[:self.n_probe]
+        members = np.concatenate([self.ids[self.offsets[c]:self.offsets[c + 1]] for c in cells])
+        if len(members) == 0:
+            return members
+        scores = self.embeddings[members] @ query
+        k = min(k, len(members))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return members[top[np.argsort(-scores[top])]]
+
+
+def _kmeans(X, n_clusters, n_iter, rng):
+    """
+    Plain Lloyd's k-means, initialized from random rows of X.
+    """
+    centroids = X[rng.choice(len(X), size=n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        c_norms = np.einsum("ij,ij->i", centroids, centroids)
+        assignment = np.argmax(X @ centroids.T - 0.5 * c_norms, axis=1)
+        counts = np.bincount(assignment, minlength=n_clusters)
+        order = np.argsort(assignment, kind="stable")
+        filled = np.flatnonzero(counts)
+        starts = np.searchsorted(assignment[order], filled)
+        # Empty cells keep their previous centroid.
+        centroids[filled] = np.add.reduceat(X[order], starts, axis=0) / counts[filled, np.newaxis]
+    return centroids
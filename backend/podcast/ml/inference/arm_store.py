@@ -0,0 +1,335 @@
+import copy
+import os
+import numpy as np
+
+
+def allocate(shape, dtype, fill, path=None, name=None):
+    """
+    Return an array of `shape` filled with `fill`: in memory, or, with a `path`, memory-
+    mapped from the .npy file `path`/`name`.npy (created or overwritten).
+    """
+    if path is None:
+        return np.full(shape, fill, dtype=dtype)
+    os.makedirs(path, exist_ok=True)
+    array = np.lib.format.open_memmap(os.path.join(path, name + ".npy"), mode="w+", dtype=dtype, shape=shape)
+    array[...] = fill
+    return array
+
+
+def grow(array, capacity, fill, path=None, name=None):
+    """
+    Return a copy of `array` extended to `capacity` rows, the new rows set to `fill`.
+    A memory-mapped array is copied into a new file that then replaces the old one.
+    """
+    if path is None:
+        new = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+        new[:len(array)] = array
+        return new
+    new = allocate((capacity,) + array.shape[1:], array.dtype, fill, path, name + ".grow")
+    new[:len(array)] = array
+    new.flush()
+    os.replace(os.path.join(path, name + ".grow.npy"), os.path.join(path, name + ".npy"))
+    return new
+
+
+class ArmStateStore:
+    """
+    Sparse storage for the per-arm (disjoint) parameters of HybridLinUCBModel.
+
+    Every arm starts from the analytic prior
+
+        A[a] = I (d x d),   A_inv[a] = I,   B[a] = 0 (d x k),   b[a] = 0 (d x 1),
+
+    and most arms of a large corpus never receive feedback. Only arms that have been
+    touched by feedback are materialized: each one owns a row in contiguous stacked
+    arrays that grow by doubling, so memory scales with the number of touched arms
+    rather than with the corpus size. Untouched arms are represented implicitly by the
+    prior and are scored with a closed-form fast path by the model.
+
+    The score terms that only depend on an arm's own state (x^T A_inv x, B^T A_inv x and
+    b^T A_inv x) are cached per row and recomputed only for rows marked dirty, i.e.
+    rows whose state changed since they were last scored (see score_terms).
+
+    The float arrays can be kept in float32 (`dtype`), which halves the d^2-per-arm
+    footprint; updates are still computed in float64 and rounded when stored. With a
+    `path`, every array is a memory-mapped .npy file in that directory, so the OS can
+    page out the rows of arms that are no longer scored or updated.
+
+    snapshot() returns a read-only view that shares the stacked arrays. Rows that
+    existed at the last snapshot are never written again: ensure() moves an arm out of
+    such a row into a fresh one before it is updated, so a snapshot costs a copy of the
+    row mapping and each later update copies only the rows it touches. The abandoned
+    rows are reclaimed when the arrays fill up, by compacting the live rows into new
+    arrays (which snapshots do not share).
+    """
+
+    _ARRAYS = ("A", "A_inv", "B", "b", "x_A_inv_x", "B_A_inv_x", "b_A_inv_x", "dirty")
+
+    def __init__(self, d, k, initial_capacity=4, dtype=np.float64, path=None):
+        """
+        Parameters
+        ----------
+        d : int
+            Dimension of the disjoint (arm-specific) features.
+        k : int
+            Dimension of the shared features.
+        initial_capacity : int, optional
+            Number of rows allocated up front (default is 4).
+        dtype : numpy dtype, optional
+            Type of the float arrays, float64 or float32 (default is float64).
+        path : str, optional
+            Directory of the memory-mapped arrays. By default they are held in memory.
+        """
+        self.d = d
+        self.k = k
+        self.dtype = np.dtype(dtype)
+        self.path = path
+        self.rows = {}  # arm index -> row in the stacked arrays
+        self._row_arms = []  # row -> arm index (-1 for a row abandoned by its arm)
+        # Rows below this one may be read by snapshots and must not be written to.
+        self._shared_below = 0
+        self._read_only = False
+        shapes = {"A": (d, d), "A_inv": (d, d), "B": (d, k), "b": (d, 1),
+                  "x_A_inv_x": (), "B_A_inv_x": (k,), "b_A_inv_x": ()}
+        for name, shape in shapes.items():
+            setattr(self, name, allocate((initial_capacity,) + shape, self.dtype, 0.0, path, name))
+        self.dirty = allocate((initial_capacity,), bool, True, path, "dirty")
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, arm):
+        return arm in self.rows
+
+    @property
+    def capacity(self):
+        return self.A.shape[0]
+
+    def lookup(self, arms):
+        """
+        Map arm indices to their rows; arms without materialized state map to -1.
+        """
+        return np.fromiter((self.rows.get(a, -1) for a in arms.tolist()), dtype=np.intp, count=len(arms))
+
+    def ensure(self, arm):
+        """
+        Return a writable row of `arm`, materializing it with the prior if it is
+        untouched, or moving its state to a new row if a snapshot shares its row.
+        """
+        if self._read_only:
+            raise RuntimeError("The arm state of a snapshot is read-only.")
+        row = self.rows.get(arm)
+        if row is not None and row >= self._shared_below:
+            return row
+        if len(self._row_arms) == self.capacity:
+            live = len(self.rows)
+            self._rebuild(self.capacity if 2 * live <= self.capacity else 2 * self.capacity)
+            if row is not None:
+                return self.rows[arm]  # compacted into new arrays, no longer shared
+        new = len(self._row_arms)
+        if row is None:
+            self.A[new] = np.identity(self.d)
+            self.A_inv[new] = np.identity(self.d)
+            self.B[new] = 0.0
+            self.b[new] = 0.0
+            self.dirty[new] = True
+        else:
+            for name in self._ARRAYS:
+                getattr(self, name)[new] = getattr(self, name)[row]
+            self._row_arms[row] = -1
+        self.rows[arm] = new
+        self._row_arms.append(arm)
+        return new
+
+    def touched(self):
+        """
+        Indices of the arms with materialized state.
+        """
+        arms = np.array(self._row_arms, dtype=np.intp)
+        return arms[arms >= 0]
+
+    def state(self, arm):
+        """
+        Return (A, A_inv, B, b) of an arm, or the prior if the arm is untouched.
+        """
+        row = self.rows.get(arm)
+        if row is None:
+            return np.identity(self.d), np.identity(self.d), np.zeros((self.d, self.k)), np.zeros((self.d, 1))
+        return self.A[row], self.A_inv[row], self.B[row], self.b[row]
+
+    def score_terms(self, rows, X):
+        """
+        Return x^T A_inv x, B^T A_inv x and b^T A_inv x for `rows`, where X holds the
+        embeddings of their arms. Only dirty rows are recomputed.
+        """
+        stale = np.flatnonzero(self.dirty[rows])
+        if len(stale):
+            row = rows[stale]
+            u = np.einsum("mij,mj->mi", self.A_inv[row], X[stale])
+            self.x_A_inv_x[row] = np.einsum("mi,mi->m", X[stale], u)
+            self.B_A_inv_x[row] = np.einsum("mji,mj->mi", self.B[row], u)
+            self.b_A_inv_x[row] = np.einsum("mi,mi->m", self.b[row][:, :, 0], u)
+            self.dirty[row] = False
+        return self.x_A_inv_x[rows], self.B_A_inv_x[rows], self.b_A_inv_x[rows]
+
+    def nbytes(self):
+        """
+        Bytes allocated for the per-arm arrays.
+        """
+        return sum(getattr(self, name).nbytes for name in self._ARRAYS)
+
+    def discard(self, arms):
+        """
+        Drop the state of `arms`, returning them to the prior. The last row is moved into
+        each freed row so the stacked arrays stay dense, unless a snapshot shares the
+        freed row; that row is then left for the next compaction.
+        """
+        for arm in np.asarray(arms).tolist():
+            row = self.rows.get(arm)
+            if row is None:
+                continue
+            if self._read_only:
+                raise RuntimeError("The arm state of a snapshot is read-only.")
+            del self.rows[arm]
+            self._row_arms[row] = -1
+            last = len(self._row_arms) - 1
+            if self._shared_below <= row < last and self._row_arms[last] >= 0:
+                moved = self._row_arms[last]
+                for name in ("A", "A_inv", "B", "b"):
+                    getattr(self, name)[row] = getattr(self, name)[last]
+                self.dirty[row] = True
+                self.rows[moved] = row
+                self._row_arms[row] = moved
+                self._row_arms[last] = -1
+            while len(self._row_arms) > self._shared_below and self._row_arms[-1] < 0:
+                self._row_arms.pop()
+
+    def resize(self, n_arms):
+        """
+        Make room for arm indices up to `n_arms`. Storage is keyed by arm, so this is a no-op.
+        """
+
+    def flush(self):
+        """
+        Write the memory-mapped arrays back to their files.
+        """
+        if self.path is not None:
+            for name in self._ARRAYS:
+                getattr(self, name).flush()
+
+    def snapshot(self):
+        """
+        Return a read-only view of the current state that shares the stacked arrays
+        (see the class docstring). The rows it reads are left alone by later updates.
+        """
+        other = copy.copy(self)
+        other.rows, other._row_arms = dict(self.rows), list(self._row_arms)
+        other._read_only = True
+        self._shared_below = len(self._row_arms)
+        return other
+
+    def __deepcopy__(self, memo):
+        # A copy (e.g. the own state of a forked model) is held in memory, so that it
+        # never writes to the files of the original.
+        other = copy.copy(self)
+        other.rows, other._row_arms, other.path = dict(self.rows), list(self._row_arms), None
+        other._shared_below, other._read_only = 0, False
+        for name in self._ARRAYS:
+            setattr(other, name, np.array(getattr(self, name)))
+        return other
+
+    def _rebuild(self, capacity):
+        """
+        Copy the live rows, in order, into new arrays of `capacity` rows. Snapshots keep
+        reading the old arrays, so every row of the new ones is writable.
+        """
+        live = np.array([row for row, arm in enumerate(self._row_arms) if arm >= 0], dtype=np.intp)
+        for name in self._ARRAYS:
+            old = getattr(self, name)
+            fill = True if name == "dirty" else 0.0
+            if self.path is None:
+                new = np.full((capacity,) + old.shape[1:], fill, dtype=old.dtype)
+            else:
+                new = allocate((capacity,) + old.shape[1:], old.dtype, fill, self.path, name + ".grow")
+            np.take(old, live, axis=0, out=new[:len(live)])
+            if self.path is not None:
+                new.flush()
+                os.replace(os.path.join(self.path, name + ".grow.npy"), os.path.join(self.path, name + ".npy"))
+            setattr(self, name, new)
+        self._row_arms = [self._row_arms[row] for row in live.tolist()]
+        self.rows = {arm: row for row, arm in enumerate(self._row_arms)}
+        self._shared_below = 0
+
+
+class TiedArmStore:
+    """
+    Per-arm state of TiedHybridLinUCBModel.
+
+    When the disjoint and shared features coincide (z_a = x_a), the per-arm matrices are
+    fully determined by two scalars per arm: the accumulated learning rate
+    S_a = sum(eta) and the accumulated weighted reward R_a = sum(eta * reward).
+    Both are kept in dense float arrays (16 bytes per arm, 8 in float32); untouched
+    arms are simply zero, which is exactly the prior. As in ArmStateStore, `path` keeps
+    the arrays in memory-mapped files.
+    """
+
+    _ARRAYS = ("eta_sum", "reward_sum")
+
+    def __init__(self, n_arms, dtype=np.float64, path=None):
+        self.dtype = np.dtype(dtype)
+        self.path = path
+        self.eta_sum = allocate((n_arms,), self.dtype, 0.0, path, "eta_sum")
+        self.reward_sum = allocate((n_arms,), self.dtype, 0.0, path, "reward_sum")
+
+    def discard(self, arms):
+        """
+        Reset `arms` to the prior.
+        """
+        self.eta_sum[arms] = 0.0
+        self.reward_sum[arms] = 0.0
+
+    def resize(self, n_arms):
+        """
+        Grow the arrays to hold `n_arms` arms; the new arms start at the prior.
+        """
+        if n_arms > len(self.eta_sum):
+            for name in self._ARRAYS:
+                setattr(self, name, grow(getattr(self, name), n_arms, 0.0, self.path, name))
+
+    def touched(self):
+        """
+        Indices of the arms that received feedback.
+        """
+        return np.flatnonzero(self.eta_sum)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.eta_sum))
+
+    def __contains__(self, arm):
+        return self.eta_sum[arm] != 0
+
+    def nbytes(self):
+        """
+        Bytes allocated for the per-arm arrays.
+        """
+        return self.eta_sum.nbytes + self.reward_sum.nbytes
+
+    def flush(self):
+        """
+        Write the memory-mapped arrays back to their files.
+        """
+        if self.path is not None:
+            self.eta_sum.flush()
+            self.reward_sum.flush()
+
+    def snapshot(self):
+        """
+        Return a copy of the current state for concurrent readers (16 bytes per arm).
+        """
+        return copy.deepcopy(self)
+
+    def __deepcopy__(self, memo):
+        other = copy.copy(self)
+        other.path = None
+        other.eta_sum, other.reward_sum = np.array(self.eta_sum), np.array(self.reward_sum)
+        return other
@@ -0,0 +1,246 @@
+import json
+import os
+import shutil
+import threading
+import time
+import numpy as np
+from backend.podcast.ml.inference.arm_store import TiedArmStore
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+
+
+def snapshot(model):
+    """
+    Copy the learned state of `model` into float32 arrays plus a JSON-able manifest.
+
+    Arms are keyed by article id (article.id), not by slot, so that a checkpoint can be
+    loaded into a model built from a different article list. Per-arm arrays are aligned
+    with manifest["article_ids"]; for the general model only touched arms are stored and
+    manifest["touched"] holds their positions in that list.
+
+    This only copies memory, so it is cheap enough to run while holding the lock that
+    guards the model; writing the copy to disk can then happen outside of it.
+    """
+    live = model.corpus.live_slots()
+    article_ids = [model.corpus.article(slot).id for slot in live.tolist()]
+    id_of = dict(zip(live.tolist(), article_ids))
+    arrays = {
+        "A0": model.A0_factor.matrix.astype(np.float32),
+        "b0": model.b0.astype(np.float32),
+    }
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "model": type(model).__name__,
+        "d": model.d,
+        # The state only makes sense in the feature space it was learned in.
+        "projection": model.projection.fingerprint if model.projection is not None else None,
+        "num_updates": model.num_updates,
+        "created": time.time(),
+        "article_ids": article_ids,
+        "unreturned": [id_of[a] for a in model.unreturned_articles],
+        "recent_positives": [id_of[a] for a in model.recent_positives],
+    }
+    if model.event_log is not None:
+        # Events logged from here on are not in this checkpoint (see event_log.recover).
+        manifest["log_id"] = model.event_log.log_id
+        manifest["log_offset"] = model.event_log.offset
+    if isinstance(model.arms, TiedArmStore):
+        arrays["eta_sum"] = model.arms.eta_sum[live].astype(np.float32)
+        arrays["reward_sum"] = model.arms.reward_sum[live].astype(np.float32)
+    else:
+        rows = model.arms.lookup(live)
+        touched = np.flatnonzero(rows >= 0)
+        for name in ("A", "A_inv", "B", "b"):
+            arrays["arm_" + name] = getattr(model.arms, name)[rows[touched]].astype(np.float32)
+        manifest["touched"] = touched.tolist()
+    return arrays, manifest
+
+
+def write_snapshot(arrays, manifest, path):
+    """
+    Write a snapshot as one .npy file per array plus manifest.json into directory `path`.
+
+    The files are written to a temporary directory first, which then replaces `path`,
+    so a crash mid-write never leaves a half-written checkpoint behind.
+    """
+    path = os.path.normpath(path)
+    tmp, old = path + ".tmp", path + ".old"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp, name + ".npy"), array)
+    with open(os.path.join(tmp, MANIFEST), "w") as f:
+        json.dump(manifest, f)
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(path):
+        os.rename(path, old)
+    os.rename(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def save_checkpoint(model, path):
+    """
+    Save the learned state of `model` (A0, b0, per-arm state, num_updates, returned
+    articles) to the checkpoint directory `path`.
+    """
+    write_snapshot(*snapshot(model), path)
+
+
+def load_checkpoint(model, path, mmap=True):
+    """
+    Restore the learned state saved in `path` into `model`.
+
+    The model is expected to be freshly built from the current article list. State is
+    matched by article id: articles that are no longer in the model are ignored and
+    articles that are new since the checkpoint start at the prior (and unreturned).
+    With `mmap`, the arrays are memory-mapped rather than read, so only the pages of the
+    arms present in the model are actually touched.
+
+    Parameters
+    ----------
+    model : HybridLinUCBModel
+        The model to restore into.
+    path : str
+        The checkpoint directory.
+    mmap : bool, optional
+        Memory-map the arrays (default is True).
+
+    Returns
+    -------
+    int
+        The number of arms of the model found in the checkpoint.
+    """
+    if not os.path.exists(path):
+        path = os.path.normpath(path) + ".old"  # interrupted while swapping in a new checkpoint
+    manifest = read_manifest(path)
+    if manifest["format_version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported checkpoint format {manifest['format_version']}.")
+    if manifest["d"] != model.d:
+        raise ValueError(f"Checkpoint dimension {manifest['d']} does not match the model ({model.d}).")
+    projection = model.projection.fingerprint if model.projection is not None else None
+    if manifest.get("projection") != projection:
+        raise ValueError("Checkpoint was saved under a different embedding projection than the model's.")
+    tied = isinstance(model.arms, TiedArmStore)
+    if tied != ("eta_sum" in _array_names(path)):
+        raise ValueError(f"Checkpoint of a {manifest['model']} cannot be loaded into a {type(model).__name__}.")
+
+    def load(name):
+        return np.load(os.path.join(path, name + ".npy"), mmap_mode="r" if mmap else None)
+
+    live = model.corpus.live_slots()
+    slot_of = dict(zip((model.corpus.article(slot).id for slot in live.tolist()), live.tolist()))
+    slots = np.array([slot_of.get(i, -1) for i in manifest["article_ids"]], dtype=np.intp)
+
+    model.A0_factor.set_matrix(np.asarray(load("A0"), dtype=float))
+    model.b0 = np.asarray(load("b0"), dtype=float)
+    model.num_updates = manifest["num_updates"]
+
+    known = np.flatnonzero(slots >= 0)
+    if tied:
+        model.arms.eta_sum[slots[known]] = load("eta_sum")[known]
+        model.arms.reward_sum[slots[known]] = load("reward_sum")[known]
+    else:
+        touched = np.array(manifest["touched"], dtype=np.intp)
+        keep = np.flatnonzero(slots[touched] >= 0)
+        stored = {name: load("arm_" + name) for name in ("A", "A_inv", "B", "b")}
+        for i in keep.tolist():
+            row = model.arms.ensure(int(slots[touched[i]]))
+            for name, array in stored.items():
+                getattr(model.arms, name)[row] = array[i]
+            model.arms.dirty[row] = True
+
+    returned = {int(slots[i]) for i in known.tolist()} - {slot_of[i] for i in manifest["unreturned"] if i in slot_of}
+    model.unreturned_articles = set(live.tolist()) - returned
+    model.recent_positives.clear()
+    model.recent_positives.extend(slot_of[i] for i in manifest["recent_positives"] if i in slot_of)
+    return len(known)
+
+
+def read_manifest(path):
+    """
+    Return the manifest of the checkpoint in `path`.
+    """
+    with open(os.path.join(path, MANIFEST)) as f:
+        return json.load(f)
+
+
+def _array_names(path):
+    return {name[:-4] for name in os.listdir(path) if name.endswith(".npy")}
+
+
+class CheckpointWriter:
+    """
+    Writes checkpoints of a model periodically from a background thread.
+
+    Every `interval` seconds the writer copies the model state (under `lock`, if given,
+    which should be the lock that serializes feedback) and writes it to disk outside
+    the lock, so request threads are only held up for the in-memory copy. Nothing is
+    written if no feedback was received since the last checkpoint.
+    """
+
+    def __init__(self, model, path, interval=300.0, lock=None):
+        """
+        Parameters
+        ----------
+        model : HybridLinUCBModel
+            The model to checkpoint.
+        path : str
+            The checkpoint directory.
+        interval : float, optional
+            Seconds between two checkpoints (default is 300).
+        lock : threading.Lock, optional
+            Held while the model state is copied.
+        """
+        self.model = model
+        self.path = path
+        self.interval = interval
+        self.lock = lock
+        self._saved_updates = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, final_checkpoint=True):
+        """
+        Stop the background thread, optionally writing one last checkpoint.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if final_checkpoint:
+            self.write_now()
+
+    def write_now(self):
+        """
+        Write a checkpoint now if the model changed since the last one. Returns True if
+        a checkpoint was written.
+        """
+        if self.lock is not None:
+            with self.lock:
+                state = self._snapshot_if_changed()
+        else:
+            state = self._snapshot_if_changed()
+        if state is None:
+            return False
+        write_snapshot(*state, self.path)
+        return True
+
+    def _snapshot_if_changed(self):
+        if self.model.num_updates == self._saved_updates:
+            return None
+        self._saved_updates = self.model.num_updates
+        return snapshot(self.model)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write_now()
+            except OSError as e:
+                print(f"Checkpoint write to {self.path} failed: {e}")
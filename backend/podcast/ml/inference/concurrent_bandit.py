@@ -0,0 +1,257 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+
+class ConcurrentBandit:
+    """
+    Thread-safe front end for a HybridLinUCBModel shared by request threads.
+
+    All writes (feedback, seeding, article ingestion) are queued and applied by a
+    single writer thread, which owns the model. After each batch the writer publishes
+    an immutable snapshot: a copy of the learned state with its beta_hat precomputed,
+    plus the live-article mask at that version. Per-arm state is shared between
+    snapshots and only the rows a batch modifies are copied (see
+    HybridLinUCBModel.snapshot), so publishing costs O(d^2) per touched arm of the
+    batch rather than per touched arm of the model. Publishing is a single reference
+    assignment, so readers never see a half-applied update and never take a lock to
+    score. Under a burst, the writer drains up to `max_batch` queued events at once,
+    and consecutive feedback events become a single feedback_many() call with one
+    low-rank update of A0 and one snapshot.
+
+    The returned-articles mask is the only state readers write. It is guarded by a
+    small lock that is held while picking and marking the winners, but not while
+    scoring.
+
+    Each snapshot also holds a read-only copy of the corpus (articles, embeddings,
+    norms and section codes) taken when the corpus last changed, so articles removed
+    by the writer, and slots it reuses for new articles, do not show through to
+    snapshots published before: a reader holding such a snapshot may still return a
+    just-retired article (with _id None), scored by its own embedding, never a missing
+    one.
+    """
+
+    def __init__(self, model, max_batch=1024, max_delay=0.002):
+        """
+        Parameters
+        ----------
+        model : HybridLinUCBModel
+            The model to serve. From now on it must only be modified through this object.
+        max_batch : int, optional
+            Maximum number of queued writes applied as one batch (default is 1024).
+        max_delay : float, optional
+            Seconds the writer waits for more writes to coalesce after the first one of
+            a batch (default is 0.002).
+        """
+        self.model = model
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        # Held by the writer while it modifies the model (e.g. for CheckpointWriter).
+        self.write_lock = threading.Lock()
+        self._returned_lock = threading.Lock()
+        self._returned = np.zeros(model.corpus.capacity, dtype=bool)
+        self._corpus_version = model.corpus.version
+        self._corpus_snapshot = None
+        self._queue = queue.Queue()
+        self.version = 0
+        self._publish()
+        self._writer = threading.Thread(target=self._run, name="bandit-writer", daemon=True)
+        self._writer.start()
+
+    # --- Reads -------------------------------------------------------------------------
+
+    @property
+    def snapshot(self):
+        """
+        The latest published snapshot (a frozen copy of the model).
+        """
+        return self._snapshot
+
+    @property
+    def articles(self):
+        snap = self._snapshot
+        return [snap.corpus.article(a) for a in np.flatnonzero(snap.live_mask).tolist()]
+
+    @property
+    def n_articles(self):
+        return int(np.count_nonzero(self._snapshot.live_mask))
+
+    def score(self, articles):
+        """
+        Return the current UCB scores of `articles` (their _id values).
+        """
+        snap = self._snapshot
+        return snap._score_arms(np.asarray(articles, dtype=np.intp), snap.beta_hat)
+
+    def return_next_articles(self, num_articles, update_state=True, diversity=None):
+        """
+        Same as HybridLinUCBModel.return_next_articles, scored against the latest snapshot.
+        """
+        snap = self._snapshot
+        eligible = snap.live_mask
+        if update_state:
+            eligible = eligible & ~self._returned[:len(eligible)]
+        candidates = np.flatnonzero(eligible)
+        if update_state and len(candidates) == 0:
+            raise Exception("All articles have been returned. Call reset() to start over.")
+        candidates, scores = snap._score_candidates(candidates, snap.beta_hat, num_articles, update_state, diversity)
+
+        if not update_state:
+            selected = candidates[snap._select(candidates, scores, num_articles, diversity)]
+            return [snap.corpus.article(a) for a in selected.tolist()]
+        with self._returned_lock:
+            # Another reader may have returned some of the candidates meanwhile.
+            fresh = ~self._returned[candidates]
+            candidates, scores = candidates[fresh], scores[fresh]
+            selected = candidates[snap._select(candidates, scores, num_articles, diversity)]
+            self._returned[selected] = True
+        return [snap.corpus.article(a) for a in selected.tolist()]
+
+    def reset(self):
+        """
+        Make every article eligible again (does not reset learned parameters).
+        """
+        with self._returned_lock:
+            self._returned[:] = False
+
+    # --- Writes ------------------------------------------------------------------------
+    # Each returns a Future resolved once the write is visible in a published snapshot.
+
+    def feedback(self, article, score):
+        return self._submit("feedback", [article], [score])
+
+    def feedback_many(self, articles, scores):
+        return self._submit("feedback", list(articles), list(scores))
+
+    def seeding(self, seed_embeddings, seed_scores, seed_lr=5.0):
+        return self._submit("seeding", seed_embeddings, seed_scores, seed_lr=seed_lr)
+
+    def seed_topics(self, topics, scores, embedor, seed_lr=5.0):
+        # Embed in the calling thread; only the model update goes to the writer.
+        return self.seeding(embedor.embed_many(topics), scores, seed_lr=seed_lr)
+
+    def add_articles(self, articles):
+        return self._submit("add_articles", articles)
+
+    def remove_articles(self, articles):
+        return self._submit("remove_articles", articles)
+
+    def slide_window(self, now=None, new_articles=()):
+        return self._submit("slide_window", now=now, new_articles=new_articles)
+
+    def flush(self):
+        """
+        Block until every write submitted so far is published.
+        """
+        self._submit("flush").result()
+
+    def close(self):
+        """
+        Apply the pending writes and stop the writer thread.
+        """
+        self._queue.put(None)
+        self._writer.join()
+
+    def _submit(self, op, *args, **kwargs):
+        future = Future()
+        self._queue.put((op, args, kwargs, future))
+        return future
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._apply(batch)
+            if stop:
+                return
+
+    def _apply(self, batch):
+        """
+        Apply a batch of writes in order, merging runs of feedback, then publish once.
+        """
+        results = []
+        with self.write_lock:
+            i = 0
+            while i < len(batch):
+                op, args, kwargs, future = batch[i]
+                if op == "feedback":
+                    j = i
+                    articles, scores, futures = [], [], []
+                    while j < len(batch) and batch[j][0] == "feedback":
+                        # Reject events for unknown arms individually, so that they do not
+                        # fail the rest of the merged batch.
+                        if self._valid_arms(batch[j][1][0]):
+                            articles += batch[j][1][0]
+                            scores += batch[j][1][1]
+                            futures.append(batch[j][3])
+                        else:
+                            results.append((batch[j][3], (None, ValueError("Feedback for an unknown article."))))
+                        j += 1
+                    outcome = self._call(self.model.feedback_many, articles, scores)
+                    results += [(f, outcome) for f in futures]
+                    i = j
+                    continue
+                if op == "flush":
+                    outcome = (None, None)
+                else:
+                    outcome = self._call(getattr(self.model, op), *args, **kwargs)
+                results.append((future, outcome))
+                i += 1
+            self._publish()
+        for future, (value, error) in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
+
+    def _valid_arms(self, articles):
+        live = self.model.corpus.live
+        return all(isinstance(a, (int, np.integer)) and 0 <= a < len(live) and live[a] for a in articles)
+
+    @staticmethod
+    def _call(method, *args, **kwargs):
+        try:
+            return method(*args, **kwargs), None
+        except Exception as e:
+            return None, e
+
+    def _publish(self):
+        """
+        Freeze the model's current state into a new snapshot and make it current.
+        """
+        corpus = self.model.corpus
+        # The corpus is copied once per version: the writer may free or reuse its slots later.
+        if self._corpus_snapshot is None or self._corpus_snapshot.version != corpus.version:
+            self._corpus_snapshot = corpus.snapshot()
+        # Copies A0 and b0, shares the unchanged per-arm rows.
+        snap = self.model.snapshot(corpus=self._corpus_snapshot)
+        snap.live_mask = snap.corpus.live
+        snap.beta_hat = snap.A0_factor.solve(snap.b0)
+        if len(self._returned) < len(snap.live_mask):
+            with self._returned_lock:
+                returned = np.zeros(self.model.corpus.capacity, dtype=bool)
+                returned[:len(self._returned)] = self._returned
+                self._returned = returned
+        if corpus.version != self._corpus_version:
+            # Slots freed or reused since the last snapshot are eligible again.
+            changed = np.flatnonzero(~snap.live_mask | (corpus.born > self._corpus_version))
+            with self._returned_lock:
+                self._returned[changed] = False
+            self._corpus_version = corpus.version
+        self.version += 1
+        self._snapshot = snap
@@ -0,0 +1,235 @@
+import copy
+import numpy as np
+from backend.podcast.ml.inference.slots import SlotAllocator
+from backend.podcast.ml.inference.ann_index import IVFIndex
+
+
+class ArticleCorpus:
+    """
+    The article side of the bandit: every live article with its embedding, squared
+    norm, timestamp and section code, stored in slot-indexed buffers.
+
+    The corpus holds nothing learned, so one instance can be shared by any number of
+    models (e.g. one model per user, see sessions.py). Each article's slot is its _id.
+    Slots are handed out by a SlotAllocator, so removed articles free their slot for
+    reuse and the buffers grow by doubling.
+
+    Every add or remove bumps `version`, and `born[slot]` records the version at which
+    the slot was last allocated. A model that last looked at the corpus at version v
+    can therefore tell which of its arms were replaced (born > v) or removed (not live)
+    without the corpus knowing about its models.
+
+    With a `projection` (an EmbeddingProjection), article embeddings are projected as
+    they are added, and every buffer holds the projected vectors.
+
+    add and remove overwrite the buffers in place. Readers that must not see those
+    writes (e.g. the snapshots of ConcurrentBandit) work on a read-only copy of one
+    version, see snapshot().
+    """
+
+    def __init__(self, d, articles=(), projection=None):
+        """
+        Parameters
+        ----------
+        d : int
+            Embedding dimension (the projected dimension if `projection` is given).
+        articles : list of Article, optional
+            Initial articles.
+        projection : EmbeddingProjection, optional
+            Map from the articles' raw embeddings to the d-dim feature space.
+        """
+        if projection is not None and projection.dim != d:
+            raise ValueError(f"Projection to {projection.dim} dimensions for a {d}-dim corpus.")
+        self.d = d
+        self.projection = projection
+        self.slots = SlotAllocator()
+        capacity = self.slots.capacity
+        self._embeddings = np.zeros((capacity, d))
+        self._norms = np.zeros(capacity)
+        self._timestamps = np.zeros(capacity)
+        self._section_codes = np.zeros(capacity, dtype=np.intp)
+        self._born = np.zeros(capacity, dtype=np.int64)
+        self._articles = [None] * capacity
+        # Section names and their integer codes, so that diversity selection works on arrays.
+        self.sections = []
+        self._section_index = {}
+        self.version = 0
+        self._ann_index = None
+        self._read_only = False
+        self.add(articles)
+
+    @property
+    def n_articles(self):
+        """
+        Number of live articles.
+        """
+        return len(self.slots)
+
+    @property
+    def n_slots(self):
+        """
+        Number of slots handed out so far; slot-indexed arrays have this many rows.
+        """
+        return self.slots.high_water
+
+    @property
+    def capacity(self):
+        return self.slots.capacity
+
+    @property
+    def live(self):
+        """
+        Boolean mask of the live slots, of length n_slots.
+        """
+        return self.slots.live[:self.n_slots]
+
+    def live_slots(self):
+        return self.slots.live_slots()
+
+    def article(self, slot):
+        """
+        The article in `slot` (None for a free slot).
+        """
+        return self._articles[slot]
+
+    @property
+    def articles(self):
+        """
+        The live articles, in slot order.
+        """
+        return [self._articles[slot] for slot in self.live_slots().tolist()]
+
+    def articles_by_slot(self):
+        """
+        A new list of the article in every slot (None for free slots), of length n_slots.
+        """
+        return self._articles[:self.n_slots]
+
+    @property
+    def embeddings(self):
+        """
+        The (n_slots x d) embedding matrix; row i is the article with _id i (zero for free slots).
+        """
+        return self._embeddings[:self.n_slots]
+
+    @property
+    def embedding_norms(self):
+        return self._norms[:self.n_slots]
+
+    @property
+    def timestamps(self):
+        return self._timestamps[:self.n_slots]
+
+    @property
+    def section_codes(self):
+        return self._section_codes[:self.n_slots]
+
+    @property
+    def born(self):
+        return self._born[:self.n_slots]
+
+    @property
+    def ann_index(self):
+        """
+        The approximate nearest-neighbour index over the embeddings, built on first use.
+        """
+        if self._ann_index is None:
+            self._ann_index = IVFIndex(self.embeddings)
+        return self._ann_index
+
+    def snapshot(self):
+        """
+        Return a read-only copy of the corpus at its current version.
+
+        The slot-indexed buffers, the article list and the section names are copied, so
+        later adds and removes (which overwrite freed and reused slots in place) do not
+        show through. The copy costs O(n_slots * d); take one per version and share it.
+        """
+        n = self.n_slots
+        snap = copy.copy(self)
+        snap.slots = copy.deepcopy(self.slots)
+        for name in ("_embeddings", "_norms", "_timestamps", "_section_codes", "_born"):
+            setattr(snap, name, getattr(self, name)[:n].copy())
+        snap._articles = self._articles[:n]
+        snap.sections = list(self.sections)
+        snap._section_index = dict(self._section_index)
+        snap._ann_index = None
+        snap._read_only = True
+        return snap
+
+    def _resize(self, capacity):
+        """
+        Grow every slot-indexed buffer to `capacity` rows.
+        """
+        for name in ("_embeddings", "_norms", "_timestamps", "_section_codes", "_born"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        self._articles.extend([None] * (capacity - len(self._articles)))
+
+    def _section_code(self, section):
+        section = str(section)
+        code = self._section_index.get(section)
+        if code is None:
+            code = self._section_index[section] = len(self.sections)
+            self.sections.append(section)
+        return code
+
+    def add(self, articles):
+        """
+        Give each article a slot (reusing freed slots first) and set its _id to it.
+
+        Returns
+        -------
+        np.ndarray of int
+            The slots assigned to the articles.
+        """
+        if self._read_only:
+            raise RuntimeError("Cannot add articles to a corpus snapshot.")
+        articles = list(articles)
+        slots = self.slots.allocate(len(articles))
+        if self.slots.capacity > len(self._embeddings):
+            self._resize(self.slots.capacity)
+        if not articles:
+            return slots
+
+        X = np.array([article.embedding for article in articles], dtype=float).reshape(len(articles), -1)
+        if self.projection is not None:
+            X = self.projection.transform(X)
+        self.version += 1
+        self._embeddings[slots] = X
+        self._norms[slots] = np.einsum("ij,ij->i", X, X)
+        self._timestamps[slots] = [article.timestamp for article in articles]
+        self._section_codes[slots] = [self._section_code(article.section) for article in articles]
+        self._born[slots] = self.version
+        for slot, article in zip(slots.tolist(), articles):
+            article._id = slot
+            self._articles[slot] = article
+        # The ANN index is rebuilt lazily on next use.
+        self._ann_index = None
+        return slots
+
+    def remove(self, articles):
+        """
+        Free the slots of `articles` (Article objects or _id values) and reset their _id
+        to None.
+
+        Returns
+        -------
+        np.ndarray of int
+            The freed slots.
+        """
+        if self._read_only:
+            raise RuntimeError("Cannot remove articles from a corpus snapshot.")
+        slots = np.array([a if isinstance(a, (int, np.integer)) else a._id for a in articles], dtype=np.intp)
+        self.slots.release(slots)
+        if len(slots) == 0:
+            return slots
+        self.version += 1
+        self._embeddings[slots] = 0.0
+        self._norms[slots] = 0.0
+        for slot in slots.tolist():
+            self._articles[slot]._id = None
+            self._articles[slot] = None
+        return slots
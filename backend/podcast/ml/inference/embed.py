@@ -1,12 +1,21 @@
+from collections import OrderedDict
+import threading
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
 class Embedor:
-    def __init__(self, model_name='multi-qa-MiniLM-L6-cos-v1'):
+    def __init__(self, model_name='multi-qa-MiniLM-L6-cos-v1', cache_size=10000):
         """
         Initialize the Embedor class with a SentenceTransformer model.
         :param model_name: Name of the model to load from sentence-transformers.
+        :param cache_size: Number of text embeddings kept in memory (least recently used
+            ones are dropped first). Onboarding topics repeat across users, so most
+            lookups are cache hits.
         """
         self.model = SentenceTransformer(model_name)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
 
     def embed(self, text: str):
         """
@@ -14,4 +23,27 @@ class Embedor:
         :param text: The text to be embedded.
         :return: The vector representation of the text.
         """
-        return self.model.encode(text).tolist()
\ No newline at end of file
+        return self.embed_many([text])[0].tolist()
+
+    def embed_many(self, texts):
+        """
+        Embed a list of texts, encoding the ones not in the cache in a single batch.
+        :param texts: The texts to be embedded.
+        :return: A (len(texts) x dim) array, one embedding per row.
+        """
+        texts = list(texts)
+        with self._lock:
+            found = {text: self._cache[text] for text in texts if text in self._cache}
+            for text in found:
+                self._cache.move_to_end(text)
+        missing = list(dict.fromkeys(text for text in texts if text not in found))
+        if missing:
+            encoded = np.asarray(self.model.encode(missing, batch_size=64), dtype=float).reshape(len(missing), -1)
+            with self._lock:
+                for text, embedding in zip(missing, encoded):
+                    found[text] = self._cache[text] = embedding
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        if not texts:
+            return np.empty((0, self.model.get_sentence_embedding_dimension()))
+        return np.array([found[text] for text in texts])
@@ -0,0 +1,65 @@
+import yaml
+from backend.podcast.ml.inference.rl_bandit import HybridLinUCBModel, TiedHybridLinUCBModel
+from backend.podcast.ml.inference.thompson import ThompsonSamplingModel
+from backend.podcast.ml.inference.projection import EmbeddingProjection
+
+# Recommender engines by config name. All of them take the article list plus keyword
+# hyperparameters and share the public API of HybridLinUCBModel (return_next_articles,
+# feedback, feedback_many, seeding, reset, ...).
+ENGINES = {
+    "linucb": HybridLinUCBModel,
+    "linucb_tied": TiedHybridLinUCBModel,
+    "thompson": ThompsonSamplingModel,
+}
+
+DEFAULT_CONFIG = {"engine": "linucb_tied", "params": {}, "projection": None}
+
+
+def register_engine(name, engine):
+    """
+    Make `engine` (a class with the HybridLinUCBModel API) available under `name`.
+    """
+    ENGINES[name] = engine
+
+
+def create_engine(name, articles, **params):
+    """
+    Build the engine registered as `name` over `articles`.
+    """
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine '{name}', expected one of {sorted(ENGINES)}.")
+    return ENGINES[name](articles, **params)
+
+
+def build_engine(articles, config=None):
+    """
+    Build the engine described by a bandit config (by default the one read by
+    load_bandit_config), fitting or loading its embedding projection first if the
+    config has one.
+    """
+    config = config or load_bandit_config()
+    projection = None
+    if config["projection"]:
+        projection_config = config["projection"]
+        projection = EmbeddingProjection.load_or_fit(projection_config["path"], [article.embedding for article in articles],
+                                                     projection_config["dim"], method=projection_config.get("method", "pca"))
+    return create_engine(config["engine"], articles, projection=projection, **config["params"])
+
+
+def load_bandit_config(path="backend/config/settings.yaml"):
+    """
+    Read the `bandit` section of the settings file: the engine name, its
+    hyperparameters and the optional embedding projection (method, dim and cache
+    path). Missing keys fall back to DEFAULT_CONFIG.
+    """
+    try:
+        with open(path) as f:
+            settings = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        settings = {}
+    bandit = settings.get("bandit") or {}
+    return {
+        "engine": bandit.get("engine", DEFAULT_CONFIG["engine"]),
+        "params": dict(DEFAULT_CONFIG["params"], **(bandit.get("params") or {})),
+        "projection": bandit.get("projection", DEFAULT_CONFIG["projection"]),
+    }
@@ -0,0 +1,261 @@
+import os
+import struct
+import threading
+import time
+import uuid
+import numpy as np
+from backend.podcast.ml.inference.checkpoint import MANIFEST, read_manifest, save_checkpoint
+
+FEEDBACK = 1
+SEED = 2
+
+# File header: magic, format version, and a random id that changes whenever the log is
+# truncated, so a checkpoint can tell whether its log offset still refers to this file.
+_HEADER = struct.Struct("<4sH16s")
+_MAGIC = b"EBEL"
+_VERSION = 2  # version 1 stored eta as float32
+# Record header: kind, timestamp, score, eta, payload length. The payload is the
+# utf-8 article id for feedback events and the float64 embedding for seed events (in
+# the model's feature space, i.e. after its projection if it has one).
+# Scores, learning rates and seeds are stored at full precision so that replay is exact.
+_RECORD = struct.Struct("<Bdddi")
+
+
+class EventLog:
+    """
+    Append-only binary log of the feedback and seed events applied to a model.
+
+    Attach it with `model.event_log = EventLog(path)`: feedback(), feedback_many() and
+    seeding() then record every event (timestamp, article id or seed embedding, score
+    and learning rate) before applying it. A batch of events is written with a single
+    write() call under a lock. A record cut short by a crash is ignored on reading.
+    """
+
+    def __init__(self, path, fsync=False):
+        """
+        Parameters
+        ----------
+        path : str
+            The log file; created if it does not exist, appended to otherwise.
+        fsync : bool, optional
+            fsync after every write, so that acknowledged events survive a power loss
+            and not only a process crash (default is False).
+        """
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        if os.path.exists(path) and os.path.getsize(path) >= _HEADER.size:
+            self.log_id = _read_header(path)
+            self._file = open(path, "ab")
+            self._file.truncate(_valid_length(path))
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self._file = open(path, "wb")
+            self._start()
+
+    @property
+    def offset(self):
+        """
+        Byte offset of the end of the log, i.e. of the next event.
+        """
+        return self._file.tell()
+
+    def _start(self):
+        self.log_id = uuid.uuid4().hex[:16]
+        self._file.write(_HEADER.pack(_MAGIC, _VERSION, self.log_id.encode()))
+        self._file.flush()
+
+    def _write(self, data):
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def append_feedback(self, article_ids, scores, etas):
+        """
+        Record feedback events (article ids are the Article.id strings).
+        """
+        now = time.time()
+        records = []
+        for article_id, score, eta in zip(article_ids, scores, etas):
+            payload = str(article_id).encode()
+            records.append(_RECORD.pack(FEEDBACK, now, score, eta, len(payload)) + payload)
+        self._write(b"".join(records))
+
+    def append_seeds(self, embeddings, scores, seed_lr):
+        """
+        Record seed events; the eta field holds seed_lr.
+        """
+        now = time.time()
+        records = []
+        for embedding, score in zip(embeddings, scores):
+            payload = np.asarray(embedding, dtype=float).tobytes()
+            records.append(_RECORD.pack(SEED, now, score, seed_lr, len(payload)) + payload)
+        self._write(b"".join(records))
+
+    def truncate(self):
+        """
+        Drop every event and start the log over with a new log id (used after the
+        events have been folded into a checkpoint).
+        """
+        with self._lock:
+            self._file.seek(0)
+            self._file.truncate()
+            self._start()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_events(path, start=None):
+    """
+    Read the events of a log, from byte offset `start` (default is the first event).
+
+    Returns
+    -------
+    dict
+        Column arrays "kind", "timestamp", "score" and "eta", and the list "payload"
+        of article ids (str) or seed embeddings (arrays).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    pos = _HEADER.size if start is None else max(start, _HEADER.size)
+    kinds, timestamps, scores, etas, payloads = [], [], [], [], []
+    while pos + _RECORD.size <= len(data):
+        kind, timestamp, score, eta, length = _RECORD.unpack_from(data, pos)
+        end = pos + _RECORD.size + length
+        if end > len(data):
+            break
+        payload = data[pos + _RECORD.size:end]
+        kinds.append(kind)
+        timestamps.append(timestamp)
+        scores.append(score)
+        etas.append(eta)
+        payloads.append(payload.decode() if kind == FEEDBACK else np.frombuffer(payload, dtype=float))
+        pos = end
+    return {
+        "kind": np.array(kinds, dtype=np.uint8),
+        "timestamp": np.array(timestamps),
+        "score": np.array(scores),
+        "eta": np.array(etas),
+        "payload": payloads,
+    }
+
+
+def replay(model, path, start=None):
+    """
+    Re-apply the events of a log to `model`.
+
+    Consecutive feedback events are applied with one feedback_many() call and
+    consecutive seeds with one seeding() call, so replay runs at batch speed. Learning
+    rates are recomputed by the model rather than taken from the log, which makes it
+    possible to replay a production trace into a model with other hyperparameters.
+    Feedback for articles that are not in the model is skipped.
+
+    Parameters
+    ----------
+    model : HybridLinUCBModel
+        The model to update. Its event_log is detached during replay.
+    path : str
+        The log file.
+    start : int, optional
+        Byte offset of the first event to replay (default is the beginning of the log).
+
+    Returns
+    -------
+    (int, int)
+        The number of events applied and skipped.
+    """
+    events = read_events(path, start)
+    kinds = events["kind"]
+    if len(kinds) == 0:
+        return 0, 0
+    slot_of = {article.id: article._id for article in model.articles}
+    boundaries = np.flatnonzero(np.diff(kinds)) + 1
+    applied = skipped = 0
+
+    log, model.event_log = model.event_log, None
+    try:
+        for run in np.split(np.arange(len(kinds)), boundaries):
+            if kinds[run[0]] == FEEDBACK:
+                slots = np.array([slot_of.get(events["payload"][i], -1) for i in run], dtype=np.intp)
+                known = slots >= 0
+                model.feedback_many(slots[known], events["score"][run][known])
+                applied += int(known.sum())
+                skipped += int((~known).sum())
+            else:
+                # Seeds recorded by separate seeding() calls may use different seed_lr values.
+                etas = events["eta"][run]
+                for group in np.split(run, np.flatnonzero(np.diff(etas)) + 1):
+                    model.seeding([events["payload"][i] for i in group], events["score"][group],
+                                  seed_lr=float(events["eta"][group[0]]))
+                applied += len(run)
+    finally:
+        model.event_log = log
+    return applied, skipped
+
+
+def recover(model, log_path, checkpoint_path=None):
+    """
+    Rebuild the state of a crashed server: load the checkpoint (if any) and replay the
+    events logged after it.
+
+    A checkpoint taken while the log was attached records the log id and offset; if the
+    log has been truncated since (its id changed), every event in it is newer than the
+    checkpoint and the whole log is replayed.
+
+    Returns
+    -------
+    (int, int)
+        The number of events applied and skipped.
+    """
+    start = None
+    if checkpoint_path is not None and os.path.exists(os.path.join(checkpoint_path, MANIFEST)):
+        model.load(checkpoint_path)
+        manifest = read_manifest(checkpoint_path)
+        if os.path.exists(log_path) and manifest.get("log_id") == _read_header(log_path):
+            start = manifest["log_offset"]
+    if not os.path.exists(log_path):
+        return 0, 0
+    return replay(model, log_path, start)
+
+
+def compact(model, checkpoint_path):
+    """
+    Fold the logged events into a checkpoint of `model` and empty its event log.
+
+    If the process dies between the two steps, the checkpoint still points at the end
+    of the old log, so recover() replays nothing twice.
+    """
+    save_checkpoint(model, checkpoint_path)
+    model.event_log.truncate()
+
+
+def _read_header(path):
+    with open(path, "rb") as f:
+        magic, version, log_id = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"{path} is not an event log (version {_VERSION}).")
+    return log_id.decode()
+
+
+def _valid_length(path):
+    """
+    Length of the log up to the end of its last complete record.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    pos = _HEADER.size
+    while pos + _RECORD.size <= len(data):
+        end = pos + _RECORD.size + _RECORD.unpack_from(data, pos)[4]
+        if end > len(data):
+            break
+        pos = end
+    return pos
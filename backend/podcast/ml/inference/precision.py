@@ -0,0 +1,320 @@
+import numpy as np
+from scipy.linalg import cho_solve, solve_triangular
+
+
+class WoodburyInverse:
+    """
+    Maintains a symmetric d x d matrix A together with its explicit inverse under
+    low-rank updates of the form
+
+        A <- A + U diag(c) U^T,      U is (d x r), c is (r,)
+
+    The inverse is updated with the Woodbury identity
+
+        (A + U C U^T)^{-1} = A^{-1} - A^{-1} U (C^{-1} + U^T A^{-1} U)^{-1} U^T A^{-1},
+
+    which costs O(d^2 r) instead of the O(d^3) of a fresh np.linalg.inv. Rank-1 updates
+    (r = 1) reduce to the Sherman-Morrison formula.
+
+    To bound the floating point drift that accumulates over many updates, the inverse is
+    recomputed from A every `refactor_every` updates, and immediately whenever the
+    capacitance matrix C^{-1} + U^T A^{-1} U is too ill-conditioned for the update to be
+    trusted (condition number above 1 / tol).
+    """
+
+    def __init__(self, dim, refactor_every=500, tol=1e-10):
+        """
+        Parameters
+        ----------
+        dim : int
+            Dimension d of the matrix. The matrix starts as the identity.
+        refactor_every : int, optional
+            Number of low-rank updates between two full re-inversions (default is 500).
+        tol : float, optional
+            Numerical tolerance; updates whose capacitance matrix has a condition number
+            above 1 / tol trigger a full re-inversion instead (default is 1e-10).
+        """
+        self.dim = dim
+        self.refactor_every = refactor_every
+        self.tol = tol
+        self.matrix = np.identity(dim)
+        self.inv = np.identity(dim)
+        self.updates_since_refactor = 0
+        # Max absolute difference between the maintained and the freshly computed inverse
+        # observed at the last refactorization (useful for monitoring drift).
+        self.drift = 0.0
+        self._inv_factor = None
+
+    def refactor(self):
+        """
+        Recompute the inverse from the matrix.
+        """
+        fresh = np.linalg.inv(self.matrix)
+        self.drift = float(np.max(np.abs(fresh - self.inv)))
+        self.inv = fresh
+        self._inv_factor = None
+        self.updates_since_refactor = 0
+
+    def set_matrix(self, matrix):
+        """
+        Replace the matrix wholesale and re-invert it.
+        """
+        self.matrix = np.array(matrix, dtype=float)
+        self.inv = np.linalg.inv(self.matrix)
+        self._inv_factor = None
+        self.updates_since_refactor = 0
+
+    def solve(self, M):
+        """
+        Return A^{-1} M.
+        """
+        return self.inv @ M
+
+    def quad(self, X):
+        """
+        Return the row-wise quadratic forms x_i^T A^{-1} x_i for the rows of X.
+        """
+        return np.einsum("mi,mi->m", X @ self.inv, X)
+
+    def draw(self, rng):
+        """
+        Draw a sample from N(0, A^{-1}), using a Cholesky factor of the maintained inverse
+        (cached until the next update).
+        """
+        if self._inv_factor is None:
+            self._inv_factor = _covariance_factor(self.inv)
+        return self._inv_factor @ rng.standard_normal(self.dim)
+
+    def update(self, U, c):
+        """
+        Apply A <- A + U diag(c) U^T and update the inverse accordingly.
+
+        Parameters
+        ----------
+        U : np.ndarray
+            A (d x r) matrix (or a length-d vector for a rank-1 update).
+        c : array-like
+            The r coefficients of the update.
+        """
+        U, c = _as_columns(U, c)
+        self._inv_factor = None
+        if 2 * c.size >= self.dim:
+            # A block update of rank comparable to d is cheaper to absorb by re-inverting.
+            self.matrix += (U * c) @ U.T
+            self.refactor()
+            return
+        U, c = _compress(U, c, self.tol)
+        if c.size == 0:
+            return
+
+        self.matrix += (U * c) @ U.T
+
+        AinvU = self.inv @ U
+        capacitance = np.diag(1.0 / c) + U.T @ AinvU
+        self.updates_since_refactor += 1
+        if (self.updates_since_refactor >= self.refactor_every
+                or np.linalg.cond(capacitance) > 1.0 / self.tol):
+            self.refactor()
+            return
+        self.inv -= AinvU @ np.linalg.solve(capacitance, AinvU.T)
+        # Keep the inverse exactly symmetric; asymmetry is pure rounding error.
+        self.inv = 0.5 * (self.inv + self.inv.T)
+
+
+class CholeskyFactor:
+    """
+    Maintains a symmetric d x d matrix A through its Cholesky factor A = L L^T, without
+    ever forming A^{-1}.
+
+    Solves and quadratic forms use triangular solves against L, which are better
+    conditioned than multiplying by an explicit inverse that has been updated thousands
+    of times. Low-rank updates A <- A + U diag(c) U^T are applied as O(d^2) rank-1
+    Cholesky updates (c > 0) and downdates (c < 0). L is recomputed from A every
+    `refactor_every` updates to bound drift.
+
+    This trades update speed for accuracy: a rank-1 factor update needs a triangular
+    solve and several O(d^2) passes where WoodburyInverse needs one O(d^2) correction,
+    so updates are about 1.3-1.7x slower (bench_cholesky.py). Quadratic forms and solves
+    are faster than with the explicit inverse.
+
+    The hybrid LinUCB update subtracts B^T A_inv B and can therefore make A0 indefinite.
+    When that happens no Cholesky factor exists: the factor is dropped and A is solved
+    with LU (np.linalg.solve) until a later refactorization finds it positive definite
+    again.
+    """
+
+    def __init__(self, dim, refactor_every=500, tol=1e-10):
+        """
+        Parameters
+        ----------
+        dim : int
+            Dimension d of the matrix. The matrix starts as the identity.
+        refactor_every : int, optional
+            Number of low-rank updates between two full refactorizations (default is 500).
+        tol : float, optional
+            Update directions whose coefficient is below this tolerance are skipped
+            (default is 1e-10).
+        """
+        self.dim = dim
+        self.refactor_every = refactor_every
+        self.tol = tol
+        self.matrix = np.identity(dim)
+        self.L = np.identity(dim)
+        self.updates_since_refactor = 0
+
+    @property
+    def inv(self):
+        """
+        Explicit inverse of A. This costs O(d^3) and is only meant for inspection.
+        """
+        return self.solve(np.identity(self.dim))
+
+    def refactor(self):
+        """
+        Recompute the Cholesky factor from the matrix (or drop it if A is not positive definite).
+        """
+        try:
+            self.L = np.linalg.cholesky(self.matrix)
+        except np.linalg.LinAlgError:
+            self.L = None
+        self.updates_since_refactor = 0
+
+    def set_matrix(self, matrix):
+        """
+        Replace the matrix wholesale and refactorize it.
+        """
+        self.matrix = np.array(matrix, dtype=float)
+        self.refactor()
+
+    def solve(self, M):
+        """
+        Return A^{-1} M.
+        """
+        if self.L is None:
+            return np.linalg.solve(self.matrix, M)
+        return cho_solve((self.L, True), M, check_finite=False)
+
+    def quad(self, X):
+        """
+        Return the row-wise quadratic forms x_i^T A^{-1} x_i = |L^{-1} x_i|^2 for the rows of X.
+        """
+        if self.L is None:
+            return np.einsum("mi,im->m", X, np.linalg.solve(self.matrix, X.T))
+        W = solve_triangular(self.L, X.T, lower=True, check_finite=False)
+        return np.einsum("im,im->m", W, W)
+
+    def draw(self, rng):
+        """
+        Draw a sample from N(0, A^{-1}) as L^{-T} e with e standard normal.
+        """
+        e = rng.standard_normal(self.dim)
+        if self.L is None:
+            return _covariance_factor(np.linalg.inv(self.matrix)) @ e
+        return solve_triangular(self.L, e, lower=True, trans="T", check_finite=False)
+
+    def update(self, U, c):
+        """
+        Apply A <- A + U diag(c) U^T and update the factor accordingly.
+
+        Parameters
+        ----------
+        U : np.ndarray
+            A (d x r) matrix (or a length-d vector for a rank-1 update).
+        c : array-like
+            The r coefficients of the update.
+        """
+        U, c = _as_columns(U, c)
+        if 8 * c.size < self.dim:
+            U, c = _compress(U, c, self.tol)
+        if c.size == 0:
+            return
+
+        self.matrix += (U * c) @ U.T
+        self.updates_since_refactor += 1
+        if self.updates_since_refactor >= self.refactor_every or 8 * c.size >= self.dim:
+            # Many rank-1 passes cost more than one LAPACK factorization.
+            self.refactor()
+            return
+        if self.L is None:
+            return
+        # Apply the updates before the downdates so the factor stays positive definite
+        # for as long as possible.
+        L = self.L
+        try:
+            for j in np.argsort(-c):
+                L = _cholesky_rank1(L, np.sqrt(abs(c[j])) * U[:, j], 1.0 if c[j] > 0 else -1.0)
+        except np.linalg.LinAlgError:
+            self.refactor()
+            return
+        self.L = L
+
+
+def _cholesky_rank1(L, x, sign):
+    """
+    Rank-1 update (sign = +1) or downdate (sign = -1) of a lower-triangular Cholesky
+    factor, returning the factor of L L^T +/- x x^T in O(d^2) without a Python loop.
+
+    With p = L^{-1} x, L L^T + sign x x^T = L (I + sign p p^T) L^T, and the inner matrix
+    has the closed-form LDL^T factorization (Gill, Golub, Murray & Saunders, method C1)
+
+        t_0 = sign,  t_j = t_0 + sum_{i<=j} p_i^2,   D_j = t_j / t_{j-1},
+        Lt_ij = p_i p_j / t_j  (i > j),   Lt_jj = 1,
+
+    so the new factor is L Lt D^{1/2}. The column sums of L Lt reduce to a reverse
+    cumulative sum over the columns of L scaled by p.
+    """
+    p = solve_triangular(L, x, lower=True, check_finite=False)
+    t = np.concatenate(([sign], sign + np.cumsum(p * p)))
+    D = t[1:] / t[:-1]
+    if np.any(D <= 0):
+        raise np.linalg.LinAlgError("Cholesky downdate makes the matrix indefinite")
+    G = L * p
+    # tail[:, j] = sum_{i>j} p_i L[:, i]; the new factor is built in place in its buffer.
+    tail = np.empty_like(G)
+    np.cumsum(G[:, ::-1], axis=1, out=tail[:, ::-1])
+    tail -= G
+    tail *= p / t[1:]
+    tail += L
+    tail *= np.sqrt(D)
+    return tail
+
+
+def _covariance_factor(cov):
+    """
+    A matrix F with F F^T = cov. Falls back to an eigendecomposition with the negative
+    eigenvalues clipped to zero when cov is not positive definite (A0 can become
+    indefinite, see CholeskyFactor).
+    """
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        eigvals, eigvecs = np.linalg.eigh(0.5 * (cov + cov.T))
+        return eigvecs * np.sqrt(np.maximum(eigvals, 0.0))
+
+
+def _as_columns(U, c):
+    U = np.asarray(U, dtype=float)
+    if U.ndim == 1:
+        U = U[:, np.newaxis]
+    return U, np.atleast_1d(np.asarray(c, dtype=float))
+
+
+def _compress(U, c, tol):
+    """
+    Rewrite U diag(c) U^T with the fewest columns possible.
+
+    Update terms built from parallel vectors (e.g. z z^T - w w^T with w parallel to z)
+    would otherwise produce a singular capacitance matrix. A thin QR followed by an
+    eigendecomposition of the small r x r core gives an equivalent update with only the
+    numerically non-zero directions.
+    """
+    if U.shape[1] == 1:
+        keep = np.abs(c) * np.sum(U * U) > tol
+        return U[:, keep], c[keep]
+
+    Q, R = np.linalg.qr(U)
+    core = (R * c) @ R.T
+    eigvals, eigvecs = np.linalg.eigh(0.5 * (core + core.T))
+    scale = max(np.max(np.abs(eigvals)), 1.0)
+    keep = np.abs(eigvals) > tol * scale
+    return Q @ eigvecs[:, keep], eigvals[keep]
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import numpy as np
+
+
+class EmbeddingProjection:
+    """
+    Linear map from the raw article embeddings (the 384-dim MiniLM vectors written by
+    run_vectorization.py) to the smaller feature space the bandit works in.
+
+    Every bandit cost grows with d^2 (scoring, feedback) or d^3 (refactorization), so
+    projecting to d = 64 makes them several times cheaper. Two methods:
+
+      - "pca": the top right singular vectors of the (uncentered) embedding matrix. The
+        bandit only ever takes inner products x^T beta, and this is the rank-d basis that
+        preserves the inner products of the corpus best.
+      - "random": a Gaussian random projection scaled by 1 / sqrt(d), which preserves
+        inner products in expectation and needs no fitting.
+
+    The bandit state (A0, b0, checkpoints, logged seeds) is expressed in the projected
+    space, so a projection must stay fixed for as long as that state is kept. It is fit
+    once and cached on disk (see load_or_fit); delete the cache together with the
+    checkpoints to refit it.
+    """
+
+    def __init__(self, components, method="pca"):
+        """
+        Parameters
+        ----------
+        components : np.ndarray
+            (input_dim x dim) projection matrix; a row vector x maps to x @ components.
+        method : str, optional
+            How the components were obtained, for bookkeeping (default is "pca").
+        """
+        self.components = np.ascontiguousarray(components, dtype=float)
+        self.method = method
+        self.fingerprint = hashlib.sha1(self.components.astype(np.float32).tobytes()).hexdigest()[:16]
+
+    @property
+    def input_dim(self):
+        return self.components.shape[0]
+
+    @property
+    def dim(self):
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(cls, embeddings, dim, method="pca", max_train=50000, seed=0):
+        """
+        Fit a projection of `embeddings` (n x input_dim) to `dim` dimensions.
+
+        Parameters
+        ----------
+        embeddings : array-like
+            The raw article embeddings.
+        dim : int
+            Target dimension.
+        method : str, optional
+            "pca" or "random" (default is "pca").
+        max_train : int, optional
+            PCA is fit on a random sample of at most this many embeddings (default is 50000).
+        seed : int, optional
+            Seed of the sampling and of the random projection (default is 0).
+        """
+        X = np.asarray(embeddings, dtype=float)
+        if X.ndim != 2 or not 0 < dim <= X.shape[1]:
+            raise ValueError(f"Cannot project {X.shape} embeddings to {dim} dimensions.")
+        rng = np.random.default_rng(seed)
+        if method == "pca":
+            if len(X) > max_train:
+                X = X[rng.choice(len(X), size=max_train, replace=False)]
+            if len(X) < dim:
+                raise ValueError(f"PCA to {dim} dimensions needs at least {dim} embeddings, got {len(X)}.")
+            _, _, Vt = np.linalg.svd(X, full_matrices=False)
+            components = Vt[:dim].T
+        elif method == "random":
+            components = rng.standard_normal((X.shape[1], dim)) / np.sqrt(dim)
+        else:
+            raise ValueError(f"Unknown projection method '{method}', expected 'pca' or 'random'.")
+        return cls(components, method)
+
+    def transform(self, embeddings):
+        """
+        Project raw embeddings: a single vector or a matrix with one embedding per row.
+        """
+        X = np.asarray(embeddings, dtype=float)
+        if X.shape[-1] != self.input_dim:
+            raise ValueError(f"Expected {self.input_dim}-dim embeddings, got shape {X.shape}.")
+        return X @ self.components
+
+    def save(self, path):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, components=self.components, method=self.method)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["components"], str(data["method"]))
+
+    @classmethod
+    def load_or_fit(cls, path, embeddings, dim, method="pca", **kwargs):
+        """
+        Load the projection cached at `path`, or fit one on `embeddings` and cache it there.
+
+        A cached projection with another method or dimension is refit, which also
+        invalidates any bandit state saved under the old one.
+        """
+        if os.path.exists(path):
+            projection = cls.load(path)
+            if projection.method == method and projection.dim == dim:
+                return projection
+        projection = cls.fit(embeddings, dim, method=method, **kwargs)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        projection.save(path)
+        return projection
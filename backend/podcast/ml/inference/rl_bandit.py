@@ -1,6 +1,15 @@
-from datetime import datetime, timezone
+from collections import deque
+import copy
+import threading
+import time
 import numpy as np
 from backend.podcast.ml.retrieval.merger import Article
+from backend.podcast.ml.inference.precision import WoodburyInverse, CholeskyFactor
+from backend.podcast.ml.inference.arm_store import ArmStateStore, TiedArmStore
+from backend.podcast.ml.inference.selection import select_by_section, select_mmr, top_k
+from backend.podcast.ml.inference.corpus import ArticleCorpus
+from backend.podcast.ml.inference.score_cache import QuadCache
+from backend.podcast.ml.inference.checkpoint import save_checkpoint, load_checkpoint
 
 class HybridLinUCBModel:
     """
@@ -23,6 +32,8 @@ class HybridLinUCBModel:
       - For each article a (arm):
             A[a]   (d x d matrix),  b[a]   (d x 1 vector)
             B[a]   (d x k matrix) linking the disjoint and shared parts.
+        Arms that never received feedback keep the prior A[a] = I, B[a] = 0, b[a] = 0 and
+        are not materialized (see ArmStateStore).
             
     The UCB for an article is computed as:
     
@@ -41,13 +52,21 @@ class HybridLinUCBModel:
          from the set of unreturned articles. The returned list is personalized and diverse in topic,
          as determined by the article.section field.
       - reset(): Resets the "returned" state so that all articles are again eligible.
+      - slide_window(now=None, new_articles=()): Moves the last_n_hours window forward, retiring
+         articles that fell out of it and admitting new ones, while keeping the learned parameters.
       - feedback(article, score): Incorporates feedback for a given article and updates the model.
+      - feedback_many(articles, scores): Incorporates a batch of feedback events with a single
+         update of the global parameters.
       - seeding(seed_embeddings, seed_scores, seed_lr=5.0): Updates the global parameters using initial
          topic feedback provided by the user (seed embeddings and scores in the range -5 to 5).
     """
     
     def __init__(self, articles, alpha=1.0, learning_rate=1.0, 
-                 stabilization=0.001, feedback_exponent=2.0, last_n_hours=96):
+                 stabilization=0.001, feedback_exponent=2.0, last_n_hours=96,
+                 refactor_every=500, inverse_tol=1e-10, solver="inverse",
+                 diversity="section", mmr_lambda=0.7,
+                 candidate_pool=None, exploration_fraction=0.2, n_recent_positives=10,
+                 corpus=None, projection=None, state_dtype="float64", state_path=None):
         """
         Initialize the HybridLinUCBModel.
         
@@ -65,36 +84,81 @@ class HybridLinUCBModel:
         feedback_exponent : float, optional
             Exponent to weight feedback (default is 2.0). For a feedback score s (1-100),
             reward is computed as: reward = sign(s-50) * (|s-50|/50)^(feedback_exponent).
+        last_n_hours : float, optional
+            Only articles published within the last `last_n_hours` hours are kept (default is 96).
+        refactor_every : int, optional
+            The inverses are maintained incrementally (Sherman-Morrison / Woodbury); A0_inv is
+            recomputed from scratch every `refactor_every` updates to bound drift (default is 500).
+        inverse_tol : float, optional
+            Numerical tolerance of the incremental inverse updates. An update whose
+            capacitance matrix is conditioned worse than 1 / inverse_tol falls back to a
+            full re-inversion (default is 1e-10).
+        solver : str, optional
+            How A0 is represented. "inverse" keeps an explicit A0_inv maintained with Woodbury
+            updates; "cholesky" keeps a Cholesky factor of A0 and computes beta_hat and the
+            variance terms with triangular solves, which stays stable over very long-lived
+            processes but makes each feedback update slower (default is "inverse").
+        diversity : str or None, optional
+            How return_next_articles diversifies its picks: "section" favours one article
+            per article.section, "mmr" uses maximal marginal relevance over embedding
+            similarity, and None returns the plain top scores (default is "section").
+        mmr_lambda : float, optional
+            Relevance/diversity trade-off of the "mmr" mode; 1.0 is pure relevance
+            (default is 0.7).
+        candidate_pool : int or None, optional
+            If set, return_next_articles runs exact UCB scoring only on about this many
+            candidates instead of on every unreturned article. The candidates come from an
+            approximate nearest-neighbour index (IVFIndex) queried with the beta_hat direction
+            and the user's recent positively rated articles, plus a random exploration slice.
+            None scores every article exhaustively (default is None).
+        exploration_fraction : float, optional
+            Fraction of the candidate pool drawn uniformly at random from the eligible
+            articles (default is 0.2).
+        n_recent_positives : int, optional
+            Number of recent positively rated articles used as extra index queries
+            (default is 10).
+        corpus : ArticleCorpus, optional
+            An existing corpus to build the model on; `articles` and `projection` are
+            then ignored. By default a new corpus is built from `articles`.
+        projection : EmbeddingProjection, optional
+            Project the article embeddings to a smaller dimension before they reach the
+            model (see projection.py). Seed embeddings given in the raw dimension are
+            projected the same way. By default the raw embeddings are used.
+        state_dtype : str or numpy dtype, optional
+            Type of the per-arm state arrays. "float32" halves their memory (most of the
+            model's memory in the general model, d^2 floats per touched arm) at the cost of
+            rounding the stored state to single precision (default is "float64").
+        state_path : str, optional
+            Keep the per-arm state in memory-mapped files in this directory, so that the
+            OS can page out the state of arms that are no longer scored. The files are
+            scratch space, overwritten on start; use save() for checkpoints. Models created
+            by fork() hold their own state in memory. By default the state is in memory.
         """
 
-        # date is in format of "2025-01-01T00:44:39+0000"
-
-        # filter articles has date object to only be in the last_n_hours
-        # Ensure datetime.now() is timezone-aware
-        now = datetime.now(timezone.utc)
-
-        # Filter articles to only include those from the last `last_n_hours`
-        articles = [
-            article for article in articles
-            if (now - datetime.strptime(article.date, "%Y-%m-%dT%H:%M:%S%z")).total_seconds() < last_n_hours * 3600
-        ]
-
-
-        _indx_count = 0
-        for article in articles:
-            article._id = _indx_count
-            _indx_count += 1
-
-        self.articles: list[Article] = articles
-
-        print(len(self.articles))
-
-        self.n_articles = len(articles)
+        self.last_n_hours = last_n_hours
+        if corpus is None:
+            # Filter articles to only include those from the last `last_n_hours`. Articles
+            # carry a pre-parsed epoch timestamp, so the window is a vectorized mask.
+            timestamps = np.array([article.timestamp for article in articles], dtype=float)
+            articles = [article for article, keep in zip(articles, self._in_window(timestamps)) if keep]
+            print(len(articles))
+            # Assume that each article.embedding is a list of floats.
+            d = projection.dim if projection is not None else len(articles[0].embedding)
+            corpus = ArticleCorpus(d, articles, projection=projection)
+        # The articles live in stable slots (the article _id) of the corpus, which can be
+        # shared with other models; see add_articles, remove_articles and fork.
+        self.corpus = corpus
+        self.projection = corpus.projection
+        self.d = corpus.d
         
-        # Assume that each article.embedding is a list of floats; convert them to a NumPy array.
-        # All embeddings are stacked into a (n_articles x d) array.
-        self.embeddings = np.array([np.array(article.embedding, dtype=float) for article in articles])
-        self.n_articles, self.d = self.embeddings.shape
+        self.diversity = diversity
+        self.mmr_lambda = mmr_lambda
+        
+        # Two-stage candidate generation (ANN retrieval before exact UCB scoring).
+        self.candidate_pool = candidate_pool
+        self.exploration_fraction = exploration_fraction
+        self.recent_positives = deque(maxlen=n_recent_positives)
+        self._rng = np.random.default_rng()
         
         # Exploration parameter.
         self.alpha = alpha
@@ -104,40 +168,322 @@ class HybridLinUCBModel:
         self.stabilization = stabilization
         self.feedback_exponent = feedback_exponent
         self.num_updates = 0  # counts the number of feedback updates
+        # Optional EventLog recording every feedback and seed event (see event_log.py).
+        self.event_log = None
+        # Optional ShardedScorer spreading exhaustive scoring over processes (see sharded.py).
+        self.scorer = None
         
         # For simplicity, we use the article embedding dimension for the shared part.
         self.k = self.d
         
-        # Global (shared) parameters: A0 and b0.
-        self.A0 = np.identity(self.k)
-        self.A0_inv = np.identity(self.k)
+        # Global (shared) parameters: A0 and b0. A0 is held together with its inverse (or its
+        # Cholesky factor) so that feedback can apply low-rank updates instead of re-inverting.
+        if solver == "inverse":
+            self.A0_factor = WoodburyInverse(self.k, refactor_every=refactor_every, tol=inverse_tol)
+        elif solver == "cholesky":
+            self.A0_factor = CholeskyFactor(self.k, refactor_every=refactor_every, tol=inverse_tol)
+        else:
+            raise ValueError(f"Unknown solver '{solver}', expected 'inverse' or 'cholesky'.")
+        self.solver = solver
         self.b0 = np.zeros((self.k, 1))
+        # q_a = x_a^T A0_inv x_a of every arm, kept current through the low-rank updates of A0.
+        self._quad_cache = QuadCache(corpus.capacity, refresh_every=refactor_every, tol=inverse_tol)
         
-        # For each article (arm), initialize disjoint parameters.
-        # A[a] is a d x d matrix; B[a] is a d x k matrix; b[a] is a d x 1 vector.
-        self.A = [np.identity(self.d) for _ in range(self.n_articles)]
-        self.A_inv = [np.identity(self.d) for _ in range(self.n_articles)]
-        self.B = [np.zeros((self.d, self.k)) for _ in range(self.n_articles)]
-        self.b = [np.zeros((self.d, 1)) for _ in range(self.n_articles)]
+        # Per-arm (disjoint) parameters: A[a] is a d x d matrix; B[a] is a d x k matrix;
+        # b[a] is a d x 1 vector. Only arms that received feedback are stored; all
+        # others are implicitly at the prior (identity A, zero B and b).
+        self.state_dtype = np.dtype(state_dtype)
+        self.state_path = state_path
+        self.arms = self._make_arm_store()
         
-        # Keep track of which articles have not yet been returned.
-        self.unreturned_articles = set(range(self.n_articles))
-        self._all_articles = set(range(self.n_articles))
+        # Keep track of which articles have been returned (a mask over the corpus slots).
+        self._returned = np.zeros(corpus.capacity, dtype=bool)
+        self._corpus_version = corpus.version
+        # Models created by fork() share the state of their template until their first write.
+        self._template = None
+        self._owns_state = True
+        # Shared with the forks (by copy), which hold it while they catch the template up
+        # with the corpus or copy its state, as they may do so from different threads.
+        self._template_lock = threading.RLock()
     
+    def _make_arm_store(self):
+        return ArmStateStore(self.d, self.k, dtype=self.state_dtype, path=self.state_path)
+
+    def _in_window(self, timestamps, now=None):
+        """
+        Boolean mask of the timestamps (epoch seconds) within the last `last_n_hours` of `now`.
+        """
+        now = time.time() if now is None else now
+        return (now - timestamps) < self.last_n_hours * 3600
+
+    @property
+    def n_articles(self):
+        """
+        Number of live arms.
+        """
+        return self.corpus.n_articles
+
+    @property
+    def n_slots(self):
+        """
+        Number of slots handed out so far; slot-indexed arrays have this many rows.
+        """
+        return self.corpus.n_slots
+
+    @property
+    def articles(self):
+        """
+        The live articles, in slot order.
+        """
+        return self.corpus.articles
+
+    @property
+    def embeddings(self):
+        return self.corpus.embeddings
+
+    @property
+    def embedding_norms(self):
+        return self.corpus.embedding_norms
+
+    @property
+    def section_codes(self):
+        return self.corpus.section_codes
+
+    @property
+    def sections(self):
+        return self.corpus.sections
+
+    @property
+    def unreturned_articles(self):
+        """
+        The set of live arms that have not been returned yet.
+        """
+        self._sync_corpus()
+        return set(np.flatnonzero(self.corpus.live & ~self._returned[:self.n_slots]).tolist())
+
+    @unreturned_articles.setter
+    def unreturned_articles(self, arms):
+        self._sync_corpus()
+        self._returned[:] = True
+        self._returned[list(arms)] = False
+
+    def _sync_corpus(self):
+        """
+        Catch up with articles added to or removed from the corpus since this model last
+        looked at it: arms whose slot was freed or reused go back to the prior and
+        become unreturned, and new arms are unreturned.
+        """
+        corpus = self.corpus
+        if self._corpus_version == corpus.version:
+            return
+        if len(self._returned) < corpus.capacity:
+            returned = np.zeros(corpus.capacity, dtype=bool)
+            returned[:len(self._returned)] = self._returned
+            self._returned = returned
+        changed = np.flatnonzero(~corpus.live | (corpus.born > self._corpus_version))
+        self._returned[changed] = False
+        if self._owns_state:
+            self.arms.resize(corpus.capacity)
+            self.arms.discard(changed)
+            self._quad_cache.resize(corpus.capacity)
+            self._quad_cache.invalidate(changed)
+        else:
+            with self._template_lock:
+                self._template._sync_corpus()
+        stale = set(changed.tolist())
+        self.recent_positives = deque((a for a in self.recent_positives if a not in stale),
+                                      maxlen=self.recent_positives.maxlen)
+        self._corpus_version = corpus.version
+
+    def add_articles(self, articles):
+        """
+        Add articles as new arms at the prior, without touching the learned state.
+        
+        Each article gets a slot in the corpus (reusing the slots of removed articles
+        first) and its _id is set to it. The global parameters A0 and b0 and the state
+        of every other arm are left intact. New arms are eligible for recommendation
+        immediately.
+        
+        Parameters
+        ----------
+        articles : list of Article
+            The articles to add.
+            
+        Returns
+        -------
+        np.ndarray of int
+            The slots (_id values) assigned to the articles.
+        """
+        slots = self.corpus.add(articles)
+        self._sync_corpus()
+        return slots
+
+    def remove_articles(self, articles):
+        """
+        Remove arms from the model, dropping their per-arm state.
+        
+        The freed slots are reused by later additions. What the removed arms contributed
+        to A0 and b0 is kept: the global parameters describe the user, not the corpus.
+        The removed articles' _id is reset to None.
+        
+        Parameters
+        ----------
+        articles : list of Article or int
+            The articles (or their _id values) to remove.
+        """
+        self.corpus.remove(articles)
+        self._sync_corpus()
+
+    def slide_window(self, now=None, new_articles=()):
+        """
+        Move the last_n_hours window forward without rebuilding the model.
+        
+        Articles whose timestamp has fallen out of the window are removed and
+        `new_articles` that fall inside it are added as fresh arms at the prior (see
+        remove_articles and add_articles). The global parameters (A0, b0, num_updates)
+        are kept, so everything learned about the user's preferences carries over.
+        
+        Parameters
+        ----------
+        now : float, optional
+            Reference time in epoch seconds (default is the current time).
+        new_articles : list of Article, optional
+            Newly retrieved articles to admit if they are within the window.
+            
+        Returns
+        -------
+        (int, int)
+            The number of retired and admitted articles.
+        """
+        live = self.corpus.live_slots()
+        retired = live[~self._in_window(self.corpus.timestamps[live], now)]
+        self.remove_articles(retired)
+        
+        new_timestamps = np.array([article.timestamp for article in new_articles], dtype=float)
+        admitted = [article for article, ok in zip(new_articles, self._in_window(new_timestamps, now)) if ok]
+        self.add_articles(admitted)
+        return len(retired), len(admitted)
+
+    def fork(self):
+        """
+        Return a model for another user over the same corpus, starting from this model's
+        learned state.
+        
+        The new model shares the corpus (embeddings and articles) and, until its first
+        feedback or seeding, also reads this model's A0, b0 and per-arm state instead of
+        copying them (copy-on-first-write). Only the returned-articles mask is its own
+        from the start. This model must not be updated while forks still share its state.
+        Forks used from different threads catch it up with the corpus under a lock they
+        share with it.
+        """
+        with self._template_lock:
+            self._sync_corpus()
+        session = copy.copy(self)
+        session._template = self if self._owns_state else self._template
+        session._owns_state = False
+        session._returned = np.zeros_like(self._returned)
+        session.recent_positives = deque(self.recent_positives, maxlen=self.recent_positives.maxlen)
+        session._rng = np.random.default_rng()
+        session.event_log = None
+        return session
+
+    def _own_state(self):
+        """
+        Give a forked model its own copy of the learned state before it is first modified.
+        """
+        if self._owns_state:
+            return
+        with self._template_lock:
+            self._template._sync_corpus()
+            self.A0_factor = copy.deepcopy(self.A0_factor)
+            self.b0 = self.b0.copy()
+            self.arms = copy.deepcopy(self.arms)
+            self._quad_cache = self._quad_cache.copy(self.embeddings)
+        self._owns_state = True
+        self._template = None
+        self._template_lock = threading.RLock()
+
+    def snapshot(self, corpus=None):
+        """
+        Return a frozen copy of this model for concurrent readers (see ConcurrentBandit).
+        A0, b0 and the q cache are copied; the per-arm state is shared with this model
+        through ArmStateStore.snapshot, so that the cost does not grow with the number of
+        touched arms. The snapshot must not be updated.
+
+        Parameters
+        ----------
+        corpus : ArticleCorpus, optional
+            A read-only copy of this model's corpus at its current version, to share
+            between the snapshots of one version (default is a new ArticleCorpus.snapshot).
+        """
+        self._sync_corpus()
+        self._own_state()
+        if corpus is None:
+            corpus = self.corpus.snapshot()
+        elif corpus.version != self.corpus.version:
+            raise ValueError("The corpus snapshot is not at the model's corpus version.")
+        snap = copy.copy(self)
+        snap.corpus = corpus
+        snap._returned = self._returned.copy()
+        snap.recent_positives = deque(self.recent_positives, maxlen=self.recent_positives.maxlen)
+        snap._rng = np.random.default_rng()
+        snap.event_log = None
+        snap.A0_factor = copy.deepcopy(self.A0_factor)
+        snap.b0 = self.b0.copy()
+        snap.arms = self.arms.snapshot()
+        snap._quad_cache = self._quad_cache.copy(self.embeddings)
+        return snap
+
+    @property
+    def A0(self):
+        return self.A0_factor.matrix
+
+    @property
+    def A0_inv(self):
+        return self.A0_factor.inv
+
     def reset(self):
         """
         Reset the list of returned articles so that all articles are again eligible.
         (Does not reset learned parameters.)
         """
-        self.unreturned_articles = set(range(self.n_articles))
+        self._returned[:] = False
     
+    def save(self, path):
+        """
+        Save the learned state to the checkpoint directory `path` (see checkpoint.py).
+        """
+        save_checkpoint(self, path)
+
+    def load(self, path, mmap=True):
+        """
+        Restore the learned state from the checkpoint directory `path`, matching arms by
+        article id. Returns the number of arms found in the checkpoint.
+        """
+        self._sync_corpus()
+        self._own_state()
+        found = load_checkpoint(self, path, mmap=mmap)
+        self._quad_cache.invalidate()
+        return found
+    
+    def project(self, embeddings):
+        """
+        Map raw embeddings (e.g. from Embedor) into the feature space of the model, one
+        per row. Embeddings already in that space are returned as they are.
+        """
+        X = np.array(embeddings, dtype=float)
+        X = X.reshape(-1, X.shape[-1]) if X.size else X.reshape(0, self.d)
+        if self.projection is not None and X.shape[1] == self.projection.input_dim:
+            X = self.projection.transform(X)
+        return X.reshape(-1, self.d)
+
     def _compute_effective_lr(self):
         """
         Compute the effective learning rate (eta) based on the number of updates.
         """
         return self.learning_rate / (1 + self.stabilization * self.num_updates)
     
-    def return_next_articles(self, num_articles, update_state=True):
+    def return_next_articles(self, num_articles, update_state=True, diversity=None):
         """
         Return the next best 'num_articles' articles (as a list of Article objects)
         from the set of unreturned articles. This method uses the hybrid LinUCB score:
@@ -151,77 +497,194 @@ class HybridLinUCBModel:
             s = z_a^T A0_inv z_a - 2 z_a^T A0_inv B[a]^T A_inv[a] x_a 
                 + x_a^T A_inv[a] x_a + x_a^T A_inv[a] B[a] A0_inv B[a]^T A_inv[a] x_a.
         
-        To promote diversity, the method first attempts to select articles from different
-        sections (based on article.section). If not enough unique sections are available,
-        the remaining articles are filled in based solely on score.
+        To promote diversity, the method by default first attempts to select articles from
+        different sections (based on article.section). If not enough unique sections are
+        available, the remaining articles are filled in based solely on score. See `diversity`
+        for the alternatives.
         
         Parameters
         ----------
         num_articles : int
             The number of articles to return.
+        update_state : bool, optional
+            If True (default), only unreturned articles are considered and the selected ones
+            are marked as returned. If False, all articles are ranked and no state changes.
+        diversity : str or None, optional
+            Overrides the model's diversity mode for this call ("section", "mmr" or "none").
             
         Returns
         -------
         list of Article
             A list of Article objects selected for recommendation.
         """
-        if update_state and not self.unreturned_articles:
+        self._sync_corpus()
+        eligible = self.corpus.live
+        if update_state:
+            eligible = eligible & ~self._returned[:self.n_slots]
+        candidates = np.flatnonzero(eligible)
+        if update_state and len(candidates) == 0:
             raise Exception("All articles have been returned. Call reset() to start over.")
         
         # Compute global beta_hat.
-        beta_hat = self.A0_inv @ self.b0  # shape (k, 1)
+        beta_hat = self.A0_factor.solve(self.b0)  # shape (k, 1)
         
-        scores = []  # list of tuples: (score, article_index)
+        # Compute the LinUCB score for each unreturned article in one batched pass.
+        candidates, candidate_scores = self._score_candidates(candidates, beta_hat, num_articles,
+                                                              update_state, diversity)
 
-        # Compute the LinUCB score for each unreturned article.
-        loop_articles = self.unreturned_articles if update_state else self._all_articles
-        for a in loop_articles:
-            x = self.embeddings[a].reshape(self.d, 1)
-            z = x  # using the same vector for the shared feature
-            theta_hat = self.A_inv[a] @ (self.b[a] - self.B[a] @ beta_hat)
-            reward_pred = (z.T @ beta_hat + x.T @ theta_hat).item()
-            
-            # Compute the uncertainty (exploration bonus) term.
-            term1 = (z.T @ self.A0_inv @ z).item()
-            term2 = 2 * (z.T @ self.A0_inv @ self.B[a].T @ self.A_inv[a] @ x).item()
-            term3 = (x.T @ self.A_inv[a] @ x).item()
-            term4 = (x.T @ self.A_inv[a] @ self.B[a] @ self.A0_inv @ self.B[a].T @ self.A_inv[a] @ x).item()
-            s = term1 - term2 + term3 + term4
-            bonus = self.alpha * np.sqrt(max(s, 0))
-            
-            score = reward_pred + bonus
-            scores.append((score, a))
-
-        # Sort articles by descending score.
-        scores.sort(key=lambda tup: tup[0], reverse=True)
-        
-        # Select articles trying to maximize diversity in 'section'.
-        selected = []
-        selected_sections = set()
-        # First pass: try to select one article per unique section.
-        for score, a in scores:
-            art_section = self.articles[a].section
-            if art_section not in selected_sections:
-                selected.append(a)
-                selected_sections.add(art_section)
-            if len(selected) >= num_articles:
-                break
-        # Second pass: if fewer than num_articles are selected, fill in with top scoring articles.
-        if len(selected) < num_articles:
-            for score, a in scores:
-                if a not in selected:
-                    selected.append(a)
-                if len(selected) >= num_articles:
-                    break
+        selected = candidates[self._select(candidates, candidate_scores, num_articles, diversity)].tolist()
         
         # Mark the selected articles as returned.
         if update_state:
-            for a in selected:
-                self.unreturned_articles.remove(a)
+            self._returned[selected] = True
         
         # Return the corresponding Article objects.
-        return [self.articles[a] for a in selected]
+        return [self.corpus.article(a) for a in selected]
+    
+    def _score_candidates(self, candidates, beta_hat, num_articles, update_state=True, diversity=None):
+        """
+        Score the eligible arms for a selection of `num_articles`.
+        
+        Returns the (candidates, scores) to select from. With a candidate pool, only the
+        arms retrieved by _generate_candidates are scored. With a ShardedScorer, the
+        scoring is spread over its worker processes, which return only the arms the
+        selection can pick (the top-k and the best of each section).
+        """
+        if self.candidate_pool and update_state and len(candidates) > self.candidate_pool:
+            candidates = self._generate_candidates(candidates, beta_hat)
+        elif self.scorer is not None:
+            k = 10 * num_articles if (diversity or self.diversity) == "mmr" else num_articles
+            return self.scorer.score(self, candidates, beta_hat, k)
+        return candidates, self._score_arms(candidates, beta_hat)
+    
+    @property
+    def ann_index(self):
+        """
+        The approximate nearest-neighbour index over the corpus embeddings, built on first use.
+        """
+        return self.corpus.ann_index
+    
+    def _generate_candidates(self, eligible, beta_hat):
+        """
+        Narrow the eligible arms down to about `candidate_pool` candidates for exact scoring.
+        
+        The ANN index is queried with the beta_hat direction (the arms with the largest
+        predicted shared reward) and with the embeddings of recent positively rated
+        articles; a uniformly random slice of the eligible arms is added so that arms far
+        from both still get explored.
+        """
+        is_eligible = np.zeros(self.n_slots, dtype=bool)
+        is_eligible[eligible] = True
+        
+        queries = [beta_hat.ravel()] + [self.embeddings[a] for a in self.recent_positives]
+        queries = [q for q in queries if np.any(q)]
+        n_explore = int(self.exploration_fraction * self.candidate_pool)
+        if not queries:
+            n_explore = self.candidate_pool
+        
+        found = [np.empty(0, dtype=np.intp)]
+        if queries:
+            per_query = max((self.candidate_pool - n_explore) // len(queries), 1)
+            for query in queries:
+                hits = self.ann_index.search(query, 2 * per_query)
+                found.append(hits[is_eligible[hits]][:per_query])
+        explore = self._rng.choice(eligible, size=min(n_explore, len(eligible)), replace=False)
+        return np.union1d(np.concatenate(found), explore)
+    
+    def _select(self, candidates, scores, num_articles, diversity=None):
+        """
+        Choose `num_articles` positions among the scored candidates, best first.
+        
+        All modes work on the score array with partial top-k selections and array
+        reductions (see selection.py) rather than fully sorting the candidates.
+        """
+        diversity = diversity or self.diversity
+        if diversity == "section":
+            return select_by_section(scores, self.section_codes[candidates], len(self.sections), num_articles)
+        if diversity == "mmr":
+            return select_mmr(scores, self.embeddings[candidates], num_articles, self.mmr_lambda)
+        if diversity in (None, "none"):
+            return top_k(scores, num_articles)
+        raise ValueError(f"Unknown diversity mode '{diversity}', expected 'section', 'mmr' or 'none'.")
+    
+    def _score_arms(self, indices, beta_hat, chunk_size=2048):
+        """
+        Compute the hybrid LinUCB score p_a for every arm in `indices`.
+        
+        Arms without feedback are at the prior (A_inv[a] = I, B[a] = 0, b[a] = 0), so
+        theta_hat_a = 0 and the score has the closed form
+        
+            p_a = x_a^T beta_hat + alpha * sqrt(x_a^T A0_inv x_a + x_a^T x_a).
+        
+        Arms with stored state are evaluated for a whole chunk at once. With X the
+        (m x d) stacked embeddings of the chunk:
+        
+            theta     = A_inv[a] (b[a] - B[a] beta_hat)
+            u         = A_inv[a] x_a,        v = B[a]^T u
+            term1     = x_a^T A0_inv x_a,    term2 = 2 (A0_inv x_a)^T v
+            term3     = x_a^T u,             term4 = v^T A0_inv v
+        
+        term1 comes from the q cache (QuadCache) and term3, v and b[a]^T u from the
+        per-arm cache of the arm store, which recomputes them only for arms updated since
+        they were last scored. For arms at the prior, scoring is then one matrix-vector
+        product (see _shared_terms). Chunking bounds the size of the temporaries of
+        the touched arms.
+        
+        Parameters
+        ----------
+        indices : np.ndarray of int
+            Indices of the arms to score.
+        beta_hat : np.ndarray
+            The (k x 1) global coefficient vector A0_inv @ b0.
+        chunk_size : int, optional
+            Number of arms scored per batched call (default is 2048).
+            
+        Returns
+        -------
+        np.ndarray
+            Scores aligned with `indices`.
+        """
+        beta = beta_hat.ravel()
+        m, q = self._shared_terms(indices, beta)
+        scores = np.empty(len(indices))
+        rows = self.arms.lookup(indices)
+        prior = np.flatnonzero(rows < 0)
+        touched = np.flatnonzero(rows >= 0)
+
+        n = self.embedding_norms[indices[prior]]
+        scores[prior] = m[prior] + self.alpha * np.sqrt(np.maximum(q[prior] + n, 0))
+
+        for start in range(0, len(touched), chunk_size):
+            pos = touched[start:start + chunk_size]
+            X = self.embeddings[indices[pos]]  # (m, d); z = x for the shared feature
+            term3, v, b_u = self.arms.score_terms(rows[pos], X)
+            
+            # x^T theta_hat = u^T (b[a] - B[a] beta_hat) = b[a]^T u - v^T beta_hat
+            reward_pred = m[pos] + b_u - v @ beta
+            
+            XA0 = self.A0_factor.solve(X.T).T  # rows are (A0_inv z)^T
+            term2 = 2 * np.einsum("mi,mi->m", XA0, v)
+            term4 = self.A0_factor.quad(v)
+            s = q[pos] - term2 + term3 + term4
+            bonus = self.alpha * np.sqrt(np.maximum(s, 0))
+            
+            scores[pos] = reward_pred + bonus
+        return scores
     
+    def _shared_terms(self, indices, beta):
+        """
+        Return m_a = x_a^T beta_hat and q_a = x_a^T A0_inv x_a for the arms `indices`.
+        
+        When most of the corpus is scored, m is a single matrix-vector product over the
+        whole embedding matrix (no gathered copy of the rows), and q is read from the
+        q cache.
+        """
+        if 2 * len(indices) > self.n_slots:
+            m = (self.embeddings @ beta)[indices]
+        else:
+            m = self.embeddings[indices] @ beta
+        return m, self._quad_cache.lookup(self.A0_factor, self.embeddings, indices)
+
     def feedback(self, article, score):
         """
         Incorporate user feedback for a given article and update the model.
@@ -240,31 +703,136 @@ class HybridLinUCBModel:
             reward = sign(score - 50) * (|score - 50| / 50)^(feedback_exponent)
         so that feedback far from 50 (in either direction) is amplified.
         """
-        # Compute reward from feedback score.
+        self._sync_corpus()
+        self._own_state()
+        reward = self._reward(score)
+        eta = self._compute_effective_lr()
+        if self.event_log is not None:
+            self.event_log.append_feedback([self.corpus.article(article).id], [score], [eta])
+        if reward > 0:
+            self.recent_positives.append(article)
+        
+        U, c, b0_delta = self._update_arm(article, eta, reward)
+        
+        # --- Update global (shared) parameters ---
+        # The per-arm update returns the global contribution as a low-rank term, so A0_inv
+        # is updated with Woodbury instead of being re-inverted.
+        self._update_global(U, c, b0_delta)
+        
+        self.num_updates += 1
+
+    def feedback_many(self, articles, scores):
+        """
+        Incorporate a batch of feedback events, equivalent to calling feedback() for each
+        (article, score) pair in order.
+        
+        Each event still gets its own decayed learning rate
+            eta_i = learning_rate / (1 + stabilization * (num_updates + i)),
+        and the per-arm updates are applied in one pass. The global contribution of every
+        event only depends on its arm's state, so all contributions are gathered into a
+        single low-rank block update A0 <- A0 + U diag(c) U^T (one Woodbury update or one
+        refactorization) instead of one global update per event.
+        
+        Parameters
+        ----------
+        articles : array-like of int
+            The indices of the articles receiving feedback (repeats are allowed).
+        scores : array-like of float
+            Feedback scores in the range [1, 100], aligned with `articles`.
+        """
+        articles = np.asarray(articles, dtype=np.intp).ravel()
+        scores = np.asarray(scores, dtype=float).ravel()
+        if articles.shape != scores.shape:
+            raise ValueError("articles and scores must have the same length.")
+        if articles.size == 0:
+            return
+        self._sync_corpus()
+        self._own_state()
+        
+        deviation = scores - 50.0
+        rewards = np.sign(deviation) * ((np.abs(deviation) / 50.0) ** self.feedback_exponent)
+        etas = self.learning_rate / (1 + self.stabilization * (self.num_updates + np.arange(articles.size)))
+        if self.event_log is not None:
+            self.event_log.append_feedback([self.corpus.article(a).id for a in articles.tolist()], scores, etas)
+        
+        self.recent_positives.extend(articles[rewards > 0].tolist())
+        U, c, b0_delta = self._update_arms(articles, etas, rewards)
+        self._update_global(U, c, b0_delta)
+        
+        self.num_updates += articles.size
+
+    def _update_global(self, U, c, b0_delta):
+        """
+        Apply A0 <- A0 + U diag(c) U^T and b0 <- b0 + b0_delta, recording the update in
+        the q cache first.
+        """
+        self._quad_cache.update(self.A0_factor, U, c)
+        self.A0_factor.update(U, c)
+        self.b0 += b0_delta
+
+    def _update_arms(self, articles, etas, rewards):
+        """
+        Apply the per-arm updates of a batch of feedback events and return their summed
+        global contribution (U, c, b0_delta), see _update_arm.
+        """
+        columns, coefs = [], []
+        b0_delta = np.zeros((self.k, 1))
+        for article, eta, reward in zip(articles.tolist(), etas.tolist(), rewards.tolist()):
+            U, c, b_delta = self._update_arm(article, eta, reward)
+            columns.append(U)
+            coefs.extend(c)
+            b0_delta += b_delta
+        return np.hstack(columns), coefs, b0_delta
+
+    def _reward(self, score):
+        """
+        Map a feedback score in [1, 100] to a reward in [-1, 1]:
+            reward = sign(score - 50) * (|score - 50| / 50)^(feedback_exponent)
+        """
         deviation = score - 50.0
         if deviation == 0:
-            reward = 0.0
-        else:
-            reward = np.sign(deviation) * ((abs(deviation) / 50.0) ** self.feedback_exponent)
-        
-        eta = self._compute_effective_lr()
+            return 0.0
+        return np.sign(deviation) * ((abs(deviation) / 50.0) ** self.feedback_exponent)
+
+    def _update_arm(self, article, eta, reward):
+        """
+        Apply the per-arm (disjoint) update for one feedback event and return the
+        matching contribution to the global parameters.
         
+        Returns
+        -------
+        U, c, b0_delta
+            The global update is A0 <- A0 + U diag(c) U^T and b0 <- b0 + b0_delta.
+        """
         # Get the article's feature vectors.
         x = self.embeddings[article].reshape(self.d, 1)
         z = x.copy()  # shared feature
         
         # --- Update per-article (disjoint) parameters ---
-        self.A[article] = self.A[article] + eta * (x @ x.T)
-        self.b[article] = self.b[article] + eta * (reward * x)
-        self.B[article] = self.B[article] + eta * (x @ z.T)
-        self.A_inv[article] = np.linalg.inv(self.A[article])
-        
-        # --- Update global (shared) parameters ---
-        self.A0 = self.A0 + eta * (z @ z.T - self.B[article].T @ self.A_inv[article] @ self.B[article])
-        self.b0 = self.b0 + eta * (reward * z - self.B[article].T @ self.A_inv[article] @ self.b[article])
-        self.A0_inv = np.linalg.inv(self.A0)
+        # A[a] only ever receives the rank-1 term eta * x x^T, so its inverse is kept up to
+        # date with Sherman-Morrison in O(d^2):
+        #   A_inv <- A_inv - eta * (A_inv x)(A_inv x)^T / (1 + eta * x^T A_inv x)
+        row = self.arms.ensure(article)
+        A, A_inv, B_a, b_a = self.arms.A[row], self.arms.A_inv[row], self.arms.B[row], self.arms.b[row]
+        A_inv_x = A_inv @ x
+        A += eta * (x @ x.T)
+        b_a += eta * (reward * x)
+        B_a += eta * (x @ z.T)
+        A_inv -= (eta / (1.0 + eta * (x.T @ A_inv_x).item())) * (A_inv_x @ A_inv_x.T)
+        self.arms.dirty[row] = True
         
-        self.num_updates += 1
+        # --- Contribution to the global (shared) parameters ---
+        #   A0 <- A0 + eta * (z z^T - B[a]^T A_inv[a] B[a])
+        #   b0 <- b0 + eta * (reward * z - B[a]^T A_inv[a] b[a])
+        # B[a] accumulates x z^T for the same x, so B[a] = x w^T with w = B[a]^T x / |x|^2,
+        # and B[a]^T A_inv[a] B[a] = (x^T A_inv[a] x) w w^T: the A0 update has rank <= 2.
+        A_inv_x = A_inv @ x
+        x_norm2 = (x.T @ x).item()
+        w = (B_a.T @ x) / x_norm2 if x_norm2 > 0 else np.zeros_like(z)
+        U = np.hstack([z, w])
+        c = [eta, -eta * (x.T @ A_inv_x).item()]
+        b0_delta = eta * (reward * z - B_a.T @ (A_inv @ b_a))
+        return U, c, b0_delta
 
     def seeding(self, seed_embeddings, seed_scores, seed_lr=5.0):
         """
@@ -281,15 +849,120 @@ class HybridLinUCBModel:
             A weighting factor for the seeding update (default is 5.0).
         
         This function updates the global parameters (A0 and b0) to bias the model
-        toward topics the user likes (or away from topics the user dislikes). After processing
-        the seeds, the global inverse is updated.
-        """
-        for emb, score in zip(seed_embeddings, seed_scores):
-            z = np.array(emb, dtype=float).reshape(self.k, 1)
-            reward = score  # using the seed score directly as reward
-            self.A0 = self.A0 + seed_lr * (z @ z.T)
-            self.b0 = self.b0 + seed_lr * (reward * z)
-        self.A0_inv = np.linalg.inv(self.A0)
+        toward topics the user likes (or away from topics the user dislikes). All seeds
+        are applied at once, as the low-rank update
+        
+            A0 <- A0 + seed_lr * Z^T Z,   b0 <- b0 + seed_lr * Z^T scores
+        
+        with Z the (m x k) stacked seed embeddings, so the inverse (or Cholesky factor)
+        of A0 is updated with Woodbury in O(k^2 m) instead of being recomputed, like for
+        feedback_many(). Raw seed embeddings are projected like the article embeddings
+        if the model has a projection.
+        """
+        Z = self.project(seed_embeddings)
+        scores = np.asarray(seed_scores, dtype=float).ravel()  # using the seed scores directly as rewards
+        if len(Z) != len(scores):
+            raise ValueError("seed_embeddings and seed_scores must have the same length.")
+        if len(Z) == 0:
+            return
+        self._own_state()
+        if self.event_log is not None:
+            self.event_log.append_seeds(Z, scores, seed_lr)
+        self._update_global(Z.T, np.full(len(Z), float(seed_lr)), seed_lr * (Z.T @ scores).reshape(self.k, 1))
+
+    def seed_topics(self, topics, scores, embedor, seed_lr=5.0):
+        """
+        Seed the model with a user's interests given as text (e.g. "Technology"): the
+        topics are embedded in one batch by `embedor` (an Embedor, which caches topic
+        embeddings across users) and applied with seeding().
+        """
+        self.seeding(embedor.embed_many(topics), scores, seed_lr=seed_lr)
+
+class TiedHybridLinUCBModel(HybridLinUCBModel):
+    """
+    Hybrid LinUCB specialised to the tied features used throughout this project (z_a = x_a).
+    
+    Every update to arm a adds eta * x_a x_a^T to A[a] and B[a] and eta * reward * x_a to
+    b[a], always along the arm's own embedding. With S_a = sum(eta) and R_a = sum(eta * reward)
+    over the feedback received by arm a, and n_a = x_a^T x_a, the per-arm state is exactly
+    
+        A[a] = I + S_a x_a x_a^T,   B[a] = S_a x_a x_a^T,   b[a] = R_a x_a,
+    
+    so only the two scalars (S_a, R_a) are stored (see TiedArmStore). With m_a = x_a^T beta_hat
+    and q_a = x_a^T A0_inv x_a, the LinUCB quantities have the closed forms
+    
+        x_a^T theta_hat_a = n_a (R_a - S_a m_a) / (1 + S_a n_a)
+        s_a               = q_a / (1 + S_a n_a)^2 + n_a / (1 + S_a n_a)
+    
+    and the global update of one feedback event is rank-1 along x_a:
+    
+        A0 <- A0 + eta (1 - S_a^2 n_a / (1 + S_a n_a)) x_a x_a^T
+        b0 <- b0 + eta (reward - S_a R_a n_a / (1 + S_a n_a)) x_a
+    
+    (S_a and R_a taken after the update). The model is numerically equivalent to
+    HybridLinUCBModel, but per-arm memory is O(1) instead of O(d^2) and the per-arm part of
+    scoring is O(1) on top of the shared terms m_a and q_a. The public API is identical.
+    """
+    
+    def _make_arm_store(self):
+        return TiedArmStore(self.corpus.capacity, dtype=self.state_dtype, path=self.state_path)
+    
+    def _score_arms(self, indices, beta_hat):
+        """
+        Compute the hybrid LinUCB score for every arm in `indices` using the closed forms
+        of the tied model.
+        """
+        m, q = self._shared_terms(indices, beta_hat.ravel())
+        S, R, n = self.arms.eta_sum[indices], self.arms.reward_sum[indices], self.embedding_norms[indices]
+        shrink = 1.0 / (1.0 + S * n)
+        reward_pred = m + n * (R - S * m) * shrink
+        s = q * shrink ** 2 + n * shrink
+        return reward_pred + self.alpha * np.sqrt(np.maximum(s, 0))
+    
+    def _update_arm(self, article, eta, reward):
+        """
+        Update (S_a, R_a) for one feedback event and return the rank-1 global contribution.
+        """
+        x = self.embeddings[article].reshape(self.d, 1)
+        n = self.embedding_norms[article]
+        S = self.arms.eta_sum[article] = self.arms.eta_sum[article] + eta
+        R = self.arms.reward_sum[article] = self.arms.reward_sum[article] + eta * reward
+        c = eta * (1.0 - S * S * n / (1.0 + S * n))
+        b0_delta = eta * (reward - S * R * n / (1.0 + S * n)) * x
+        return x, [c], b0_delta
+    
+    def _update_arms(self, articles, etas, rewards):
+        """
+        Vectorized per-arm update for a batch of feedback events.
+        
+        The values of S_a and R_a after every event are running sums within each arm's
+        events, computed with one sort and a grouped cumulative sum. Events on the same arm
+        share the direction x_a, so their global contributions are merged into a single
+        column per distinct arm.
+        """
+        order = np.argsort(articles, kind="stable")
+        arms, etas, rewards = articles[order], etas[order], rewards[order]
+        starts = np.flatnonzero(np.r_[True, arms[1:] != arms[:-1]])
+        group = np.cumsum(np.r_[True, arms[1:] != arms[:-1]]) - 1
+        
+        def running_sum(values, prior):
+            totals = np.cumsum(values)
+            return prior[arms] + totals - (totals - values)[starts][group]
+        
+        n = self.embedding_norms[arms]
+        S = running_sum(etas, self.arms.eta_sum)
+        R = running_sum(etas * rewards, self.arms.reward_sum)
+        c = etas * (1.0 - S * S * n / (1.0 + S * n))
+        b_coef = etas * (rewards - S * R * n / (1.0 + S * n))
+        
+        unique = arms[starts]
+        ends = np.r_[starts[1:], arms.size] - 1
+        self.arms.eta_sum[unique] = S[ends]
+        self.arms.reward_sum[unique] = R[ends]
+        
+        X = self.embeddings[unique]
+        b0_delta = X.T @ np.add.reduceat(b_coef, starts)
+        return X.T, np.add.reduceat(c, starts), b0_delta.reshape(self.k, 1)
 
 # ---------------------------
 # Example usage:
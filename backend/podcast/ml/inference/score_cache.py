@@ -0,0 +1,136 @@
+import threading
+import numpy as np
+
+
+class QuadCache:
+    """
+    Cache of the shared uncertainty term q_a = x_a^T A0^{-1} x_a of every arm.
+
+    q_a is the O(d^2)-per-arm part of LinUCB scoring, and it changes for every arm
+    whenever A0 does. But every feedback changes A0 by a low-rank term
+    A0 <- A0 + U diag(c) U^T, and by Woodbury
+
+        A0_new^{-1} = A0^{-1} - V M V^T,   V = A0^{-1} U,   M = (I + diag(c) U^T V)^{-1} diag(c),
+
+    so q_new = q - rowsum((X V) M * (X V)): O(d r) per arm instead of O(d^2). Each update
+    is recorded as its (V, M) pair when it happens (O(d^2 r), independent of the corpus
+    size), and all pending pairs are folded into q in one vectorized pass over the arms on
+    the next read. With q cached, scoring an arm at the prior costs O(d) (the product
+    x_a^T beta_hat) plus O(1).
+
+    Entries are computed exactly on first use and recomputed from scratch (lazily) after
+    `refresh_every` incremental updates, when the pending updates reach rank d / 2, or
+    when an update is ill-conditioned, so that errors cannot accumulate.
+    """
+
+    def __init__(self, capacity, refresh_every=500, tol=1e-10):
+        """
+        Parameters
+        ----------
+        capacity : int
+            Number of arm slots.
+        refresh_every : int, optional
+            Incremental updates after which every entry is recomputed (default is 500).
+        tol : float, optional
+            Updates whose capacitance matrix is conditioned worse than 1 / tol invalidate
+            the cache instead (default is 1e-10).
+        """
+        self.q = np.zeros(capacity)
+        self.valid = np.zeros(capacity, dtype=bool)
+        self.refresh_every = refresh_every
+        self.tol = tol
+        self._pending = []  # (V, M) pairs not yet folded into q
+        self._pending_rank = 0
+        self._updates = 0
+        # Forks read the cache of their template concurrently.
+        self._lock = threading.Lock()
+
+    def lookup(self, factor, embeddings, indices, quad=None):
+        """
+        Return q for the arms `indices`, computing the missing entries with `factor`.
+
+        `quad(factor, slots)`, if given, computes the missing entries instead of
+        factor.quad(embeddings[slots]) (e.g. ShardedScorer, in its worker processes).
+        """
+        with self._lock:
+            self._flush(embeddings)
+            missing = indices[~self.valid[indices]]
+            if len(missing):
+                self.q[missing] = factor.quad(embeddings[missing]) if quad is None else quad(factor, missing)
+                self.valid[missing] = True
+            return self.q[indices]
+
+    def update(self, factor, U, c):
+        """
+        Record the update A0 <- A0 + U diag(c) U^T. Must be called before it is applied
+        to `factor`.
+        """
+        U = np.asarray(U, dtype=float).reshape(factor.dim, -1)
+        c = np.asarray(c, dtype=float).ravel()
+        with self._lock:
+            self._updates += 1
+            if self._pending_rank + len(c) >= factor.dim / 2 or self._updates >= self.refresh_every:
+                self._invalidate()
+                return
+            V = factor.solve(U)
+            capacitance = np.identity(len(c)) + c[:, None] * (U.T @ V)
+            if np.linalg.cond(capacitance) > 1.0 / self.tol:
+                self._invalidate()
+                return
+            self._pending.append((V, np.linalg.solve(capacitance, np.diag(c))))
+            self._pending_rank += len(c)
+
+    def invalidate(self, slots=None):
+        """
+        Drop the cached entries of `slots` (all of them by default), e.g. after A0 was
+        replaced or the embedding in a slot changed.
+        """
+        with self._lock:
+            if slots is None:
+                self._invalidate()
+            else:
+                self.valid[slots] = False
+
+    def resize(self, capacity):
+        with self._lock:
+            if capacity > len(self.q):
+                q, valid = np.zeros(capacity), np.zeros(capacity, dtype=bool)
+                q[:len(self.q)], valid[:len(self.valid)] = self.q, self.valid
+                self.q, self.valid = q, valid
+
+    def copy(self, embeddings):
+        """
+        Return an independent copy, with the pending updates folded in first.
+        """
+        with self._lock:
+            self._flush(embeddings)
+            other = QuadCache(0, self.refresh_every, self.tol)
+            other.q, other.valid, other._updates = self.q.copy(), self.valid.copy(), self._updates
+            return other
+
+    def nbytes(self):
+        return self.q.nbytes + self.valid.nbytes
+
+    def _invalidate(self):
+        self.valid[:] = False
+        self._pending, self._pending_rank, self._updates = [], 0, 0
+
+    def _flush(self, embeddings, chunk_size=8192):
+        """
+        Fold the pending updates into the valid entries in one pass.
+        """
+        if not self._pending:
+            return
+        V = np.hstack([V for V, _ in self._pending])
+        M = np.zeros((V.shape[1], V.shape[1]))
+        offset = 0
+        for _, block in self._pending:
+            r = len(block)
+            M[offset:offset + r, offset:offset + r] = block
+            offset += r
+        valid = np.flatnonzero(self.valid[:len(embeddings)])
+        for start in range(0, len(valid), chunk_size):
+            idx = valid[start:start + chunk_size]
+            W = embeddings[idx] @ V
+            self.q[idx] -= np.einsum("mi,mi->m", W @ M, W)
+        self._pending, self._pending_rank = [], 0
@@ -0,0 +1,99 @@
+import numpy as np
+
+
+def top_k(scores, k):
+    """
+    Return the positions of the k largest scores, best first.
+
+    Uses np.argpartition so only the k winners are sorted: O(n + k log k) instead of
+    sorting all n scores.
+    """
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(n)
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def section_bests(scores, section_codes, n_sections):
+    """
+    Return the position of the best-scoring entry of every section present, best first.
+
+    The per-section maxima are found with a single np.maximum.at reduction.
+    """
+    best = np.full(n_sections, -np.inf)
+    np.maximum.at(best, section_codes, scores)
+    winners = np.flatnonzero(scores == best[section_codes])
+    # Keep one winner per section if several entries tie for the maximum.
+    _, first = np.unique(section_codes[winners], return_index=True)
+    winners = winners[first]
+    return winners[np.argsort(-scores[winners], kind="stable")]
+
+
+def select_by_section(scores, section_codes, n_sections, k):
+    """
+    Pick k positions, favouring one entry per section.
+
+    First takes the best entry of each section (in score order, at most k of them); if
+    fewer than k sections are available the selection is filled with the remaining
+    top-scoring entries. This is the same selection as walking the fully sorted score list
+    twice, but costs O(n) plus the sort of the few selected entries.
+    """
+    selected = section_bests(scores, section_codes, n_sections)[:k]
+    if len(selected) < k:
+        # Exclude the section winners and take the best of the rest.
+        masked = scores.copy()
+        masked[selected] = -np.inf
+        fill = top_k(masked, k - len(selected))
+        selected = np.concatenate([selected, fill])
+    return selected
+
+
+def select_mmr(scores, embeddings, k, mmr_lambda=0.7, pool_size=None):
+    """
+    Pick k positions with maximal marginal relevance (MMR).
+
+    Greedily selects the entry maximizing
+
+        mmr_lambda * score - (1 - mmr_lambda) * max_{s in selected} cos(x, x_s),
+
+    trading relevance against redundancy with what has already been picked. Only the
+    `pool_size` best-scoring entries (default 10 * k) are considered, found with a
+    partial top-k, so the cost is O(n + pool_size * k * d).
+
+    Parameters
+    ----------
+    scores : np.ndarray
+        Relevance scores of the candidates.
+    embeddings : np.ndarray
+        (n x d) embeddings of the candidates, aligned with `scores`.
+    k : int
+        Number of entries to select.
+    mmr_lambda : float, optional
+        Relevance/diversity trade-off; 1.0 is pure relevance (default is 0.7).
+    pool_size : int, optional
+        Number of top-scoring candidates MMR chooses from (default is 10 * k).
+    """
+    pool = top_k(scores, pool_size or 10 * k)
+    k = min(k, len(pool))
+    if k == 0:
+        return pool
+
+    X = embeddings[pool]
+    X = X / np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-12)
+    relevance = mmr_lambda * scores[pool]
+    max_sim = np.full(len(pool), -np.inf)
+    chosen = np.zeros(len(pool), dtype=bool)
+
+    picks = [0]  # the pool is sorted, so the most relevant entry goes first
+    for _ in range(1, k):
+        chosen[picks[-1]] = True
+        max_sim = np.maximum(max_sim, X @ X[picks[-1]])
+        mmr = relevance - (1 - mmr_lambda) * max_sim
+        mmr[chosen] = -np.inf
+        picks.append(int(np.argmax(mmr)))
+    return pool[picks]
@@ -0,0 +1,159 @@
+import hashlib
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from backend.podcast.ml.inference.checkpoint import MANIFEST
+
+
+class SessionManager:
+    """
+    One bandit model per user, all sharing a single ArticleCorpus.
+
+    Sessions are created with HybridLinUCBModel.fork() from a private copy of the
+    template model, so a new user starts from the template's learned state (e.g. the
+    seeded population prior) and costs only a returned-articles mask until their first
+    feedback, when the model copies the state it modifies. The article list and the
+    embedding matrix are never copied.
+
+    At most `max_sessions` sessions are kept in memory. The least recently used ones
+    beyond that, and every session idle for longer than `ttl` seconds, are evicted:
+    their state is written as a checkpoint under `storage_dir` and transparently
+    reloaded on the user's next request. Checkpoints are written outside the session
+    lock; until an evicted session's checkpoint is complete, a request for that user
+    gets the evicted model back rather than an older checkpoint or a new fork.
+    """
+
+    def __init__(self, template, storage_dir, max_sessions=1000, ttl=3600.0):
+        """
+        Parameters
+        ----------
+        template : HybridLinUCBModel
+            The model new sessions start from. Its state is copied once, so it can keep
+            being updated independently.
+        storage_dir : str
+            Directory of the evicted sessions' checkpoints.
+        max_sessions : int, optional
+            Maximum number of sessions kept in memory (default is 1000).
+        ttl : float, optional
+            Seconds of inactivity after which a session is evicted (default is 3600).
+        """
+        self.template = template.fork()
+        self.template._own_state()
+        self.storage_dir = storage_dir
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()  # user id -> (model, last access), least recent first
+        self._saving = {}  # user id -> (evicted model, number of its pending saves)
+        # Also taken by the sessions when they catch the shared template up with the corpus.
+        self._lock = threading.RLock()
+        self.template._template_lock = self._lock
+        # Serializes checkpoint writes, so that two saves of one user never overlap.
+        self._save_lock = threading.Lock()
+        os.makedirs(storage_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, user_id):
+        return user_id in self._sessions
+
+    def get(self, user_id):
+        """
+        Return the model of `user_id`, reloading it from disk or creating it if needed.
+        """
+        with self._lock:
+            entry = self._sessions.pop(user_id, None)
+            if entry is not None:
+                model = entry[0]
+            elif user_id in self._saving:
+                # Evicted but not yet on disk: the checkpoint would be missing or stale.
+                model = self._saving[user_id][0]
+            else:
+                model = self.template.fork()
+                path = self._path(user_id)
+                if os.path.exists(os.path.join(path, MANIFEST)):
+                    model.load(path)
+            self._sessions[user_id] = (model, time.monotonic())
+            evicted = self._expired()
+        for evicted_id, evicted_model in evicted:
+            self._save(evicted_id, evicted_model)
+        return model
+
+    def evict(self, user_id):
+        """
+        Write the session of `user_id` to disk and drop it from memory.
+        """
+        with self._lock:
+            entry = self._sessions.pop(user_id, None)
+            if entry is not None:
+                self._start_save(user_id, entry[0])
+        if entry is not None:
+            self._save(user_id, entry[0])
+
+    def flush(self):
+        """
+        Write every in-memory session to disk (e.g. at shutdown); they stay in memory.
+        """
+        with self._lock:
+            sessions = [(user_id, model) for user_id, (model, _) in self._sessions.items()]
+        for user_id, model in sessions:
+            with self._save_lock:
+                model.save(self._path(user_id))
+
+    def delete(self, user_id):
+        """
+        Forget a user entirely, in memory and on disk.
+        """
+        with self._lock:
+            self._sessions.pop(user_id, None)
+            # A save still pending for the user is skipped (see _save).
+            self._saving.pop(user_id, None)
+        with self._save_lock:
+            shutil.rmtree(self._path(user_id), ignore_errors=True)
+
+    def _expired(self):
+        """
+        Pop and return the sessions to evict: idle past the TTL or beyond max_sessions.
+        """
+        evicted = []
+        deadline = time.monotonic() - self.ttl
+        while self._sessions:
+            user_id, (model, last_access) = next(iter(self._sessions.items()))
+            if last_access >= deadline and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[user_id]
+            self._start_save(user_id, model)
+            evicted.append((user_id, model))
+        return evicted
+
+    def _start_save(self, user_id, model):
+        """
+        Record a save of the evicted `model` as pending. Called with the lock held.
+        """
+        _, pending = self._saving.get(user_id, (model, 0))
+        self._saving[user_id] = (model, pending + 1)
+
+    def _save(self, user_id, model):
+        """
+        Write the evicted `model` to disk, then drop its pending save.
+        """
+        with self._save_lock:
+            with self._lock:
+                entry = self._saving.get(user_id)
+                current = entry is not None and entry[0] is model
+            # Skipped if the user was deleted meanwhile.
+            if current:
+                model.save(self._path(user_id))
+        with self._lock:
+            entry = self._saving.get(user_id)
+            if entry is not None and entry[0] is model:
+                if entry[1] > 1:
+                    self._saving[user_id] = (model, entry[1] - 1)
+                else:
+                    del self._saving[user_id]
+
+    def _path(self, user_id):
+        # Hash the user id so that any string maps to a safe directory name.
+        return os.path.join(self.storage_dir, hashlib.sha1(str(user_id).encode()).hexdigest())
@@ -0,0 +1,238 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from multiprocessing import shared_memory
+import numpy as np
+from scipy.linalg import solve_triangular
+from backend.podcast.ml.inference.selection import top_k, section_bests
+
+
+class ShardedScorer:
+    """
+    Multi-process LinUCB scoring over the arms of an ArticleCorpus.
+
+    The arms are split into contiguous slot ranges, one per worker process. The corpus
+    buffers the workers read (embeddings, squared norms, section codes) live in shared
+    memory, refreshed only when the corpus changes; per call, the parent writes the
+    eligibility mask, beta_hat and q_a = x_a^T A0^{-1} x_a of the eligible arms to
+    shared memory and sends each worker a few bytes. q comes from the model's q cache
+    (QuadCache). The entries the cache is missing (all of them after it is refreshed,
+    e.g. following a large feedback_many or a checkpoint load) cost O(d^2) per arm, so
+    they are computed by the workers too, each for its own slot range, from the A0
+    factor (or A0^{-1}) copied to shared memory for that pass, and stored back in the
+    cache. Every worker then scores its eligible arms with the closed form of arms at
+    the prior,
+
+        p_a = x_a^T beta_hat + alpha * sqrt(q_a + x_a^T x_a),
+
+    and returns only its local top-k plus the best arm of each section. Arms that have
+    received feedback are few and are scored exactly by the parent meanwhile.
+
+    The union of the shard results contains the global top-k and the global best of
+    every section, so selecting from it gives the same articles as scoring every arm in
+    one process, for all diversity modes (k is 10 * num_articles for "mmr", the size of
+    its pool).
+
+    One scorer can serve every model over the same corpus (e.g. all sessions, and the
+    snapshots of ConcurrentBandit, whose corpus copies share its version); calls
+    are serialized by a lock, and each call uses all workers. Models whose scores are
+    not LinUCB scores (e.g. ThompsonSamplingModel) are scored in-process.
+    """
+
+    def __init__(self, corpus, n_workers=None, min_arms=20000, start_method=None):
+        """
+        Parameters
+        ----------
+        corpus : ArticleCorpus
+            The corpus whose arms are scored.
+        n_workers : int, optional
+            Number of worker processes (default is the number of CPUs).
+        min_arms : int, optional
+            Calls with fewer candidate arms are scored in-process, where the dispatch
+            overhead would outweigh the parallelism (default is 20000).
+        start_method : str, optional
+            multiprocessing start method of the workers (default is the platform's).
+        """
+        self.corpus = corpus
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.min_arms = min_arms
+        self._lock = threading.Lock()
+        self._segments = {}
+        self._version = None
+        self._capacity = 0
+        self._n_slots = 0
+        # beta_hat, rewritten on every call, and the A0 factor, rewritten when q entries
+        # are missing from the cache.
+        d = corpus.d
+        self._params = self._allocate("params", (d,), np.float64)
+        self._factor = self._allocate("factor", (d, d), np.float64)
+        context = multiprocessing.get_context(start_method)
+        self._pipes, self._workers = [], []
+        for _ in range(self.n_workers):
+            parent, child = context.Pipe()
+            worker = context.Process(target=_serve, args=(child, d), daemon=True)
+            worker.start()
+            child.close()
+            self._pipes.append(parent)
+            self._workers.append(worker)
+        atexit.register(self.close)
+
+    def score(self, model, candidates, beta_hat, k):
+        """
+        Score `candidates` (eligible arm indices) for `model` and return a reduced
+        (candidates, scores) pair containing the global top-k and every section's best.
+        """
+        if not _is_linucb(model) or len(candidates) < self.min_arms:
+            return candidates, model._score_arms(candidates, beta_hat)
+
+        touched = model.arms.touched()
+        with self._lock:
+            self._sync(model.corpus)
+            q = model._quad_cache.lookup(model.A0_factor, model.embeddings, candidates, quad=self._quad)
+            eligible = self._segments["eligible"][1]
+            eligible[:] = False
+            eligible[candidates] = True
+            touched = touched[eligible[touched]]
+            eligible[touched] = False
+            self._segments["q"][1][candidates] = q
+            self._params[:] = beta_hat.ravel()
+
+            for pipe, (lo, hi) in zip(self._pipes, self._shards(model.corpus.n_slots)):
+                pipe.send(("score", lo, hi, k, len(model.corpus.sections), float(model.alpha)))
+            # The few arms with feedback are scored exactly here while the workers run.
+            touched_scores = model._score_arms(touched, beta_hat)
+            results = [pipe.recv() for pipe in self._pipes]
+        indices = np.concatenate([touched] + [indices for indices, _ in results])
+        scores = np.concatenate([touched_scores] + [scores for _, scores in results])
+        return indices, scores
+
+    def _quad(self, factor, slots):
+        """
+        Compute q for `slots` in the workers, each over its own slot range. Called by
+        QuadCache.lookup with the scorer's lock held.
+        """
+        if len(slots) < self.min_arms:
+            return factor.quad(self._segments["embeddings"][1][slots])
+        # With a Cholesky factor L, q_a = |L^{-1} x_a|^2; otherwise q_a = x_a^T A0^{-1} x_a.
+        L = getattr(factor, "L", None)
+        self._factor[:] = factor.inv if L is None else L
+        # The eligibility mask doubles as the mask of the slots to compute.
+        mask = self._segments["eligible"][1]
+        mask[:] = False
+        mask[slots] = True
+        for pipe, (lo, hi) in zip(self._pipes, self._shards(self._n_slots)):
+            pipe.send(("quad", lo, hi, L is not None))
+        for pipe in self._pipes:
+            pipe.recv()
+        return self._segments["q"][1][slots]
+
+    def _shards(self, n_slots):
+        """
+        The (lo, hi) slot range of every worker.
+        """
+        bounds = np.linspace(0, n_slots, self.n_workers + 1).astype(int)
+        return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+    def close(self):
+        """
+        Stop the workers and free the shared memory.
+        """
+        with self._lock:
+            for pipe in self._pipes:
+                try:
+                    pipe.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+            for worker in self._workers:
+                worker.join(timeout=5)
+            self._pipes, self._workers = [], []
+            for shm, _ in self._segments.values():
+                shm.close()
+                shm.unlink()
+            self._segments = {}
+
+    def _allocate(self, name, shape, dtype):
+        """
+        Create (or replace) the shared array `name`.
+        """
+        old = self._segments.pop(name, None)
+        if old is not None:
+            old[0].close()
+            old[0].unlink()
+        size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        self._segments[name] = (shm, array)
+        return array
+
+    def _sync(self, corpus):
+        """
+        Copy the buffers of `corpus` (the scorer's corpus or a snapshot of it) to shared
+        memory if its version differs from the last call's.
+        """
+        if corpus.version == self._version:
+            return
+        if corpus.capacity != self._capacity:
+            capacity = corpus.capacity
+            self._allocate("embeddings", (capacity, corpus.d), np.float64)
+            self._allocate("norms", (capacity,), np.float64)
+            self._allocate("section_codes", (capacity,), np.intp)
+            self._allocate("eligible", (capacity,), np.bool_)
+            self._allocate("q", (capacity,), np.float64)
+            self._capacity = capacity
+            layout = {name: (shm.name, array.shape, array.dtype.str) for name, (shm, array) in self._segments.items()}
+            for pipe in self._pipes:
+                pipe.send(("attach", layout))
+        n = self._n_slots = corpus.n_slots
+        self._segments["embeddings"][1][:n] = corpus.embeddings
+        self._segments["norms"][1][:n] = corpus.embedding_norms
+        self._segments["section_codes"][1][:n] = corpus.section_codes
+        self._version = corpus.version
+
+
+def _is_linucb(model):
+    from backend.podcast.ml.inference.rl_bandit import HybridLinUCBModel, TiedHybridLinUCBModel
+    return type(model)._score_arms in (HybridLinUCBModel._score_arms, TiedHybridLinUCBModel._score_arms)
+
+
+def _serve(pipe, d):
+    """
+    Worker loop: attach to the shared arrays, then score slot ranges on request.
+    """
+    segments, arrays = [], {}
+    while True:
+        message = pipe.recv()
+        if message is None:
+            break
+        if message[0] == "attach":
+            for shm in segments:
+                shm.close()
+            segments, arrays = [], {}
+            for name, (shm_name, shape, dtype) in message[1].items():
+                shm = shared_memory.SharedMemory(name=shm_name)
+                segments.append(shm)
+                arrays[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            continue
+        if message[0] == "quad":
+            _, lo, hi, triangular = message
+            slots = lo + np.flatnonzero(arrays["eligible"][lo:hi])
+            X = arrays["embeddings"][slots]
+            if triangular:
+                W = solve_triangular(arrays["factor"], X.T, lower=True, check_finite=False)
+                arrays["q"][slots] = np.einsum("im,im->m", W, W)
+            else:
+                arrays["q"][slots] = np.einsum("mi,mi->m", X @ arrays["factor"], X)
+            pipe.send(None)
+            continue
+
+        _, lo, hi, k, n_sections, alpha = message
+        local = np.flatnonzero(arrays["eligible"][lo:hi])
+        indices = lo + local
+        # One matrix-vector product over the contiguous shard, without a gathered copy.
+        m = (arrays["embeddings"][lo:hi] @ arrays["params"])[local]
+        scores = m + alpha * np.sqrt(np.maximum(arrays["q"][indices] + arrays["norms"][indices], 0))
+        keep = np.union1d(top_k(scores, k), section_bests(scores, arrays["section_codes"][indices], n_sections))
+        pipe.send((indices[keep], scores[keep]))
+    for shm in segments:
+        shm.close()
@@ -0,0 +1,60 @@
+import numpy as np
+
+
+class SlotAllocator:
+    """
+    Hands out stable integer slots for the arms of a bandit model.
+
+    A slot is the row of an arm in every slot-indexed array of the model (embeddings,
+    timestamps, per-arm state), and doubles as the article's _id. Released slots go on a
+    free list and are reused by later allocations, so the arrays only grow when there
+    are more live arms than ever before. When they do grow, the capacity doubles, which
+    keeps appends amortized O(1) per arm.
+    """
+
+    def __init__(self, initial_capacity=16):
+        """
+        Parameters
+        ----------
+        initial_capacity : int, optional
+            Capacity reserved up front (default is 16).
+        """
+        self.capacity = initial_capacity
+        self.high_water = 0  # slots [0, high_water) have been handed out at least once
+        self.free = []
+        self.live = np.zeros(initial_capacity, dtype=bool)
+
+    def __len__(self):
+        return self.high_water - len(self.free)
+
+    def allocate(self, n):
+        """
+        Return `n` slots, reusing released slots first. Grows `capacity` if needed.
+        """
+        reused = [self.free.pop() for _ in range(min(n, len(self.free)))]
+        fresh = range(self.high_water, self.high_water + n - len(reused))
+        self.high_water += len(fresh)
+        if self.high_water > self.capacity:
+            self.capacity = max(2 * self.capacity, self.high_water)
+            live = np.zeros(self.capacity, dtype=bool)
+            live[:len(self.live)] = self.live
+            self.live = live
+        slots = np.array(reused + list(fresh), dtype=np.intp)
+        self.live[slots] = True
+        return slots
+
+    def release(self, slots):
+        """
+        Return `slots` to the free list.
+        """
+        slots = np.asarray(slots, dtype=np.intp)
+        if not np.all(self.live[slots]) or len(np.unique(slots)) != len(slots):
+            raise ValueError("Cannot release a slot that is not allocated.")
+        self.live[slots] = False
+        self.free.extend(slots.tolist())
+
+    def live_slots(self):
+        """
+        The allocated slots, in increasing order.
+        """
+        return np.flatnonzero(self.live[:self.high_water])
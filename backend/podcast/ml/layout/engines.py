@@ -0,0 +1,341 @@
+import numpy as np
+import yaml
+from scipy import sparse
+from scipy.optimize import curve_fit
+from backend.podcast.ml.inference.ann_index import IVFIndex
+
+
+class PCALayout:
+    """
+    The top three principal components of the embeddings: a linear projection computed
+    in well under a second even for 50k articles, but it only keeps the global structure
+    (clusters overlap).
+    """
+
+    name = "pca"
+    placement_steps = 0  # new points go to the weighted mean of their neighbours (placement.py)
+
+    def __init__(self, radius=25.0, max_train=20000, random_state=0):
+        """
+        Parameters
+        ----------
+        radius : float, optional
+            The layout is scaled to this RMS distance from its centre, about the extent
+            of a t-SNE layout of a few thousand articles (default is 25.0).
+        max_train : int, optional
+            The components are fitted on a random sample of at most this many rows
+            (default is 20000).
+        random_state : int, optional
+            Seed of the sample (default is 0).
+        """
+        self.radius = radius
+        self.max_train = max_train
+        self.random_state = random_state
+
+    def config(self):
+        return {"engine": self.name, "radius": self.radius, "max_train": self.max_train,
+                "random_state": self.random_state}
+
+    def fit_transform(self, embeddings):
+        Y = pca(embeddings, 3, self.max_train, self.random_state)
+        return rescale(Y, self.radius)
+
+
+class TSNELayout:
+    """
+    Barnes-Hut t-SNE (sklearn) initialized with PCA, on all cores. The embeddings are
+    first reduced to `pca_dims` dimensions, which speeds up its neighbour search and
+    keeps almost all of the neighbourhood structure of 384-dim sentence embeddings.
+    """
+
+    name = "tsne"
+    placement_steps = 30
+
+    def __init__(self, perplexity=30, learning_rate=200, max_iter=1000, angle=0.5, pca_dims=50,
+                 n_jobs=-1, random_state=0):
+        """
+        Parameters
+        ----------
+        perplexity, learning_rate, max_iter, angle : optional
+            Passed to sklearn's TSNE (defaults 30, 200, 1000 and 0.5).
+        pca_dims : int or None, optional
+            Dimensions kept by the PCA pre-reduction; None fits on the raw embeddings
+            (default is 50).
+        n_jobs : int, optional
+            Threads of the neighbour search and gradient; -1 uses all cores (default is -1).
+        random_state : int, optional
+            Seed, which makes the layout reproducible (default is 0).
+        """
+        self.perplexity = perplexity
+        self.learning_rate = learning_rate
+        self.max_iter = max_iter
+        self.angle = angle
+        self.pca_dims = pca_dims
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def config(self):
+        # n_jobs does not change the layout, so it is not part of the cache key.
+        return {"engine": self.name, "perplexity": self.perplexity, "learning_rate": self.learning_rate,
+                "max_iter": self.max_iter, "angle": self.angle, "pca_dims": self.pca_dims,
+                "random_state": self.random_state}
+
+    def fit_transform(self, embeddings):
+        from sklearn.manifold import TSNE
+        X = np.asarray(embeddings, dtype=float)
+        if self.pca_dims and X.shape[1] > self.pca_dims:
+            X = pca(X, self.pca_dims, random_state=self.random_state)
+        tsne = TSNE(n_components=3, perplexity=min(self.perplexity, (len(X) - 1) / 3), learning_rate=self.learning_rate,
+                    max_iter=self.max_iter, angle=self.angle, init="pca", method="barnes_hut",
+                    n_jobs=self.n_jobs, random_state=self.random_state)
+        return tsne.fit_transform(X)
+
+
+class NeighborGraphLayout:
+    """
+    UMAP-style layout: a fuzzy k-nearest-neighbour graph of the embeddings, laid out by
+    stochastic gradient descent with negative sampling, starting from the PCA layout.
+
+    As in UMAP, the membership strength of edge (i, j) is exp(-(d_ij - rho_i) / sigma_i),
+    where rho_i is the distance to the nearest neighbour and sigma_i is calibrated so the
+    strengths of each row sum to log2(k), and the graph is symmetrized by fuzzy union.
+    Every epoch, each edge is sampled in proportion to its strength: its ends attract
+    with the kernel 1 / (1 + a d^2b), and each sampled head is pushed away from
+    `negative_samples` random points. The updates of an epoch are applied together
+    (vectorized) rather than one edge at a time.
+
+    Cost is O(n k) per epoch on top of the neighbour search, which is exact below
+    `exact_below` points and otherwise batched over the cells of an IVFIndex.
+    """
+
+    name = "umap"
+    placement_steps = 30
+
+    def __init__(self, n_neighbors=15, min_dist=0.1, n_epochs=None, negative_samples=5, radius=25.0,
+                 exact_below=10000, random_state=0):
+        """
+        Parameters
+        ----------
+        n_neighbors : int, optional
+            Neighbours per point in the graph (default is 15).
+        min_dist : float, optional
+            Minimum distance between points in the layout, as in UMAP (default is 0.1).
+        n_epochs : int, optional
+            Optimization epochs (default is 500, or 200 above 10000 points, as in UMAP).
+        negative_samples : int, optional
+            Repulsive samples per attractive edge update (default is 5).
+        radius : float, optional
+            RMS distance from the centre the layout is scaled to (default is 25.0).
+        exact_below : int, optional
+            Below this many points the neighbour search is exact (default is 10000).
+        random_state : int, optional
+            Seed of the initialization and sampling (default is 0).
+        """
+        self.n_neighbors = n_neighbors
+        self.min_dist = min_dist
+        self.n_epochs = n_epochs
+        self.negative_samples = negative_samples
+        self.radius = radius
+        self.exact_below = exact_below
+        self.random_state = random_state
+
+    def config(self):
+        return {"engine": self.name, "n_neighbors": self.n_neighbors, "min_dist": self.min_dist,
+                "n_epochs": self.n_epochs, "negative_samples": self.negative_samples, "radius": self.radius,
+                "exact_below": self.exact_below, "random_state": self.random_state}
+
+    def fit_transform(self, embeddings):
+        X = np.asarray(embeddings, dtype=float)
+        n = len(X)
+        rng = np.random.default_rng(self.random_state)
+        k = min(self.n_neighbors, n - 1)
+        neighbors, distances = knn(X, k, exact_below=self.exact_below, seed=self.random_state)
+        graph = _fuzzy_graph(neighbors, distances).tocoo()
+        heads, tails, weights = graph.row, graph.col, graph.data
+        a, b = _curve_parameters(self.min_dist)
+
+        # Start from PCA scaled to a box of about 10, as UMAP's spectral initialization is.
+        Y = rescale(pca(X, 3, random_state=self.random_state), 5.0)
+        n_epochs = self.n_epochs or (500 if n <= 10000 else 200)
+        epochs_per_sample = weights.max() / weights
+        next_sample = epochs_per_sample.copy()
+        for epoch in range(n_epochs):
+            learning_rate = 1.0 - epoch / n_epochs
+            active = np.flatnonzero(next_sample <= epoch + 1)
+            next_sample[active] += epochs_per_sample[active]
+            i, j = heads[active], tails[active]
+
+            diff = Y[i] - Y[j]
+            d2 = np.einsum("mc,mc->m", diff, diff)
+            coef = np.where(d2 > 0, -2 * a * b * d2 ** (b - 1) / (1 + a * d2 ** b), 0.0)
+            grad = np.clip(coef[:, None] * diff, -4, 4) * learning_rate
+            step = _scatter(i, grad, n) - _scatter(j, grad, n)
+
+            i_neg = np.repeat(i, self.negative_samples)
+            diff = Y[i_neg] - Y[rng.integers(n, size=len(i_neg))]
+            d2 = np.einsum("mc,mc->m", diff, diff)
+            coef = np.where(d2 > 0, 2 * b / ((0.001 + d2) * (1 + a * d2 ** b)), 0.0)
+            step += _scatter(i_neg, np.clip(coef[:, None] * diff, -4, 4) * learning_rate, n)
+            Y += step
+        return rescale(Y, self.radius)
+
+
+# Layout engines by config name. Every engine is built from keyword parameters and has
+# fit_transform(embeddings) -> (n x 3), config() (the parameters that determine the
+# layout, used as its cache key) and placement_steps (refinement steps of placement.py
+# for articles added to one of its layouts).
+LAYOUT_ENGINES = {
+    "pca": PCALayout,
+    "tsne": TSNELayout,
+    "umap": NeighborGraphLayout,
+}
+
+DEFAULT_LAYOUT_CONFIG = {"engine": "tsne", "params": {}, "staged": False}
+
+
+def register_layout_engine(name, engine):
+    """
+    Make `engine` (a class with the interface above) available under `name`.
+    """
+    LAYOUT_ENGINES[name] = engine
+
+
+def create_layout_engine(name, **params):
+    """
+    Build the layout engine registered as `name`.
+    """
+    if name not in LAYOUT_ENGINES:
+        raise ValueError(f"Unknown layout engine '{name}', expected one of {sorted(LAYOUT_ENGINES)}.")
+    return LAYOUT_ENGINES[name](**params)
+
+
+def load_layout_config(path="backend/config/settings.yaml"):
+    """
+    Read the `graph` section of the settings file: the layout engine name, its
+    parameters and whether layouts are staged (a PCA layout first, the engine's layout
+    pushed when ready). Missing keys fall back to DEFAULT_LAYOUT_CONFIG.
+    """
+    try:
+        with open(path) as f:
+            settings = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        settings = {}
+    graph = settings.get("graph") or {}
+    return {
+        "engine": graph.get("layout", DEFAULT_LAYOUT_CONFIG["engine"]),
+        "params": dict(DEFAULT_LAYOUT_CONFIG["params"], **(graph.get("params") or {})),
+        "staged": bool(graph.get("staged", DEFAULT_LAYOUT_CONFIG["staged"])),
+    }
+
+
+def pca(X, dims, max_train=20000, random_state=0):
+    """
+    Project the rows of X onto their top `dims` principal components, fitted on a
+    random sample of at most `max_train` rows.
+    """
+    X = np.asarray(X, dtype=float)
+    rng = np.random.default_rng(random_state)
+    sample = X[rng.choice(len(X), size=min(len(X), max_train), replace=False)]
+    mean = sample.mean(axis=0)
+    _, _, Vt = np.linalg.svd(sample - mean, full_matrices=False)
+    Y = (X - mean) @ Vt[:dims].T
+    if Y.shape[1] < dims:  # fewer samples or features than dims
+        Y = np.hstack([Y, np.zeros((len(Y), dims - Y.shape[1]))])
+    return Y
+
+
+def rescale(Y, radius):
+    """
+    Centre the layout Y and scale it to RMS distance `radius` from the centre.
+    """
+    Y = Y - Y.mean(axis=0)
+    spread = np.sqrt(np.mean(np.einsum("ij,ij->i", Y, Y)))
+    return Y * (radius / spread) if spread > 0 else Y
+
+
+def knn(X, k, exact_below=10000, seed=0, chunk_size=1024):
+    """
+    The `k` nearest neighbours of every row of X by cosine distance (the row itself
+    excluded) and their distances, nearest first.
+
+    Up to `exact_below` rows the search is exact (blocked brute force). Above, the rows
+    are clustered with an IVFIndex, and the rows of each cell are searched together
+    among the members of the cells whose centroids are most similar to it.
+    """
+    E = X / np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-12)
+    n = len(E)
+    neighbors = np.empty((n, k), dtype=np.intp)
+    distances = np.empty((n, k))
+
+    def search(rows, candidates):
+        similarity = E[rows] @ E[candidates].T
+        similarity[candidates[None, :] == rows[:, None]] = -np.inf
+        kk = min(k, len(candidates) - 1)
+        top = np.argpartition(-similarity, kk - 1, axis=1)[:, :kk]
+        top_sim = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_sim, axis=1)
+        found, sims = candidates[np.take_along_axis(top, order, axis=1)], np.take_along_axis(top_sim, order, axis=1)
+        if kk < k:  # too few candidates: pad with the last neighbour found
+            found = np.hstack([found, np.repeat(found[:, -1:], k - kk, axis=1)])
+            sims = np.hstack([sims, np.repeat(sims[:, -1:], k - kk, axis=1)])
+        neighbors[rows], distances[rows] = found, 1.0 - sims
+
+    if n <= exact_below:
+        everything = np.arange(n)
+        for start in range(0, n, chunk_size):
+            search(everything[start:start + chunk_size], everything)
+        return neighbors, distances
+
+    index = IVFIndex(E, n_probe=8, seed=seed)
+    cell_similarity = index.centroids @ index.centroids.T
+    members = [index.ids[index.offsets[c]:index.offsets[c + 1]] for c in range(index.n_lists)]
+    for c in range(index.n_lists):
+        if not len(members[c]):
+            continue
+        probe = np.argpartition(-cell_similarity[c], index.n_probe - 1)[:index.n_probe]
+        candidates = np.concatenate([members[c]] + [members[p] for p in probe.tolist() if p != c])
+        for start in range(0, len(members[c]), chunk_size):
+            search(members[c][start:start + chunk_size], candidates)
+    return neighbors, distances
+
+
+def _fuzzy_graph(neighbors, distances, n_iter=32):
+    """
+    UMAP's fuzzy union of the k-nearest-neighbour memberships, as a sparse matrix.
+    """
+    n, k = neighbors.shape
+    rho = distances[:, :1]
+    excess = np.maximum(distances - rho, 0)
+    target = np.log2(k)
+    # Per-row binary search for sigma with sum_j exp(-excess_ij / sigma) = log2(k).
+    low, high = np.zeros((n, 1)), np.full((n, 1), np.inf)
+    sigma = np.ones((n, 1))
+    for _ in range(n_iter):
+        total = np.exp(-excess / sigma).sum(axis=1, keepdims=True)
+        too_wide = total > target
+        high = np.where(too_wide, sigma, high)
+        low = np.where(too_wide, low, sigma)
+        sigma = np.where(np.isinf(high), sigma * 2, (low + high) / 2)
+    strength = np.exp(-excess / np.maximum(sigma, 1e-12))
+    W = sparse.csr_matrix((strength.ravel(), (np.repeat(np.arange(n), k), neighbors.ravel())), shape=(n, n))
+    W.setdiag(0)
+    W.eliminate_zeros()
+    return W + W.T - W.multiply(W.T)
+
+
+def _curve_parameters(min_dist, spread=1.0):
+    """
+    UMAP's (a, b) of the layout kernel 1 / (1 + a d^2b), fitted to a curve that is 1 up
+    to `min_dist` and decays exponentially after.
+    """
+    d = np.linspace(0, spread * 3, 300)
+    target = np.where(d < min_dist, 1.0, np.exp(-(d - min_dist) / spread))
+    (a, b), _ = curve_fit(lambda d, a, b: 1.0 / (1.0 + a * d ** (2 * b)), d, target)
+    return a, b
+
+
+def _scatter(rows, values, n):
+    """
+    Sum the rows of `values` into an (n x 3) array at `rows`.
+    """
+    return np.stack([np.bincount(rows, weights=values[:, c], minlength=n) for c in range(values.shape[1])], axis=1)
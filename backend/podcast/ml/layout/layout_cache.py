@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+
+def layout_key(article_ids, params):
+    """
+    Content address of a layout: a hash of the set of article ids (order does not
+    matter) and of the layout parameters.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(sorted(map(str, article_ids))).encode())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:32]
+
+
+class LayoutCache:
+    """
+    Directory of computed 3D graph layouts, one .npz file per layout_key.
+
+    Each file holds the article ids with their positions, so a layout computed for the
+    same articles in any order is returned aligned with the order asked for. Files are
+    written to a temporary name and renamed, so a reader never sees a partial layout,
+    and only the `max_entries` most recently written layouts are kept.
+    """
+
+    def __init__(self, directory, max_entries=20):
+        """
+        Parameters
+        ----------
+        directory : str
+            Where the layouts are stored (created if needed).
+        max_entries : int, optional
+            Number of layouts kept; older ones are deleted (default is 20).
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, article_ids, params):
+        """
+        Return the (n x 3) layout of `article_ids` computed with `params`, in the order
+        of `article_ids`, or None if it is not in the cache.
+        """
+        path = self._path(layout_key(article_ids, params))
+        try:
+            with np.load(path) as stored:
+                ids, positions = stored["ids"], stored["positions"]
+        except (OSError, KeyError, ValueError):
+            return None
+        row = {article_id: i for i, article_id in enumerate(ids.tolist())}
+        return positions[[row[str(article_id)] for article_id in article_ids]]
+
+    def put(self, article_ids, params, positions):
+        """
+        Store the layout `positions` (row i for article_ids[i]).
+        """
+        key = layout_key(article_ids, params)
+        tmp = self._path(key + ".tmp")
+        np.savez(tmp, ids=np.array([str(article_id) for article_id in article_ids]),
+                 positions=np.asarray(positions, dtype=float))
+        os.replace(tmp, self._path(key))
+        self._prune()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def _prune(self):
+        layouts = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                   if name.endswith(".npz") and not name.endswith(".tmp.npz")]
+        layouts.sort(key=os.path.getmtime, reverse=True)
+        for path in layouts[self.max_entries:]:
+            os.remove(path)
@@ -0,0 +1,98 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def place_points(embeddings, positions, new_embeddings, n_neighbors=10, n_iter=30, n_local=50,
+                 step=None, chunk_size=1024):
+    """
+    Place new points into an existing 3D layout without refitting it.
+
+    Every new point starts at the affinity-weighted mean position of its `n_neighbors`
+    nearest existing points in embedding space (cosine similarity), and is then moved by
+    `n_iter` gradient steps of the t-SNE objective restricted to that point, with the
+    existing layout held fixed:
+
+        grad_i = 4 sum_j p_ij w_ij (y_i - y_j) - 4 sum_l q_il w_il (y_i - y_l),
+
+    where w = 1 / (1 + |y_i - y_j|^2), p_i are the affinities to the embedding-space
+    neighbours and q_i the normalized kernel over the `n_local` layout points currently
+    nearest to y_i. The attraction pulls a point towards its neighbours; the repulsion
+    spreads it out of the crowd instead of stacking it on their centroid. The new points
+    do not interact with each other, so this is O(m (n d + n_iter n_local log n)) for m
+    new and n existing points.
+
+    Parameters
+    ----------
+    embeddings : np.ndarray
+        (n x d) embeddings of the points already in the layout.
+    positions : np.ndarray
+        (n x 3) their layout positions.
+    new_embeddings : np.ndarray
+        (m x d) embeddings of the points to place.
+    n_neighbors : int, optional
+        Embedding-space neighbours each new point is attracted to (default is 10).
+    n_iter : int, optional
+        Refinement steps; 0 keeps the weighted-mean initialization (default is 30).
+    n_local : int, optional
+        Layout points each new point is repelled from (default is 50).
+    step : float, optional
+        Gradient step. By default the squared median distance between a layout point and
+        its nearest neighbour, which makes the step scale-free.
+    chunk_size : int, optional
+        New points per block of the similarity search (default is 1024).
+
+    Returns
+    -------
+    np.ndarray
+        (m x 3) positions of the new points.
+    """
+    embeddings = np.asarray(embeddings, dtype=float)
+    positions = np.asarray(positions, dtype=float)
+    new_embeddings = np.asarray(new_embeddings, dtype=float).reshape(-1, embeddings.shape[1])
+    if not len(new_embeddings):
+        return np.empty((0, positions.shape[1]))
+    k = min(n_neighbors, len(embeddings))
+    neighbors, affinities = _neighbors(embeddings, new_embeddings, k, chunk_size)
+    Y = np.einsum("mk,mkc->mc", affinities, positions[neighbors])
+
+    n_local = min(n_local, len(positions))
+    if n_iter == 0 or n_local < 2:
+        return Y
+    tree = cKDTree(positions)
+    if step is None:
+        spacing = tree.query(positions[:min(len(positions), 2000)], k=2)[0][:, 1]
+        step = float(np.median(spacing)) ** 2 or 1.0
+    attract_to = positions[neighbors]
+    for _ in range(n_iter):
+        _, local = tree.query(Y, k=n_local)
+        pull = Y[:, None, :] - attract_to
+        pull_w = 1.0 / (1.0 + np.einsum("mkc,mkc->mk", pull, pull))
+        push = Y[:, None, :] - positions[local]
+        push_w = 1.0 / (1.0 + np.einsum("mlc,mlc->ml", push, push))
+        q = push_w / push_w.sum(axis=1, keepdims=True)
+        grad = 4 * (np.einsum("mk,mkc->mc", affinities * pull_w, pull) - np.einsum("ml,mlc->mc", q * push_w, push))
+        Y -= step * grad
+    return Y
+
+
+def _neighbors(embeddings, queries, k, chunk_size):
+    """
+    The `k` nearest rows of `embeddings` to every query by cosine similarity, with
+    Gaussian affinities (rows summing to 1) of the matching cosine distances.
+    """
+    E = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    neighbors = np.empty((len(queries), k), dtype=np.intp)
+    distances = np.empty((len(queries), k))
+    for start in range(0, len(queries), chunk_size):
+        Q = queries[start:start + chunk_size]
+        Q = Q / np.maximum(np.linalg.norm(Q, axis=1, keepdims=True), 1e-12)
+        similarity = Q @ E.T
+        top = np.argpartition(-similarity, k - 1, axis=1)[:, :k] if k < E.shape[0] else \
+            np.broadcast_to(np.arange(k), (len(Q), k))
+        neighbors[start:start + len(Q)] = top
+        distances[start:start + len(Q)] = 1.0 - np.take_along_axis(similarity, top, axis=1)
+    # Bandwidth per query: the median distance to its neighbours, as a cheap stand-in for
+    # t-SNE's perplexity calibration.
+    scale = np.maximum(np.median(distances, axis=1, keepdims=True), 1e-12)
+    affinities = np.exp(-(distances - distances.min(axis=1, keepdims=True)) / scale)
+    return neighbors, affinities / affinities.sum(axis=1, keepdims=True)
@@ -0,0 +1,46 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class SpatialIndex:
+    """
+    KD-tree over the 3D layout of the interest graph (one point per node).
+
+    Finding the node under a click in the graph is a nearest-neighbour query, O(log n)
+    in the tree instead of a scan over every node, and the neighbourhood of a click is
+    a radius query, O(log n + number of hits). The positions are copied when the index
+    is built, so a new index must be built (O(n log n)) whenever the layout changes.
+    """
+
+    def __init__(self, positions):
+        """
+        Parameters
+        ----------
+        positions : array-like
+            (n x 3) node positions. Query results are row indices into it.
+        """
+        self.positions = np.array(positions, dtype=float).reshape(-1, 3)
+        self._tree = cKDTree(self.positions)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def nearest(self, point, k=1):
+        """
+        Return the indices of the `k` nodes nearest to `point` and their distances,
+        nearest first.
+        """
+        if not len(self):
+            raise ValueError("The spatial index is empty.")
+        k = min(k, len(self))
+        distances, indices = self._tree.query(np.asarray(point, dtype=float), k=k)
+        return np.atleast_1d(indices).astype(np.intp), np.atleast_1d(distances)
+
+    def within(self, point, radius):
+        """
+        Return the indices of the nodes within distance `radius` of `point`, nearest first.
+        """
+        point = np.asarray(point, dtype=float)
+        indices = np.array(self._tree.query_ball_point(point, radius), dtype=np.intp)
+        order = np.argsort(np.linalg.norm(self.positions[indices] - point, axis=1), kind="stable")
+        return indices[order]
@@ -1,4 +1,5 @@
 import json
+from datetime import datetime
 from backend.podcast.ml.retrieval.db.db_utils import DBUtils
 
 
@@ -21,6 +22,9 @@ class Article:
         self.embedding = embedding
 
         self.date = all_data["pub_date"]
+        # date is in format of "2025-01-01T00:44:39+0000"; parse it once here so that
+        # consumers (e.g. the bandit's time window) can work on epoch seconds directly.
+        self.timestamp = datetime.strptime(self.date, "%Y-%m-%dT%H:%M:%S%z").timestamp()
 
         self._id = None
 
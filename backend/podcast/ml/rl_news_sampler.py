@@ -27,23 +27,15 @@ if __name__ == '__main__':
         "Science",
     ]
 
-    topic_embeddigns = [
-
-    ]
-
     score = [
         5,
         2,
         1
     ]
 
-    for topic in liked_topics:
-        topic_embedding = Embedor().embed(topic)
-        topic_embeddigns.append(topic_embedding)
-        # score.append(3)
-
-    # Seed the model with user-specified topics.
-    model.seeding(seed_embeddings=topic_embeddigns, seed_scores=score)
+    # Seed the model with user-specified topics, embedded in one batch by a single Embedor.
+    embedor = Embedor()
+    model.seed_topics(liked_topics, score, embedor)
 
     # use user input
     while True:
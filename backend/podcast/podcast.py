@@ -34,7 +34,7 @@ logging.getLogger("httpcore").setLevel(logging.WARNING)
 logging.getLogger("pydub").setLevel(logging.WARNING)
 
 class PodcastRunner:
-    def __init__(self):
+    def __init__(self, rl_agent=None):
         # Get the absolute path to the project root
         self.project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         
@@ -54,7 +54,8 @@ class PodcastRunner:
         self.pipeline = NewsPodcastPipeline(
             perplexity_api_key=os.getenv("PERPLEXITY_API_KEY"),
             openai_api_key=os.getenv("OPENAI_API_KEY"),
-            mistral_api_key=os.getenv("MISTRAL_API_KEY")
+            mistral_api_key=os.getenv("MISTRAL_API_KEY"),
+            rl_agent=rl_agent
         )
         # Pass the output directory to PodcastAudioGenerator
         self.audio_generator = PodcastAudioGenerator(output_dir=self.podcast_dir)
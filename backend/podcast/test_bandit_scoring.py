@@ -0,0 +1,18 @@
+import numpy as np
+from backend.podcast.ml.inference.rl_bandit import HybridLinUCBModel
+from backend.podcast.ml.benchmarks.bench_scoring import reference_scores
+from backend.podcast.ml.benchmarks.synthetic import make_articles, random_feedback
+
+
+def test_batched_scores_match_loop():
+    model = HybridLinUCBModel(make_articles(60, 8), alpha=1.0)
+    model.seeding(np.random.default_rng(1).standard_normal((3, 8)).tolist(), [-3, 2, 5])
+    random_feedback(model, 40)
+    indices = np.arange(model.n_articles)
+    beta_hat = model.A0_inv @ model.b0
+
+    expected = reference_scores(model, indices)
+    actual = model._score_arms(indices, beta_hat)
+
+    assert np.allclose(actual, expected, rtol=1e-9, atol=1e-9)
+    assert np.array_equal(np.argsort(-actual, kind="stable"), np.argsort(-expected, kind="stable"))
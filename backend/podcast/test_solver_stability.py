@@ -0,0 +1,99 @@
+import copy
+import numpy as np
+import pytest
+from backend.podcast.ml.inference.rl_bandit import HybridLinUCBModel, TiedHybridLinUCBModel
+from backend.podcast.ml.inference.precision import CholeskyFactor, WoodburyInverse
+from backend.podcast.ml.inference.score_cache import QuadCache
+from backend.podcast.ml.benchmarks.synthetic import make_articles
+
+
+def dense_reference(model):
+    """
+    beta_hat and the scores of every arm of `model`, from a fresh dense solve against its A0.
+    """
+    reference = copy.copy(model)
+    reference.A0_factor = WoodburyInverse(model.k)
+    reference.A0_factor.set_matrix(model.A0)
+    reference._quad_cache = QuadCache(model.corpus.capacity)
+    beta = np.linalg.solve(model.A0, model.b0)
+    return beta, reference._score_arms(np.arange(model.n_slots), beta)
+
+
+def run_events(model, n_events=2000, n_batches=50, seed=0):
+    rng = np.random.default_rng(seed)
+    for article in rng.integers(model.n_articles, size=n_events):
+        model.feedback(int(article), float(rng.integers(1, 101)))
+    for _ in range(n_batches):
+        articles = rng.choice(model.n_articles, size=20, replace=False)
+        model.feedback_many(articles.tolist(), rng.integers(1, 101, size=20).astype(float).tolist())
+
+
+@pytest.mark.parametrize("model_class", [TiedHybridLinUCBModel, HybridLinUCBModel])
+def test_solvers_match_dense_solve(model_class):
+    # Enough arms that A0 stays positive definite over the run, so that the Cholesky
+    # factor is updated throughout (the LU fallback is covered below).
+    articles = make_articles(1000, 16)
+    indices = np.arange(len(articles))
+    results = {}
+    for solver in ("inverse", "cholesky"):
+        # No periodic refactorization, so that any drift accumulates over the whole run.
+        model = model_class(articles, alpha=1.0, solver=solver, refactor_every=10 ** 6)
+        run_events(model)
+        if solver == "cholesky":
+            assert model.A0_factor.L is not None
+        beta = model.A0_factor.solve(model.b0)
+        scores = model._score_arms(indices, beta)
+        beta_ref, scores_ref = dense_reference(model)
+        assert np.allclose(beta, beta_ref, rtol=1e-8, atol=1e-10)
+        assert np.allclose(scores, scores_ref, rtol=1e-8, atol=1e-10)
+        results[solver] = model, beta, scores
+
+    (inverse, beta_inv, scores_inv), (cholesky, beta_chol, scores_chol) = results.values()
+    assert np.allclose(inverse.A0, cholesky.A0, rtol=1e-12, atol=1e-12)
+    assert np.allclose(beta_inv, beta_chol, rtol=1e-8, atol=1e-10)
+    assert np.allclose(scores_inv, scores_chol, rtol=1e-8, atol=1e-10)
+
+
+def test_cholesky_falls_back_to_lu_when_indefinite():
+    rng = np.random.default_rng(0)
+    d = 6
+    factor = CholeskyFactor(d, refactor_every=10 ** 6)
+    U = rng.standard_normal((d, 3))
+    factor.update(U, [2.0, 1.0, 0.5])
+    assert factor.L is not None
+
+    # A downdate larger than the smallest eigenvalue leaves A0 indefinite: no factor exists.
+    u = np.linalg.eigh(factor.matrix)[1][:, 0]
+    factor.update(u, [-2.0 * np.linalg.eigvalsh(factor.matrix)[-1]])
+    assert factor.L is None
+    assert np.linalg.eigvalsh(factor.matrix)[0] < 0
+
+    X = rng.standard_normal((10, d))
+    inv = np.linalg.inv(factor.matrix)
+    assert np.allclose(factor.solve(X.T), inv @ X.T)
+    assert np.allclose(factor.quad(X), np.einsum("mi,ij,mj->m", X, inv, X))
+
+    # Further updates keep solving with LU, until a refactorization finds A0 definite again.
+    factor.update(rng.standard_normal(d), [1.0])
+    assert np.allclose(factor.solve(X.T), np.linalg.solve(factor.matrix, X.T))
+    factor.update(u, [4.0 * np.linalg.eigvalsh(factor.matrix)[-1]])
+    factor.refactor()
+    assert factor.L is not None
+    assert np.allclose(factor.solve(X.T), np.linalg.solve(factor.matrix, X.T))
+
+
+def test_indefinite_a0_scores_match_dense_solve():
+    model = TiedHybridLinUCBModel(make_articles(1000, 16), alpha=1.0, solver="cholesky")
+    run_events(model, n_events=200, n_batches=5)
+    assert model.A0_factor.L is not None
+    u = np.linalg.eigh(model.A0)[1][:, 0]
+    c = [-2.0 * np.linalg.eigvalsh(model.A0)[-1]]
+    # Through the q cache, as feedback does, so that cached entries follow the downdate.
+    model._quad_cache.update(model.A0_factor, u, c)
+    model.A0_factor.update(u, c)
+    assert model.A0_factor.L is None
+
+    beta = model.A0_factor.solve(model.b0)
+    beta_ref, scores_ref = dense_reference(model)
+    assert np.allclose(beta, beta_ref)
+    assert np.allclose(model._score_arms(np.arange(model.n_slots), beta), scores_ref)
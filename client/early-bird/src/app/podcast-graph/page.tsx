@@ -2,6 +2,7 @@
 
 import React, { useEffect, useState } from 'react';
 import dynamic from 'next/dynamic';
+import { io } from 'socket.io-client';
 import styles from './PodcastGraph.module.css';
 
 // Dynamically import Plotly to ensure it runs only on the client-side
@@ -36,6 +37,16 @@ const PodcastGraph: React.FC = () => {
     };
 
     fetchNodes();
+
+    // The server pushes a new layout when a refined or refitted one is ready
+    const socket = io('http://localhost:8000');
+    socket.on('graph_layout', (data) => {
+      setNodes(data.nodes);
+    });
+
+    return () => {
+      socket.disconnect();
+    };
   }, []);
 
   useEffect(() => {